@@ -0,0 +1,223 @@
+"""Measure the /calendar activity array and heatmap cache on a ten-year vault.
+
+Writes daily notes (with gaps) into a git repository with a bare remote and
+a second clone acting as another device, then reports the cost of building
+the per-day array from the ``YYYY/MM`` layout, of rendering every year cold
+and from the cache, of the update after one saved entry, and of applying a
+pull that edits and deletes notes on the other device. Note files opened
+while building and rendering are counted and must be zero. Finally the
+incrementally maintained array is compared with a fresh rebuild.
+
+    uv run python benchmarks/activity_calendar.py --years 10 --fill 0.7
+"""
+
+import argparse
+import asyncio
+import builtins
+import io
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from dairy_bot.services.activity import (  # noqa: E402
+    FORMAT_PNG,
+    FORMAT_SVG,
+    ActivityCalendar,
+    png_available,
+)
+from dairy_bot.services.git_sync import GitService  # noqa: E402
+from dairy_bot.services.storage import append_entry  # noqa: E402
+
+TZ = ZoneInfo("UTC")
+WORDS = "slept badly but the walk in the park fixed the mood before work".split()
+
+
+def git(*args: str, cwd: Path) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=cwd, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+def write_vault(journal: Path, first: date, last: date, fill: float, rng: random.Random) -> int:
+    notes = 0
+    day = first
+    while day <= last:
+        if rng.random() < fill:
+            note = journal / f"{day:%Y}" / f"{day:%m}" / f"{day:%Y-%m-%d}.md"
+            note.parent.mkdir(parents=True, exist_ok=True)
+            body = "".join(
+                f"## {9 + number:02d}:00\n\n{' '.join(rng.choices(WORDS, k=rng.randint(5, 80)))}\n\n"
+                for number in range(rng.randint(1, 5))
+            )
+            note.write_text(f"# {day:%Y-%m-%d}\n\n{body}")
+            notes += 1
+        day += timedelta(days=1)
+    return notes
+
+
+@contextmanager
+def count_note_opens(journal: Path):
+    """Count opens of ``*.md`` files under ``journal`` through open()/os.open()."""
+    opened: list[str] = []
+    prefix = str(journal)
+    real_open, real_io_open, real_os_open = builtins.open, io.open, os.open
+
+    def record(path) -> None:
+        text = os.fspath(path) if isinstance(path, (str, bytes, os.PathLike)) else ""
+        text = text.decode() if isinstance(text, bytes) else text
+        if text.startswith(prefix) and text.endswith(".md"):
+            opened.append(text)
+
+    def patched_open(file, *args, **kwargs):
+        record(file)
+        return real_open(file, *args, **kwargs)
+
+    def patched_os_open(path, *args, **kwargs):
+        record(path)
+        return real_os_open(path, *args, **kwargs)
+
+    builtins.open = io.open = patched_open
+    os.open = patched_os_open
+    try:
+        yield opened
+    finally:
+        builtins.open, io.open, os.open = real_open, real_io_open, real_os_open
+
+
+def ms(seconds: float) -> str:
+    return f"{seconds * 1000:.1f} ms"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--fill", type=float, default=0.7, help="share of days with a note")
+    parser.add_argument("--saves", type=int, default=100)
+    parser.add_argument("--pulled-notes", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    last_year = 2024
+    first_year = last_year - args.years + 1
+    years = list(range(first_year, last_year + 1))
+
+    root = Path(tempfile.mkdtemp(prefix="dairy-calendar-"))
+    try:
+        remote = root / "remote.git"
+        git("init", "-q", "--bare", "-b", "main", str(remote), cwd=root)
+        journal = root / "journal"
+        git("clone", "-q", str(remote), str(journal), cwd=root)
+        git("checkout", "-q", "-b", "main", cwd=journal)
+        git("config", "user.name", "bench", cwd=journal)
+        git("config", "user.email", "bench@example.com", cwd=journal)
+        notes = write_vault(
+            journal, date(first_year, 1, 1), date(last_year, 12, 31), args.fill, rng
+        )
+        git("add", "-A", cwd=journal)
+        git("commit", "-q", "-m", "vault", cwd=journal)
+        git("push", "-q", "-u", "origin", "main", cwd=journal)
+        other = root / "other"
+        git("clone", "-q", str(remote), str(other), cwd=root)
+        git("config", "user.name", "other", cwd=other)
+        git("config", "user.email", "other@example.com", cwd=other)
+
+        service = GitService(journal, timezone=TZ)
+        calendar = ActivityCalendar(journal)
+        formats = [FORMAT_SVG] + ([FORMAT_PNG] if png_available() else [])
+        with count_note_opens(journal) as opened:
+            started = time.perf_counter()
+            calendar.rebuild()
+            build = time.perf_counter() - started
+            cold: dict[str, float] = {}
+            for fmt in formats:
+                started = time.perf_counter()
+                for year in years:
+                    calendar.render(year, fmt)
+                cold[fmt] = (time.perf_counter() - started) / len(years)
+            started = time.perf_counter()
+            for year in years:
+                for fmt in formats:
+                    calendar.render(year, fmt)
+            cached = (time.perf_counter() - started) / (len(years) * len(formats))
+        service.add_pull_listener(calendar.apply_changes)
+
+        # Saves touch one note each; only that year's images are re-rendered.
+        renders_before = {year: calendar.render(year, FORMAT_SVG) for year in years}
+        updates = []
+        moment = datetime(last_year, 12, 31, 8, 0, tzinfo=TZ)
+        for number in range(args.saves):
+            note = asyncio.run(append_entry(journal, f"save {number}", moment=moment, timezone=TZ))
+            started = time.perf_counter()
+            calendar.update_note(note)
+            updates.append(time.perf_counter() - started)
+            moment += timedelta(minutes=5)
+        stale = [year for year in years
+                 if calendar.render(year, FORMAT_SVG) is not renders_before[year]]
+        git("add", "-A", cwd=journal)
+        git("commit", "-q", "-m", "saves", cwd=journal)
+        git("push", "-q", "origin", "main", cwd=journal)
+
+        # The other device edits some notes, deletes a few and adds one.
+        git("pull", "-q", cwd=other)
+        existing = sorted(other.glob("[0-9]*/[0-9]*/*.md"))
+        picked = rng.sample(existing, min(args.pulled_notes, len(existing)))
+        for note in picked[5:]:
+            with note.open("a") as file:
+                file.write("## 23:59\n\nadded on the laptop\n\n")
+        for note in picked[:5]:
+            git("rm", "-q", note.relative_to(other).as_posix(), cwd=other)
+        added = other / f"{first_year - 1}" / "12" / f"{first_year - 1}-12-31.md"
+        added.parent.mkdir(parents=True)
+        added.write_text(f"# {first_year - 1}-12-31\n\n## 10:00\n\nan old note\n\n")
+        git("add", "-A", cwd=other)
+        git("commit", "-q", "-m", "laptop edits", cwd=other)
+        git("push", "-q", "origin", "main", cwd=other)
+        started = time.perf_counter()
+        service.pull_changes()
+        pull_total = time.perf_counter() - started
+        started = time.perf_counter()
+        calendar.apply_changes(service.changed_files("HEAD~1", "HEAD"))
+        apply_only = time.perf_counter() - started
+
+        fresh = ActivityCalendar(journal)
+        fresh.rebuild()
+        all_years = sorted(set(calendar.years()) | set(fresh.years()))
+        mismatched = [year for year in all_years if calendar.days(year) != fresh.days(year)]
+
+        print(f"vault: {args.years} years, {notes} notes")
+        print(f"build from the YYYY/MM layout: {ms(build)}; note files opened: {len(opened)}")
+        for fmt in formats:
+            print(f"render {fmt} cold: {ms(cold[fmt])} per year")
+        print(f"render from cache: {cached * 1e6:.1f} us")
+        print(f"update per save: p50 {statistics.median(updates) * 1e6:.1f} us, "
+              f"max {max(updates) * 1e6:.1f} us; re-rendered years after saves: {stale}")
+        print(f"pull of {args.pulled_notes} edited/deleted notes: {ms(pull_total)} incl. git, "
+              f"array update alone {ms(apply_only)}")
+        print(f"years after the pull: {calendar.years()[0]}-{calendar.years()[-1]}")
+        ok = (
+            not opened
+            and not mismatched
+            and stale == [last_year]
+            and calendar.years()[0] == first_year - 1
+        )
+        if mismatched:
+            print("mismatched years:", mismatched)
+        print("OK" if ok else "FAILED")
+        return 0 if ok else 1
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""Simulate several devices appending to the same journal at once.
+
+Creates a bare "remote" and one clone per writer. Every writer repeatedly
+pulls, appends an entry with ``append_entry`` and calls ``commit_and_push``,
+all at the same time and mostly into the same daily note; the last writer
+alternates between the neighbouring days so nav lines change concurrently
+too. Afterwards every clone pulls once more and the script checks that all
+clones agree, that every entry made it, and that no rebase/merge is left
+half-done. Exits non-zero on any lost entry, diverged clone or failed pull.
+
+    uv run python benchmarks/concurrent_sync.py --writers 3 --rounds 20
+"""
+
+import argparse
+import asyncio
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from dairy_bot.services.git_sync import GitService  # noqa: E402
+from dairy_bot.services.storage import append_entry  # noqa: E402
+
+TZ = ZoneInfo("UTC")
+DAY = datetime(2024, 5, 15, 8, 0, tzinfo=TZ)
+UNFINISHED_MARKERS = ("rebase-merge", "rebase-apply", "MERGE_HEAD")
+
+
+def git(*args: str, cwd: Path | None = None) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=cwd, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+def make_clones(root: Path, count: int) -> list[Path]:
+    remote = root / "remote.git"
+    git("init", "-q", "--bare", "-b", "main", str(remote))
+    seed = root / "seed"
+    git("clone", "-q", str(remote), str(seed))
+    git("checkout", "-q", "-b", "main", cwd=seed)
+    (seed / "README.md").write_text("# Journal\n")
+    git("add", "README.md", cwd=seed)
+    git("-c", "user.name=seed", "-c", "user.email=seed@example.com",
+        "commit", "-q", "-m", "init", cwd=seed)
+    git("push", "-q", "-u", "origin", "main", cwd=seed)
+
+    clones = []
+    for index in range(count):
+        clone = root / f"device-{index}"
+        git("clone", "-q", str(remote), str(clone))
+        git("config", "user.name", f"device-{index}", cwd=clone)
+        git("config", "user.email", f"device-{index}@example.com", cwd=clone)
+        clones.append(clone)
+    return clones
+
+
+def writer(
+    index: int,
+    clone: Path,
+    rounds: int,
+    neighbours: bool,
+    start: threading.Barrier,
+    results: dict[int, dict[str, int]],
+) -> None:
+    service = GitService(clone, timezone=TZ)
+    stats = {"pull_failed": 0, "push_deferred": 0}
+    start.wait()
+    for number in range(rounds):
+        moment = DAY + timedelta(minutes=number * 10 + index)
+        if neighbours:
+            moment += timedelta(days=1 if number % 2 else -1)
+        if not service.pull_changes():
+            stats["pull_failed"] += 1
+        note = asyncio.run(
+            append_entry(clone, f"device {index} entry {number}", moment=moment, timezone=TZ)
+        )
+        if not service.commit_and_push(note):
+            # Retries ran out under contention; the commit goes out with the next push.
+            stats["push_deferred"] += 1
+    results[index] = stats
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=3)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix="dairy-sync-sim-"))
+    try:
+        clones = make_clones(root, args.writers)
+        barrier = threading.Barrier(args.writers)
+        last = args.writers - 1 if args.writers > 1 else None
+        results: dict[int, dict[str, int]] = {}
+        threads = [
+            threading.Thread(
+                target=writer,
+                args=(index, clone, args.rounds, index == last, barrier, results),
+            )
+            for index, clone in enumerate(clones)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        for clone in clones:
+            GitService(clone, timezone=TZ).pull_changes()
+
+        heads = {git("rev-parse", "HEAD", cwd=clone) for clone in clones}
+        notes = sorted(path.relative_to(clones[0]) for path in clones[0].glob("*/*/*.md"))
+        texts = "".join((clones[0] / note).read_text() for note in notes)
+        missing = [
+            f"device {index} entry {number}"
+            for index in range(args.writers)
+            for number in range(args.rounds)
+            if f"device {index} entry {number}\n" not in texts
+        ]
+        unfinished = [
+            clone.name
+            for clone in clones
+            if any((clone / ".git" / name).exists() for name in UNFINISHED_MARKERS)
+        ]
+        failures = sum(stats["pull_failed"] for stats in results.values())
+
+        print(f"{args.writers} writers x {args.rounds} entries in {elapsed:.1f}s")
+        for index, stats in sorted(results.items()):
+            print(f"device-{index}: {stats}")
+        print(f"commits on remote: {git('rev-list', '--count', 'main', cwd=root / 'remote.git')}")
+        print(f"notes: {', '.join(str(note) for note in notes)}")
+        print(
+            f"clones agree: {len(heads) == 1}, missing entries: {len(missing)}, "
+            f"unfinished rebases: {len(unfinished)}"
+        )
+        if missing:
+            print("missing:", ", ".join(missing[:10]))
+        ok = len(heads) == 1 and not missing and not unfinished and not failures
+        print("OK" if ok else "FAILED")
+        return 0 if ok else 1
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""Measure GitService sync latency on a synthetic long-lived journal repo.
+
+Builds a bare "remote" with N commits (one journal entry per commit, like the
+bot produces) via ``git fast-import``, clones it, and times ``pull_changes``,
+``is_dirty`` and ``commit_and_push`` before and after ``run_maintenance``.
+Also reports the time to bootstrap a partial clone versus a full one, and
+checks that a bootstrap keeps bot state already written to ``.dairy``.
+
+    uv run python benchmarks/git_maintenance.py --commits 50000
+"""
+
+import argparse
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from dairy_bot.services.git_sync import GitService  # noqa: E402
+
+
+def build_remote(root: Path, commits: int) -> Path:
+    remote = root / "remote.git"
+    subprocess.run(["git", "init", "-q", "--bare", "-b", "main", str(remote)], check=True)
+    subprocess.run(
+        ["git", "-C", str(remote), "config", "uploadpack.allowFilter", "true"], check=True
+    )
+    start = datetime(2015, 1, 1, 8, 0)
+    lines: list[str] = []
+    contents: dict[str, str] = {}
+    for index in range(commits):
+        moment = start + timedelta(hours=index * 2)
+        path = f"{moment:%Y}/{moment:%m}/{moment:%Y-%m-%d}.md"
+        body = contents.get(path, f"# {moment:%Y-%m-%d}\n\n")
+        body += f"## {moment:%H:%M}\n\nSynthetic entry number {index}.\n\n"
+        contents[path] = body
+        data = body.encode()
+        stamp = int(moment.timestamp())
+        message = f"Journal entry: {moment:%Y-%m-%d %H:%M:%S}".encode()
+        lines.append("commit refs/heads/main")
+        lines.append(f"committer dAIry <bot@example.com> {stamp} +0000")
+        lines.append(f"data {len(message)}")
+        lines.append(message.decode())
+        lines.append(f"M 100644 inline {path}")
+        lines.append(f"data {len(data)}")
+        lines.append(body)
+    stream = "\n".join(lines) + "\n"
+    subprocess.run(
+        ["git", "fast-import", "--quiet"],
+        cwd=remote,
+        input=stream.encode(),
+        check=True,
+    )
+    return remote
+
+
+def time_call(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def measure(service: GitService, note: Path, repeat: int) -> dict[str, float]:
+    repo = service._ensure_repo()
+    counter = iter(range(10**9))
+
+    def save() -> None:
+        with note.open("a", encoding="utf-8") as file:
+            file.write(f"bench line {next(counter)}\n")
+        service.commit_and_push(note)
+
+    return {
+        "pull_changes": time_call(service.pull_changes, repeat),
+        "is_dirty": time_call(
+            lambda: repo.is_dirty(index=True, working_tree=False, untracked_files=False),
+            repeat,
+        ),
+        "commit_and_push": time_call(save, repeat),
+        "rev-list --count": time_call(lambda: repo.git.rev_list("--count", "HEAD"), repeat),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commits", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix="dairy-git-bench-"))
+    try:
+        started = time.perf_counter()
+        remote = build_remote(root, args.commits)
+        print(f"built {args.commits} commits in {time.perf_counter() - started:.1f}s")
+
+        for label, options in (("full clone", {}), ("partial clone", {"clone_filter": "blob:none"})):
+            target = root / label.replace(" ", "-")
+            service = GitService(target, remote_url=remote.as_uri(), **options)
+            started = time.perf_counter()
+            service._ensure_repo()
+            print(f"{label}: {time.perf_counter() - started:.2f}s")
+
+        # Reminders or the update backlog may be saved before the first sync.
+        target = root / "clone-over-state"
+        state = target / ".dairy" / "reminders.json"
+        state.parent.mkdir(parents=True)
+        state.write_text("{}")
+        GitService(target, remote_url=remote.as_uri(), state_dir=state.parent)._ensure_repo()
+        if not (target / ".git").is_dir() or state.read_text() != "{}":
+            print("bootstrap next to the state dir: FAILED")
+            return 1
+        print("bootstrap next to the state dir: OK")
+
+        clone = root / "full-clone"
+        subprocess.run(["git", "-C", str(clone), "config", "user.name", "bench"], check=True)
+        subprocess.run(["git", "-C", str(clone), "config", "user.email", "bench@example.com"], check=True)
+        service = GitService(clone)
+        note = clone / "bench.md"
+
+        before = measure(service, note, args.repeat)
+        started = time.perf_counter()
+        service.run_maintenance(full=True)
+        print(f"run_maintenance(full=True): {time.perf_counter() - started:.2f}s")
+        after = measure(service, note, args.repeat)
+
+        print(f"{'operation':<20}{'before ms':>12}{'after ms':>12}")
+        for name, value in before.items():
+            print(f"{name:<20}{value:>12.1f}{after[name]:>12.1f}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
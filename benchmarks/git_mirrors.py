@@ -0,0 +1,165 @@
+"""Check that backup mirrors never slow down the primary push.
+
+Saves entries through ``GitService.commit_and_push`` into a clone of a local
+bare repository, first without mirrors and then with four of them:
+
+* ``fast``  - a bare repository given by path,
+* ``named`` - a remote configured in the journal repository,
+* ``slow``  - reached through an ``ext::`` transport that sleeps per push,
+* ``late``  - a path that does not exist until half of the saves are done,
+  so its pushes fail and are retried with backoff.
+
+Reports the save latency in both runs, how many pushes each mirror needed
+(the slow one coalesces commits made while it is busy) and checks that every
+mirror ends up at the primary's commit.
+
+    uv run python benchmarks/git_mirrors.py --saves 40 --slow-delay 2
+"""
+
+import argparse
+import asyncio
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from dairy_bot.services.git_sync import GitService  # noqa: E402
+from dairy_bot.services.mirrors import Mirror  # noqa: E402
+from dairy_bot.services.storage import append_entry  # noqa: E402
+
+TZ = ZoneInfo("UTC")
+
+
+def git(*args: str, cwd: Path) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=cwd, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+def bare(path: Path) -> Path:
+    git("init", "-q", "--bare", "-b", "main", str(path), cwd=path.parent)
+    return path
+
+
+def setup_journal(root: Path) -> tuple[Path, Path]:
+    root.mkdir()
+    remote = bare(root / "primary.git")
+    journal = root / "journal"
+    git("clone", "-q", str(remote), str(journal), cwd=root)
+    git("checkout", "-q", "-b", "main", cwd=journal)
+    git("config", "user.name", "bench", cwd=journal)
+    git("config", "user.email", "bench@example.com", cwd=journal)
+    (journal / "README.md").write_text("# Journal\n")
+    git("add", "README.md", cwd=journal)
+    git("commit", "-q", "-m", "init", cwd=journal)
+    git("push", "-q", "-u", "origin", "main", cwd=journal)
+    return remote, journal
+
+
+def save_entries(
+    service: GitService, journal: Path, saves: int, on_save=None
+) -> list[float]:
+    latencies = []
+    moment = datetime(2024, 1, 1, 9, 0, tzinfo=TZ)
+    for number in range(saves):
+        note = asyncio.run(
+            append_entry(journal, f"entry {number}", moment=moment, timezone=TZ)
+        )
+        started = time.perf_counter()
+        if not service.commit_and_push(note):
+            raise RuntimeError("primary push failed")
+        latencies.append(time.perf_counter() - started)
+        moment += timedelta(minutes=7)
+        if on_save is not None:
+            on_save(number)
+    return latencies
+
+
+def describe(latencies: list[float]) -> str:
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f"p50 {statistics.median(ordered) * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--saves", type=int, default=40)
+    parser.add_argument("--slow-delay", type=float, default=2.0, help="seconds per push")
+    parser.add_argument("--timeout", type=float, default=60.0, help="wait for mirrors")
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix="dairy-mirrors-"))
+    try:
+        _, plain_journal = setup_journal(root / "plain")
+        baseline = save_entries(GitService(plain_journal, timezone=TZ), plain_journal, args.saves)
+
+        primary, journal = setup_journal(root / "mirrored")
+        named = bare(root / "mirrored" / "named.git")
+        git("remote", "add", "nas", str(named), cwd=journal)
+        slow_target = bare(root / "mirrored" / "slow.git")
+        transport = root / "slow-remote.sh"
+        transport.write_text(f'#!/bin/sh\nsleep {args.slow_delay}\nexec git "$1" "$2"\n')
+        transport.chmod(0o755)
+        git("config", "protocol.ext.allow", "always", cwd=journal)
+        late_target = root / "mirrored" / "late.git"
+        targets = {
+            "fast": str(bare(root / "mirrored" / "fast.git")),
+            "named": "nas",
+            "slow": f"ext::{transport} %s {slow_target}",
+            "late": str(late_target),
+        }
+        mirrors = [
+            Mirror(name, target, journal, timezone=TZ, retry_base=0.2, retry_max=1.0)
+            for name, target in targets.items()
+        ]
+        service = GitService(journal, timezone=TZ, mirrors=mirrors)
+
+        def bring_late_mirror_up(number: int) -> None:
+            if number == args.saves // 2:
+                bare(late_target)
+
+        mirrored = save_entries(service, journal, args.saves, bring_late_mirror_up)
+        started = time.perf_counter()
+        idle = all(mirror.wait_idle(args.timeout) for mirror in mirrors)
+        drained = time.perf_counter() - started
+
+        head = git("rev-parse", "HEAD", cwd=journal)
+        repos = {"fast": root / "mirrored" / "fast.git", "named": named,
+                 "slow": slow_target, "late": late_target}
+        print(f"{args.saves} saves, slow mirror delay {args.slow_delay}s")
+        print(f"save latency without mirrors: {describe(baseline)}")
+        print(f"save latency with 4 mirrors:  {describe(mirrored)}")
+        print(f"mirrors caught up {drained:.1f}s after the last save")
+        problems = []
+        for mirror in mirrors:
+            status = mirror.status()
+            mirror_head = git("rev-parse", "refs/heads/main", cwd=repos[mirror.name])
+            print(f"  {mirror.name:<6} pushes {mirror.pushes:3d}, "
+                  f"at {mirror_head[:8]}, failures now {status.failures}")
+            if mirror_head != head:
+                problems.append(f"{mirror.name} is at {mirror_head[:8]}, not {head[:8]}")
+        if git("rev-parse", "refs/heads/main", cwd=primary) != head:
+            problems.append("primary is behind")
+        slowdown = statistics.median(mirrored) - statistics.median(baseline)
+        if slowdown > args.slow_delay / 2:
+            problems.append(f"mirrors added {slowdown * 1000:.0f} ms to the median save")
+        if not idle:
+            problems.append("mirrors did not catch up in time")
+        service.close()
+        for problem in problems:
+            print(problem)
+        print("FAILED" if problems else "OK")
+        return 1 if problems else 0
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
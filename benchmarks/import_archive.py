@@ -0,0 +1,246 @@
+"""Import a synthetic Telegram export and check that a crashed run resumes cleanly.
+
+Generates a Telegram Desktop ``result.json`` spanning several years with
+text messages and voice messages (ffmpeg makes the audio), serves an
+OpenAI-compatible ``/chat/completions`` stand-in that answers after a fixed
+delay, and imports the export into a clone of a local bare repository.
+
+The same export is imported twice into fresh journals: once straight
+through, and once with the first run "crashing" (cancelled) right after its
+first commit and a second run finishing the job. Both journals must end up
+with the same notes, every message exactly once, and a clean working tree.
+Reports entries/s, commits, and peak concurrent transcription requests.
+
+    uv run python benchmarks/import_archive.py --messages 20000 --voice 200 \\
+        --years 5 --concurrency 8 --llm-delay 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from load_test import FakeCompletions, make_voice_file, serve  # noqa: E402
+
+from dairy_bot.config import Settings  # noqa: E402
+from dairy_bot.services.importer import (  # noqa: E402
+    ImportReport,
+    ImportState,
+    JournalImporter,
+    read_source,
+)
+from dairy_bot.services.registry import ServiceRegistry  # noqa: E402
+
+USER_ID = 4242
+WORDS = "walked to the river met an old friend and talked about work and books".split()
+TRANSCRIPT_RE = re.compile(r"transcription number \d+")
+
+
+class CountingCompletions(FakeCompletions):
+    """Fake completions that also track the peak number of requests in flight."""
+
+    def __init__(self, delay: float) -> None:
+        super().__init__(delay)
+        self.in_flight = 0
+        self.peak = 0
+
+    async def handle(self, request: web.Request) -> web.StreamResponse:
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            return await super().handle(request)
+        finally:
+            self.in_flight -= 1
+
+
+def git(*args: str, cwd: Path) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=cwd, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+def prepare_journal(root: Path) -> Path:
+    root.mkdir()
+    remote = root / "remote.git"
+    journal = root / "journal"
+    git("init", "-q", "--bare", "-b", "main", str(remote), cwd=root)
+    git("clone", "-q", str(remote), str(journal), cwd=root)
+    git("checkout", "-q", "-b", "main", cwd=journal)
+    git("config", "user.name", "bench", cwd=journal)
+    git("config", "user.email", "bench@example.com", cwd=journal)
+    (journal / "README.md").write_text("# Journal\n")
+    git("add", "README.md", cwd=journal)
+    git("commit", "-q", "-m", "init", cwd=journal)
+    git("push", "-q", "-u", "origin", "main", cwd=journal)
+    return journal
+
+
+def write_export(root: Path, args: argparse.Namespace, voice: Path | None) -> Path:
+    """A ``result.json`` with messages spread over ``args.years`` years."""
+    rng = random.Random(args.seed)
+    export = root / "export"
+    (export / "voice_messages").mkdir(parents=True)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc) - timedelta(days=365 * args.years)
+    span = int(timedelta(days=365 * args.years).total_seconds())
+    stamps = sorted(rng.randrange(span) for _ in range(args.messages))
+    voice_ids = set(rng.sample(range(args.messages), args.voice if voice else 0))
+    messages = []
+    for number, offset in enumerate(stamps, start=1):
+        moment = start + timedelta(seconds=offset)
+        message = {
+            "id": number,
+            "type": "message",
+            "date": moment.strftime("%Y-%m-%dT%H:%M:%S"),
+            "date_unixtime": str(int(moment.timestamp())),
+            "from": "Me",
+            "from_id": f"user{USER_ID}",
+            "text": f"message {number}: " + " ".join(rng.choices(WORDS, k=rng.randint(5, 30))),
+        }
+        if number - 1 in voice_ids:
+            name = f"voice_messages/audio_{number}@{moment:%d-%m-%Y_%H-%M-%S}.ogg"
+            shutil.copyfile(voice, export / name)
+            message.update({"file": name, "media_type": "voice_message", "text": ""})
+        messages.append(message)
+    messages.append({"id": args.messages + 1, "type": "service", "action": "pin_message"})
+    path = export / "result.json"
+    path.write_text(json.dumps({"name": "Saved Messages", "messages": messages}))
+    return path
+
+
+def make_settings(journal: Path, llm_port: int) -> Settings:
+    return Settings(
+        _env_file=None,
+        BOT_TOKEN="123456:import-bench",
+        ALLOWED_USER_ID=USER_ID,
+        OPENROUTER_API_KEY="sk-import-bench",
+        OPENROUTER_BASE_URL=f"http://127.0.0.1:{llm_port}/v1",
+        JOURNAL_DIR=journal,
+        TIMEZONE="UTC",
+        GIT_MAINTENANCE_ENABLED=False,
+    )
+
+
+async def import_once(
+    export: Path, journal: Path, args: argparse.Namespace, crash: bool = False
+) -> tuple[ImportReport | None, int]:
+    """One importer run; with ``crash`` it is cancelled after its first commit."""
+    completions = CountingCompletions(args.llm_delay)
+    runner, port = await serve(completions.app())
+    try:
+        settings = make_settings(journal, port)
+        items = read_source(export, settings.timezone)
+        state = ImportState.for_source(settings.resolved_state_dir(), export)
+        importer = JournalImporter(
+            settings,
+            ServiceRegistry(settings).git,
+            state,
+            concurrency=args.concurrency,
+            commit_entries=args.commit_entries,
+        )
+        task = asyncio.create_task(importer.run(items))
+        if not crash:
+            return await task, completions.peak
+        while not state.progress_path.exists() and not task.done():
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(args.llm_delay)  # die in the middle of the next chunk
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return None, completions.peak
+    finally:
+        await runner.cleanup()
+
+
+def journal_notes(journal: Path) -> dict[str, str]:
+    return {
+        path.relative_to(journal).as_posix(): TRANSCRIPT_RE.sub("transcript", path.read_text())
+        for path in sorted(journal.glob("[0-9]*/[0-9]*/*.md"))
+    }
+
+
+def check_journal(journal: Path, args: argparse.Namespace) -> list[str]:
+    problems = []
+    text = "".join(journal_notes(journal).values())
+    numbers = [int(number) for number in re.findall(r"^message (\d+):", text, re.MULTILINE)]
+    expected_text = args.messages - args.voice
+    if len(numbers) != expected_text or len(set(numbers)) != expected_text:
+        problems.append(f"{len(numbers)} text entries ({len(set(numbers))} distinct), "
+                        f"expected {expected_text}")
+    transcripts = text.count("Load test transcript")
+    if transcripts != args.voice:
+        problems.append(f"{transcripts} transcripts, expected {args.voice}")
+    if git("status", "--porcelain", cwd=journal):
+        problems.append("uncommitted changes left in the journal")
+    if git("rev-parse", "HEAD", cwd=journal) != git("rev-parse", "origin/main", cwd=journal):
+        problems.append("commits not pushed")
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--voice", type=int, default=200, help="how many messages are voice")
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--commit-entries", type=int, default=2000)
+    parser.add_argument("--llm-delay", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix="dairy-import-"))
+    try:
+        voice = make_voice_file(root, 2.0) if args.voice else None
+        if args.voice and voice is None:
+            print("ffmpeg not found, importing text only")
+            args.voice = 0
+        export = write_export(root, args, voice)
+
+        clean = prepare_journal(root / "clean")
+        report, peak = asyncio.run(import_once(export, clean, args))
+        commits = int(git("rev-list", "--count", "HEAD", cwd=clean)) - 1
+
+        resumed = prepare_journal(root / "resumed")
+        asyncio.run(import_once(export, resumed, args, crash=True))
+        crashed_commits = int(git("rev-list", "--count", "HEAD", cwd=resumed)) - 1
+        second, _ = asyncio.run(import_once(export, resumed, args))
+
+        print(f"{args.messages} messages ({args.voice} voice) over {args.years} years, "
+              f"concurrency {args.concurrency}, llm delay {args.llm_delay}s")
+        print(f"clean run: {report.entries} entries, {report.days} days, "
+              f"{report.notes_written} notes, {commits} commits, {report.seconds:.1f}s, "
+              f"{report.entries_per_second:.0f} entries/s, {report.transcribed} transcribed, "
+              f"peak {peak} in flight")
+        print(f"crashed run: {crashed_commits} commits before the crash; resumed run: "
+              f"{second.entries} entries, {second.commits} commits, "
+              f"skipped {second.skipped_done} done, reused {second.cached_transcripts} "
+              f"transcripts, transcribed {second.transcribed}, {second.seconds:.1f}s")
+
+        problems = [f"clean: {problem}" for problem in check_journal(clean, args)]
+        problems += [f"resumed: {problem}" for problem in check_journal(resumed, args)]
+        if journal_notes(clean) != journal_notes(resumed):
+            problems.append("resumed journal differs from the clean one")
+        if peak > args.concurrency:
+            problems.append(f"{peak} transcriptions in flight, cap {args.concurrency}")
+        for problem in problems:
+            print(problem)
+        print("FAILED" if problems else "OK")
+        return 1 if problems else 0
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
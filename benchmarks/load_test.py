@@ -0,0 +1,468 @@
+"""End-to-end load test of the real bot against local fake servers.
+
+Starts stand-ins for the Telegram Bot API (``getUpdates``, ``sendMessage``,
+edits, ``getFile`` and file downloads) and an OpenAI-compatible
+``/chat/completions`` endpoint, points ``src/bot.py`` at them through
+``TELEGRAM_API_URL`` / ``OPENROUTER_BASE_URL`` and runs it as a subprocess.
+The journal is a clone of a local bare repository reached through an
+``ext::`` transport that sleeps before every fetch/push, to mimic a remote.
+
+Each virtual client has its own chat and runs closed-loop: it sends one
+update, waits for the bot's answer in that chat, then sends the next one.
+Latency is measured from delivering the update to ``getUpdates`` until:
+
+* text  - the save confirmation,
+* today - the first message of the note,
+* voice - the preview keyboard is shown, the harness presses "Save", and the
+  save confirmation arrives (ffmpeg must be on PATH for voice traffic).
+
+    uv run python benchmarks/load_test.py --clients 4 --duration 30 \\
+        --mix text=70,voice=20,today=10 --git-delay 0.05 --llm-delay 0.5
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from aiohttp import web
+
+ROOT = Path(__file__).resolve().parent.parent
+BOT_TOKEN = "123456:load-test"
+USER_ID = 4242
+CHAT_ID_BASE = 10_000
+REQUEST_TIMEOUT = 120.0
+CONFIRM_PREFIX = "voice_confirm:"
+
+
+@dataclass
+class ChatEvent:
+    method: str
+    payload: dict
+    at: float = field(default_factory=time.perf_counter)
+
+
+class FakeTelegram:
+    """Just enough of the Bot API for aiogram's polling loop and our handlers."""
+
+    def __init__(self, voice_file: Path | None) -> None:
+        self.voice_file = voice_file
+        self.updates: list[dict] = []
+        self.update_ids = itertools.count(1)
+        self.message_ids = itertools.count(1)
+        self.new_updates = asyncio.Event()
+        self.polled = asyncio.Event()
+        self.chats: dict[int, asyncio.Queue[ChatEvent]] = defaultdict(asyncio.Queue)
+        self.delivered: dict[int, float] = {}
+        self.calls: Counter[str] = Counter()
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 2**20)
+        app.router.add_post("/bot{token}/{method}", self.handle_method)
+        app.router.add_get("/file/bot{token}/{path:.*}", self.handle_file)
+        return app
+
+    def push(self, update: dict) -> int:
+        update_id = next(self.update_ids)
+        self.updates.append({"update_id": update_id, **update})
+        self.new_updates.set()
+        return update_id
+
+    async def delivered_at(self, update_id: int) -> float:
+        while update_id not in self.delivered:
+            await asyncio.sleep(0.001)
+        return self.delivered[update_id]
+
+    def _message(self, chat_id: int, **fields) -> dict:
+        return {
+            "message_id": next(self.message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": 1, "is_bot": True, "first_name": "dAIry"},
+            **fields,
+        }
+
+    async def handle_method(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[method] += 1
+        form = dict(await request.post())
+        payload = {
+            key: value if not isinstance(value, str) or not value.startswith(("{", "["))
+            else json.loads(value)
+            for key, value in form.items()
+        }
+        handler = getattr(self, f"api_{method}", None)
+        result = await handler(payload) if handler else True
+        return web.json_response({"ok": True, "result": result})
+
+    async def handle_file(self, request: web.Request) -> web.StreamResponse:
+        if self.voice_file is None:
+            raise web.HTTPNotFound()
+        return web.FileResponse(self.voice_file)
+
+    async def api_getMe(self, payload: dict) -> dict:
+        return {"id": 1, "is_bot": True, "first_name": "dAIry", "username": "dairy_load_bot"}
+
+    async def api_getUpdates(self, payload: dict) -> list[dict]:
+        self.polled.set()
+        offset = int(payload.get("offset") or 0)
+        self.updates = [update for update in self.updates if update["update_id"] >= offset]
+        if not self.updates:
+            self.new_updates.clear()
+            try:
+                await asyncio.wait_for(
+                    self.new_updates.wait(), float(payload.get("timeout") or 0)
+                )
+            except TimeoutError:
+                return []
+        now = time.perf_counter()
+        for update in self.updates:
+            self.delivered.setdefault(update["update_id"], now)
+        return list(self.updates)
+
+    async def api_sendMessage(self, payload: dict) -> dict:
+        chat_id = int(payload["chat_id"])
+        self.chats[chat_id].put_nowait(ChatEvent("sendMessage", payload))
+        return self._message(chat_id, text=payload.get("text", ""))
+
+    async def api_editMessageText(self, payload: dict) -> dict:
+        chat_id = int(payload["chat_id"])
+        self.chats[chat_id].put_nowait(ChatEvent("editMessageText", payload))
+        return self._message(chat_id, text=payload.get("text", ""))
+
+    async def api_editMessageReplyMarkup(self, payload: dict) -> dict:
+        return self._message(int(payload["chat_id"]), text="")
+
+    async def api_getFile(self, payload: dict) -> dict:
+        size = self.voice_file.stat().st_size if self.voice_file else 0
+        return {
+            "file_id": payload["file_id"],
+            "file_unique_id": payload["file_id"],
+            "file_size": size,
+            "file_path": "voice/file.oga",
+        }
+
+
+class FakeCompletions:
+    """OpenAI-compatible chat completions answering after a fixed delay."""
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.requests = 0
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 2**20)
+        app.router.add_post("/v1/chat/completions", self.handle)
+        return app
+
+    async def handle(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        self.requests += 1
+        await asyncio.sleep(self.delay)
+        text = f"Load test transcription number {self.requests}."
+        if not body.get("stream"):
+            return web.json_response(
+                {
+                    "id": f"cmpl-{self.requests}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": [
+                        {
+                            "index": 0,
+                            "finish_reason": "stop",
+                            "message": {"role": "assistant", "content": text},
+                        }
+                    ],
+                }
+            )
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for word in text.split():
+            chunk = {
+                "id": f"cmpl-{self.requests}",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": [{"index": 0, "delta": {"content": word + " "}}],
+            }
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        return response
+
+
+def git(*args: str, cwd: Path | None = None) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=cwd, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+def prepare_journal(root: Path, delay: float) -> tuple[Path, Path]:
+    """Bare remote plus a clone whose origin sleeps ``delay`` per connection."""
+    remote = root / "remote.git"
+    journal = root / "journal"
+    git("init", "-q", "--bare", "-b", "main", str(remote))
+    git("clone", "-q", str(remote), str(journal))
+    git("config", "user.name", "load-test", cwd=journal)
+    git("config", "user.email", "load-test@example.com", cwd=journal)
+    git("checkout", "-q", "-b", "main", cwd=journal)
+    (journal / "README.md").write_text("# Journal\n")
+    git("add", "README.md", cwd=journal)
+    git("commit", "-q", "-m", "init", cwd=journal)
+    git("push", "-q", "-u", "origin", "main", cwd=journal)
+
+    transport = root / "slow-remote.sh"
+    transport.write_text(f'#!/bin/sh\nsleep {delay}\nexec git "$1" "$2"\n')
+    transport.chmod(0o755)
+    git("config", "protocol.ext.allow", "always", cwd=journal)
+    git("config", "remote.origin.url", f"ext::{transport} %s {remote}", cwd=journal)
+    return remote, journal
+
+
+def make_voice_file(root: Path, seconds: float) -> Path | None:
+    if shutil.which("ffmpeg") is None:
+        return None
+    target = root / "voice.oga"
+    subprocess.run(
+        [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+            "-c:a", "libopus", str(target),
+        ],
+        check=True,
+    )
+    return target
+
+
+def parse_mix(text: str) -> dict[str, int]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = int(weight or 1)
+    unknown = set(mix) - {"text", "voice", "today"}
+    if unknown:
+        raise SystemExit(f"Unknown update types in --mix: {', '.join(sorted(unknown))}")
+    return mix
+
+
+class Client:
+    def __init__(self, index: int, telegram: FakeTelegram) -> None:
+        self.chat_id = CHAT_ID_BASE + index
+        self.telegram = telegram
+        self.events = telegram.chats[self.chat_id]
+
+    def _base(self) -> dict:
+        return {
+            "message_id": next(self.telegram.message_ids),
+            "date": int(time.time()),
+            "chat": {"id": self.chat_id, "type": "private"},
+            "from": {"id": USER_ID, "is_bot": False, "first_name": "Load"},
+        }
+
+    def send_message(self, **fields) -> int:
+        return self.telegram.push({"message": {**self._base(), **fields}})
+
+    def press(self, data: str, message_id: int) -> int:
+        return self.telegram.push(
+            {
+                "callback_query": {
+                    "id": str(next(self.telegram.message_ids)),
+                    "chat_instance": str(self.chat_id),
+                    "from": {"id": USER_ID, "is_bot": False, "first_name": "Load"},
+                    "message": {**self._base(), "message_id": message_id, "text": "preview"},
+                    "data": data,
+                }
+            }
+        )
+
+    async def wait_for(self, predicate) -> ChatEvent:
+        while True:
+            event = await self.events.get()
+            if predicate(event):
+                return event
+
+    def drain(self) -> None:
+        while not self.events.empty():
+            self.events.get_nowait()
+
+    async def run_one(self, kind: str, sequence: int) -> float:
+        self.drain()
+        if kind == "text":
+            update_id = self.send_message(text=f"Load test entry {sequence} from chat {self.chat_id}")
+            event = await self.wait_for(lambda e: e.method == "sendMessage")
+        elif kind == "today":
+            update_id = self.send_message(
+                text="/today", entities=[{"type": "bot_command", "offset": 0, "length": 6}]
+            )
+            event = await self.wait_for(lambda e: e.method == "sendMessage")
+        else:
+            update_id = self.send_message(
+                voice={
+                    "file_id": f"voice-{self.chat_id}-{sequence}",
+                    "file_unique_id": f"voice-{self.chat_id}-{sequence}",
+                    "duration": 3,
+                }
+            )
+            preview = await self.wait_for(lambda e: _confirm_data(e) is not None)
+            message_id = int(preview.payload.get("message_id") or 0)
+            self.press(_confirm_data(preview), message_id)
+            event = await self.wait_for(lambda e: e.method == "sendMessage")
+        return event.at - await self.telegram.delivered_at(update_id)
+
+
+def _confirm_data(event: ChatEvent) -> str | None:
+    markup = event.payload.get("reply_markup") or {}
+    for row in markup.get("inline_keyboard", []):
+        for button in row:
+            if str(button.get("callback_data", "")).startswith(CONFIRM_PREFIX):
+                return button["callback_data"]
+    return None
+
+
+def percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def drive(
+    telegram: FakeTelegram, mix: dict[str, int], clients: int, duration: float
+) -> tuple[dict[str, list[float]], Counter[str], float]:
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: Counter[str] = Counter()
+    kinds, weights = list(mix), list(mix.values())
+    sequence = itertools.count(1)
+    deadline = time.perf_counter() + duration
+
+    async def client_loop(index: int) -> None:
+        client = Client(index, telegram)
+        rng = random.Random(index)
+        while time.perf_counter() < deadline:
+            kind = rng.choices(kinds, weights)[0]
+            try:
+                latency = await asyncio.wait_for(
+                    client.run_one(kind, next(sequence)), REQUEST_TIMEOUT
+                )
+            except TimeoutError:
+                errors[kind] += 1
+                continue
+            latencies[kind].append(latency)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop(index) for index in range(clients)))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def serve(app: web.Application) -> tuple[web.AppRunner, int]:
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1]
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    mix = parse_mix(args.mix)
+    root = Path(tempfile.mkdtemp(prefix="dairy-load-"))
+    runners: list[web.AppRunner] = []
+    process: asyncio.subprocess.Process | None = None
+    try:
+        remote, journal = prepare_journal(root, args.git_delay)
+        voice_file = make_voice_file(root, args.voice_seconds) if "voice" in mix else None
+        if "voice" in mix and voice_file is None:
+            print("ffmpeg not found, dropping voice from the mix")
+            mix.pop("voice")
+
+        telegram = FakeTelegram(voice_file)
+        completions = FakeCompletions(args.llm_delay)
+        telegram_runner, telegram_port = await serve(telegram.app())
+        llm_runner, llm_port = await serve(completions.app())
+        runners = [telegram_runner, llm_runner]
+
+        env = {
+            **os.environ,
+            "BOT_TOKEN": BOT_TOKEN,
+            "ALLOWED_USER_ID": str(USER_ID),
+            "OPENROUTER_API_KEY": "sk-load-test",
+            "OPENROUTER_BASE_URL": f"http://127.0.0.1:{llm_port}/v1",
+            "TELEGRAM_API_URL": f"http://127.0.0.1:{telegram_port}",
+            "JOURNAL_DIR": str(journal),
+            "GIT_ENABLED": "true",
+            "GIT_MAINTENANCE_ENABLED": "false",
+            "VOICE_STREAMING": str(args.streaming).lower(),
+            "PYTHONPATH": str(ROOT / "src"),
+        }
+        log = (root / "bot.log").open("wb")
+        # Run from the temp dir so a developer's .env is not picked up.
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, str(ROOT / "src" / "bot.py"),
+            cwd=root, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+        await asyncio.wait_for(telegram.polled.wait(), 60)
+
+        latencies, errors, elapsed = await drive(
+            telegram, mix, args.clients, args.duration
+        )
+
+        total = sum(len(samples) for samples in latencies.values())
+        print(
+            f"{args.clients} clients, {elapsed:.1f}s, git delay {args.git_delay}s, "
+            f"LLM delay {args.llm_delay}s"
+        )
+        print(f"{'type':<8}{'count':>7}{'errors':>8}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+        for kind in mix:
+            samples = latencies.get(kind, [])
+            if not samples:
+                print(f"{kind:<8}{0:>7}{errors[kind]:>8}")
+                continue
+            print(
+                f"{kind:<8}{len(samples):>7}{errors[kind]:>8}{len(samples) / elapsed:>8.1f}"
+                f"{statistics.median(samples) * 1000:>9.0f}"
+                f"{percentile(samples, 0.95) * 1000:>9.0f}"
+                f"{percentile(samples, 0.99) * 1000:>9.0f}"
+            )
+        print(f"total throughput: {total / elapsed:.1f} updates/s")
+        print(f"commits pushed: {int(git('rev-list', '--count', 'main', cwd=remote)) - 1}")
+        print("Bot API calls:", ", ".join(f"{k}={v}" for k, v in telegram.calls.most_common()))
+        if args.keep:
+            print(f"kept {root} (bot log: {root / 'bot.log'})")
+    finally:
+        if process is not None and process.returncode is None:
+            process.send_signal(signal.SIGINT)
+            try:
+                await asyncio.wait_for(process.wait(), 15)
+            except TimeoutError:
+                process.kill()
+        for runner in runners:
+            await runner.cleanup()
+        if not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--mix", default="text=70,voice=20,today=10")
+    parser.add_argument("--git-delay", type=float, default=0.05, help="seconds per fetch/push")
+    parser.add_argument("--llm-delay", type=float, default=0.5, help="seconds per transcription")
+    parser.add_argument("--voice-seconds", type=float, default=3.0)
+    parser.add_argument("--streaming", action="store_true", help="set VOICE_STREAMING=true")
+    parser.add_argument("--keep", action="store_true", help="keep the temp dir and bot log")
+    return asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
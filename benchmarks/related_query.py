@@ -0,0 +1,138 @@
+"""Measure /related latency on a synthetic journal with N entries.
+
+Writes daily notes with random text drawn from a Zipf-like vocabulary, builds
+the memory-mapped TF-IDF index, then times ``add`` (the per-save cost),
+``similar`` queries on a freshly opened index and ``remove`` (the cost of
+/edit and /delete). Removed entries must not come back in results, also
+after reopening the index. Peak RSS is reported so the matrix staying out
+of the heap can be checked.
+
+    uv run --extra related python benchmarks/related_query.py --entries 50000
+"""
+
+import argparse
+import random
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from dairy_bot.services.related import RelatedIndex  # noqa: E402
+
+ENTRIES_PER_DAY = 8
+WORDS_PER_ENTRY = 60
+
+
+def build_journal(root: Path, entries: int, vocabulary: int) -> None:
+    rng = random.Random(42)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = ["".join(rng.choices(letters, k=rng.randint(3, 9))) for _ in range(vocabulary)]
+    weights = [1 / (rank + 1) for rank in range(vocabulary)]
+    day = date(2010, 1, 1)
+    written = 0
+    while written < entries:
+        note = root / f"{day:%Y}" / f"{day:%m}" / f"{day:%Y-%m-%d}.md"
+        note.parent.mkdir(parents=True, exist_ok=True)
+        parts = [f"# {day:%Y-%m-%d}\n\n"]
+        for hour in range(min(ENTRIES_PER_DAY, entries - written)):
+            text = " ".join(rng.choices(words, weights, k=WORDS_PER_ENTRY))
+            parts.append(f"## {hour + 8:02d}:00\n\n{text}\n\n")
+            written += 1
+        note.write_text("".join(parts), encoding="utf-8")
+        day += timedelta(days=1)
+
+
+def percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=50_000)
+    parser.add_argument("--vocabulary", type=int, default=30_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix="dairy-related-bench-"))
+    try:
+        build_journal(root, args.entries, args.vocabulary)
+        index_dir = root / ".dairy" / "related"
+
+        started = time.perf_counter()
+        rows = RelatedIndex(index_dir, root).rebuild()
+        print(f"rebuild: {rows} entries in {time.perf_counter() - started:.2f}s")
+
+        index = RelatedIndex(index_dir, root)
+        started = time.perf_counter()
+        index.rows
+        print(f"open: {(time.perf_counter() - started) * 1000:.0f} ms")
+
+        rng = random.Random(7)
+        sample_texts = [
+            note.read_text(encoding="utf-8")[-400:]
+            for note in rng.sample(sorted(root.glob("*/*/*.md")), 20)
+        ]
+        add_samples = []
+        for offset, text in enumerate(sample_texts):
+            started = time.perf_counter()
+            index.add(date(2100, 1, 1) + timedelta(days=offset), "12:00", text)
+            add_samples.append(time.perf_counter() - started)
+
+        query_samples = []
+        for _ in range(args.queries):
+            text = rng.choice(sample_texts)
+            started = time.perf_counter()
+            index.similar(text, limit=5)
+            query_samples.append(time.perf_counter() - started)
+
+        def added_hits(searched: RelatedIndex) -> list:
+            # A changed query, since identical entries are left out of results.
+            return [
+                hit for text in sample_texts[:10]
+                for hit in searched.similar(f"{text} again", limit=20)
+                if hit.day.year == 2100 and hit.day.day <= 10
+            ]
+
+        if not added_hits(index):
+            print("add: added entries are not found")
+            return 1
+        remove_samples = []
+        for offset, text in enumerate(sample_texts[:10]):
+            started = time.perf_counter()
+            if not index.remove(date(2100, 1, 1) + timedelta(days=offset), "12:00", text):
+                print("remove: entry not found")
+                return 1
+            remove_samples.append(time.perf_counter() - started)
+        reopened = RelatedIndex(index_dir, root)
+        leaked = added_hits(reopened)
+        if leaked or reopened.rows != rows + len(sample_texts) - 10:
+            print(f"remove: {len(leaked)} removed entries still returned, rows {reopened.rows}")
+            return 1
+
+        print(f"{'operation':<12}{'p50 ms':>10}{'p95 ms':>10}")
+        for name, samples in (
+            ("add", add_samples),
+            ("similar", query_samples),
+            ("remove", remove_samples),
+        ):
+            print(
+                f"{name:<12}{statistics.median(samples) * 1000:>10.2f}"
+                f"{percentile(samples, 0.95) * 1000:>10.2f}"
+            )
+        matrix_mb = sum(path.stat().st_size for path in index_dir.iterdir()) / 2**20
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"index on disk: {matrix_mb:.1f} MiB, peak RSS: {peak_mb:.0f} MiB")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
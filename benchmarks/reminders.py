@@ -0,0 +1,185 @@
+"""Drive the reminder dispatcher through simulated days with many schedules.
+
+Builds random schedules (1-3 times a day, weekday subsets, quiet hours,
+a handful of timezones), then advances a fake clock from one heap head to
+the next exactly like the dispatcher loop does and times each tick. Every
+sent reminder is checked against a brute-force expectation. Halfway through
+the run the dispatcher is "restarted" from its persisted store after a gap.
+A user who missed reminders during the downtime gets exactly one late
+reminder if the first missed slot is on their current local day, and none
+otherwise (``ReminderDispatcher._first_due`` drops older owed slots).
+
+    uv run python benchmarks/reminders.py --schedules 10000 --days 2
+"""
+
+import argparse
+import asyncio
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from datetime import time as dtime
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from dairy_bot.services.reminders import (  # noqa: E402
+    ReminderDispatcher,
+    ReminderSchedule,
+    ReminderStore,
+)
+
+UTC = ZoneInfo("UTC")
+ZONES = [ZoneInfo(name) for name in (
+    "UTC", "Europe/Vienna", "America/New_York", "Asia/Tokyo", "Australia/Sydney"
+)]
+START = datetime(2024, 3, 29, 0, 0, tzinfo=UTC)  # spans the EU DST switch
+
+
+def random_schedule(user_id: int, rng: random.Random) -> ReminderSchedule:
+    times = tuple(sorted({dtime(rng.randrange(24), rng.choice((0, 15, 30, 45)))
+                          for _ in range(rng.randint(1, 3))}))
+    weekdays = frozenset(day for day in range(7) if rng.random() < 0.8) or frozenset({0})
+    quiet = (dtime(22), dtime(7)) if rng.random() < 0.3 else None
+    return ReminderSchedule(user_id, times, weekdays, quiet, rng.choice(ZONES))
+
+
+def expected_fires(
+    schedules: list[ReminderSchedule], start: datetime, end: datetime
+) -> set[tuple[int, datetime]]:
+    fires = set()
+    for schedule in schedules:
+        moment = schedule.next_fire(start)
+        while moment is not None and moment <= end:
+            fires.add((schedule.user_id, moment))
+            moment = schedule.next_fire(moment)
+    return fires
+
+
+class Clock:
+    def __init__(self, now: datetime) -> None:
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+async def run_until(
+    dispatcher: ReminderDispatcher, clock: Clock, end: datetime,
+    sent: list[tuple[int, datetime]], ticks: list[tuple[float, int]],
+) -> None:
+    """The dispatcher loop with the sleep replaced by a clock jump."""
+    while dispatcher._heap and dispatcher._heap[0][0] <= end.timestamp():
+        clock.now = datetime.fromtimestamp(dispatcher._heap[0][0], UTC)
+        started = time.perf_counter()
+        due = dispatcher._pop_due(clock.now)
+        for schedule, when in due:
+            sent.append((schedule.user_id, when))
+        if due:
+            await dispatcher._fire(due, clock.now)
+        ticks.append((time.perf_counter() - started, len(due)))
+
+
+async def simulate(args: argparse.Namespace, root: Path) -> int:
+    rng = random.Random(args.seed)
+    schedules = [random_schedule(user, rng) for user in range(1, args.schedules + 1)]
+    store_path = root / "reminders.json"
+    journal = root / "journal"
+    journal.mkdir()
+
+    async def notify(user_id: int) -> None:
+        return None
+
+    clock = Clock(START)
+    started = time.perf_counter()
+    dispatcher = ReminderDispatcher(ReminderStore(store_path), journal, clock=clock)
+    for schedule in schedules:
+        dispatcher.store._schedules[schedule.user_id] = schedule
+        dispatcher.store._served[schedule.user_id] = START
+    dispatcher.store._save()
+    dispatcher._notify = notify
+    for schedule in schedules:
+        dispatcher._push(schedule, dispatcher._first_due(schedule, START))
+    setup = time.perf_counter() - started
+
+    end = START + timedelta(days=args.days)
+    crash = START + timedelta(days=args.days / 2)
+    restart = crash + timedelta(minutes=args.downtime)
+    sent: list[tuple[int, datetime]] = []
+    ticks: list[tuple[float, int]] = []
+    await run_until(dispatcher, clock, crash, sent, ticks)
+
+    # Restart: a fresh dispatcher that only knows what was persisted.
+    clock.now = restart
+    started = time.perf_counter()
+    dispatcher = ReminderDispatcher(ReminderStore(store_path), journal, clock=clock)
+    dispatcher._notify = notify
+    for schedule in dispatcher.store.schedules():
+        dispatcher._push(schedule, dispatcher._first_due(schedule, restart))
+    reload = time.perf_counter() - started
+    late = [(user, stamp) for stamp, user, _ in dispatcher._heap
+            if stamp <= restart.timestamp()]
+    await run_until(dispatcher, clock, end, sent, ticks)
+
+    # Compare instants, not aware datetimes: under PEP 495 a local time in a
+    # DST gap never equals its UTC counterpart across zones.
+    expected = {
+        (user, when.timestamp()) for user, when in expected_fires(schedules, START, end)
+    }
+    missed_window = {
+        (user, stamp) for user, stamp in expected
+        if crash.timestamp() < stamp <= restart.timestamp()
+    }
+    sent_stamps = [(user, when.timestamp()) for user, when in sent]
+    missing = expected - missed_window - set(sent_stamps)
+    # Missed slots are coalesced into one late reminder per user, and only
+    # when the first of them is on the user's local day at restart.
+    first_missed: dict[int, float] = {}
+    for user, stamp in missed_window:
+        first_missed[user] = min(stamp, first_missed.get(user, stamp))
+    zones = {schedule.user_id: schedule.timezone for schedule in schedules}
+    owed_users = {
+        user for user, stamp in first_missed.items()
+        if datetime.fromtimestamp(stamp, zones[user]).date()
+        == restart.astimezone(zones[user]).date()
+    }
+    late_users = {user for user, _ in late}
+    duplicates = len(sent_stamps) - len(set(sent_stamps))
+
+    per_tick = [seconds * 1e6 for seconds, _ in ticks]
+    per_item = [seconds * 1e6 / count for seconds, count in ticks if count]
+    print(f"{args.schedules} schedules over {args.days} days, "
+          f"downtime {args.downtime} min")
+    print(f"setup {setup * 1000:.0f} ms, reload after restart {reload * 1000:.0f} ms")
+    print(f"ticks: {len(ticks)}, reminders handled: {len(sent)}")
+    print(f"per tick    p50 {statistics.median(per_tick):8.1f} us   "
+          f"max {max(per_tick):8.1f} us")
+    print(f"per reminder p50 {statistics.median(per_item):7.1f} us")
+    print(f"missed on-time: {len(missing)}, duplicates: {duplicates}, "
+          f"missed during downtime: {len(first_missed)}, "
+          f"owed after restart: {len(owed_users)}, delivered late: {len(late_users)}")
+    ok = not missing and not duplicates and owed_users == late_users
+    print("OK" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--schedules", type=int, default=10000)
+    parser.add_argument("--days", type=int, default=2)
+    parser.add_argument("--downtime", type=int, default=90, help="minutes")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    root = Path(tempfile.mkdtemp(prefix="dairy-reminders-"))
+    try:
+        return asyncio.run(simulate(args, root))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
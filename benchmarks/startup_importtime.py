@@ -0,0 +1,73 @@
+"""Startup regression benchmark based on ``python -X importtime``.
+
+Imports the bot entry point in a fresh interpreter, reports the slowest
+imports and fails if the total exceeds the budget or if a lazily loaded
+dependency (``openai``, GitPython) sneaks back onto the startup path.
+
+    uv run python benchmarks/startup_importtime.py --budget-ms 4000
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+LAZY_MODULES = ("openai", "git")
+
+
+def measure(runs: int) -> tuple[int, dict[str, int]]:
+    """Return the best total import time and per-module cumulative times (us)."""
+    env = dict(os.environ, PYTHONPATH=str(PROJECT_ROOT / "src"))
+    best_total: int | None = None
+    best_modules: dict[str, int] = {}
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import bot"],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        modules: dict[str, int] = {}
+        total = 0
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "[us]" in line:
+                continue
+            _, cumulative_us, raw_name = line.split(":", 1)[1].split("|")
+            name = raw_name[1:]
+            modules[name.strip()] = int(cumulative_us)
+            if not name.startswith(" "):
+                # Top-level imports only; nested ones are already included.
+                total += int(cumulative_us)
+        if best_total is None or total < best_total:
+            best_total, best_modules = total, modules
+    return best_total or 0, best_modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=4000.0)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    total_us, modules = measure(args.runs)
+    print(f"import bot: {total_us / 1000:.1f} ms (best of {args.runs})")
+    for name, cumulative in sorted(modules.items(), key=lambda kv: -kv[1])[: args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    failed = False
+    leaked = sorted(set(modules) & set(LAZY_MODULES))
+    if leaked:
+        print(f"FAIL: lazily loaded modules imported at startup: {', '.join(leaked)}")
+        failed = True
+    if total_us / 1000 > args.budget_ms:
+        print(f"FAIL: startup import time exceeds budget of {args.budget_ms:.0f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""Measure the /tag and /backlinks index on a synthetic vault.
+
+Generates daily notes with ``#tags`` and ``[[links]]`` in a git repository
+(with a bare remote and a second clone acting as another device), then
+reports index size, full rebuild and reload time, the cost of updating the
+index after one saved entry, query latency for the first and a deep page,
+and the cost of applying a pull that brings in edits from the other device.
+Finally the incrementally maintained index is compared with a fresh
+rebuild; any difference fails the run.
+
+    uv run python benchmarks/tag_index.py --days 3650 --entries 4
+"""
+
+import argparse
+import asyncio
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from dairy_bot.services.git_sync import GitService  # noqa: E402
+from dairy_bot.services.storage import append_entry  # noqa: E402
+from dairy_bot.services.tags import TagIndex  # noqa: E402
+
+TZ = ZoneInfo("UTC")
+TAGS = [f"topic{index}" for index in range(200)] + ["work", "family", "health", "idea"]
+LINKS = [f"Project {index}" for index in range(100)] + ["Mom", "Reading list"]
+WORDS = "the day went well with a long walk and some reading before dinner".split()
+
+
+def git(*args: str, cwd: Path) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=cwd, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+def entry_text(rng: random.Random) -> str:
+    words = rng.choices(WORDS, k=rng.randint(8, 40))
+    for _ in range(rng.choice((0, 1, 1, 2, 3))):
+        words.insert(rng.randrange(len(words) + 1), f"#{rng.choice(TAGS)}")
+    if rng.random() < 0.3:
+        words.insert(rng.randrange(len(words) + 1), f"[[{rng.choice(LINKS)}]]")
+    return " ".join(words)
+
+
+def write_vault(journal: Path, days: int, entries: int, rng: random.Random) -> int:
+    start = date(2024, 1, 1) - timedelta(days=days)
+    total = 0
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        note = journal / f"{day:%Y}" / f"{day:%m}" / f"{day:%Y-%m-%d}.md"
+        note.parent.mkdir(parents=True, exist_ok=True)
+        blocks = [f"# {day:%Y-%m-%d}\n\n"]
+        for number in range(rng.randint(1, entries * 2 - 1)):
+            blocks.append(f"## {8 + number:02d}:00\n{entry_text(rng)}\n\n")
+            total += 1
+        note.write_text("".join(blocks))
+    return total
+
+
+def setup_repos(root: Path) -> tuple[Path, Path]:
+    remote = root / "remote.git"
+    git("init", "-q", "--bare", "-b", "main", str(remote), cwd=root)
+    journal = root / "journal"
+    git("clone", "-q", str(remote), str(journal), cwd=root)
+    git("checkout", "-q", "-b", "main", cwd=journal)
+    git("config", "user.name", "bench", cwd=journal)
+    git("config", "user.email", "bench@example.com", cwd=journal)
+    return remote, journal
+
+
+def ms(seconds: float) -> str:
+    return f"{seconds * 1000:.1f} ms"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=3650)
+    parser.add_argument("--entries", type=int, default=4, help="average per day")
+    parser.add_argument("--saves", type=int, default=200)
+    parser.add_argument("--pulled-notes", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    root = Path(tempfile.mkdtemp(prefix="dairy-tags-"))
+    try:
+        remote, journal = setup_repos(root)
+        total = write_vault(journal, args.days, args.entries, rng)
+        git("add", "-A", cwd=journal)
+        git("commit", "-q", "-m", "vault", cwd=journal)
+        git("push", "-q", "-u", "origin", "main", cwd=journal)
+        other = root / "other"
+        git("clone", "-q", str(remote), str(other), cwd=root)
+        git("config", "user.name", "other", cwd=other)
+        git("config", "user.email", "other@example.com", cwd=other)
+
+        service = GitService(journal, timezone=TZ)
+        index_dir = root / "state" / "tags"
+        index = TagIndex(index_dir, journal)
+        started = time.perf_counter()
+        index.open(service)
+        rebuild = time.perf_counter() - started
+        service.add_pull_listener(index.apply_changes)
+        stats = index.stats()
+        snapshot_size = index.snapshot_path.stat().st_size
+
+        started = time.perf_counter()
+        reloaded = TagIndex(index_dir, journal)
+        reloaded.open(service)
+        reload = time.perf_counter() - started
+
+        # One saved entry: append to today's note, re-scan that note.
+        updates = []
+        moment = datetime(2024, 1, 1, 7, 0, tzinfo=TZ)
+        for number in range(args.saves):
+            note = asyncio.run(
+                append_entry(journal, entry_text(rng), moment=moment, timezone=TZ)
+            )
+            started = time.perf_counter()
+            index.update_note(note)
+            updates.append(time.perf_counter() - started)
+            moment += timedelta(minutes=1 if number % 20 else 24 * 60)
+        git("add", "-A", cwd=journal)
+        git("commit", "-q", "-m", "saves", cwd=journal)
+        git("push", "-q", "origin", "main", cwd=journal)
+
+        # Another device edits existing notes; our pull re-scans only those.
+        git("pull", "-q", cwd=other)
+        notes = sorted(other.glob("[0-9]*/[0-9]*/*.md"))
+        for note in rng.sample(notes, min(args.pulled_notes, len(notes))):
+            with note.open("a") as file:
+                file.write(f"## 23:59\nfrom the laptop #laptop [[Mom]] {entry_text(rng)}\n\n")
+        git("commit", "-q", "-am", "laptop edits", cwd=other)
+        git("push", "-q", "origin", "main", cwd=other)
+        log_before = index.log_path.stat().st_size if index.log_path.exists() else 0
+        started = time.perf_counter()
+        service.pull_changes()
+        pull_total = time.perf_counter() - started
+        started = time.perf_counter()
+        index.apply_changes(service.changed_files("HEAD~1", "HEAD"))
+        apply_only = time.perf_counter() - started
+
+        queries = {}
+        for label, key, offset in (
+            ("#work page 1", "#work", 0),
+            ("#work deep page", "#work", max(0, index.count("#work") - 10)),
+            ("[[mom]] page 1", "[[mom", 0),
+            ("#laptop page 1", "#laptop", 0),
+        ):
+            timings = []
+            for _ in range(50):
+                started = time.perf_counter()
+                index.query(key, offset, 10)
+                timings.append(time.perf_counter() - started)
+            queries[label] = statistics.median(timings)
+
+        fresh = TagIndex(root / "fresh", journal)
+        fresh.rebuild()
+        keys = set(index._postings) | set(fresh._postings)
+        mismatched = [
+            key
+            for key in keys
+            if index.count(key) != fresh.count(key)
+            or index.query(key, 0, 1000) != fresh.query(key, 0, 1000)
+        ]
+
+        log_size = index.log_path.stat().st_size if index.log_path.exists() else 0
+        print(f"vault: {args.days} notes, {total} entries")
+        print(f"index: {stats['keys']} keys, {stats['postings']} postings, "
+              f"snapshot {snapshot_size / 1024:.0f} KiB, log {log_size / 1024:.1f} KiB "
+              f"(was {log_before / 1024:.1f} KiB before the pull)")
+        print(f"full rebuild {ms(rebuild)}, reload from disk {ms(reload)}")
+        print(f"update per save: p50 {ms(statistics.median(updates))}, "
+              f"max {ms(max(updates))} ({args.saves} saves)")
+        print(f"pull of {args.pulled_notes} edited notes: {ms(pull_total)} incl. git, "
+              f"re-scan alone {ms(apply_only)}")
+        for label, seconds in queries.items():
+            print(f"query {label:<16} {seconds * 1e6:8.1f} us")
+        print(f"#laptop entries: {index.count('#laptop')} (expected {args.pulled_notes})")
+        ok = not mismatched and index.count("#laptop") == args.pulled_notes
+        if mismatched:
+            print("mismatched keys:", ", ".join(sorted(mismatched)[:10]))
+        print("OK" if ok else "FAILED")
+        return 0 if ok else 1
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""Check transcription hedging and failover against local fake backends.
+
+Serves three OpenAI-compatible ``/chat/completions`` stand-ins: ``fast``
+answers after ``--fast-delay``, ``slow`` after ``--slow-delay`` and
+``broken`` answers every request with HTTP 500. ``TranscriptionRouter``
+is then run through three scenarios:
+
+* hedging  - ``slow`` is listed first; requests must be hedged to ``fast``
+  and finish well before ``slow`` could answer,
+* failover - ``broken`` is listed first; every request must still succeed,
+  and once ``broken`` is marked unhealthy it is no longer tried first,
+* streaming - like failover, with a live-preview callback (no hedging).
+
+Reports the latency of each scenario and the per-backend stats the router
+keeps, which are also what it logs.
+
+    uv run python benchmarks/transcription_router.py --requests 20 --slow-delay 2
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from load_test import FakeCompletions, serve  # noqa: E402
+
+from dairy_bot.config import TranscriptionBackend  # noqa: E402
+from dairy_bot.services.transcription_router import TranscriptionRouter  # noqa: E402
+
+AUDIO = "UklGRiQAAABXQVZFZm10IBAAAAABAAEAQB8AAIA+AAACABAAZGF0YQAAAAA="  # empty WAV
+
+
+class BrokenCompletions(FakeCompletions):
+    """Fake completions that fail every request with an internal error."""
+
+    async def handle(self, request: web.Request) -> web.StreamResponse:
+        await request.read()
+        self.requests += 1
+        await asyncio.sleep(self.delay)
+        return web.json_response({"error": {"message": "injected failure"}}, status=500)
+
+
+async def run_requests(
+    router: TranscriptionRouter, count: int, streaming: bool = False
+) -> tuple[list[float], int]:
+    latencies = []
+    failures = 0
+    for _ in range(count):
+        partials: list[str] = []
+
+        async def on_partial(text: str) -> None:
+            partials.append(text)
+
+        started = time.perf_counter()
+        try:
+            text = await router.transcribe(AUDIO, on_partial if streaming else None)
+        except RuntimeError:
+            failures += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+        if not text or (streaming and not partials):
+            failures += 1
+    return latencies, failures
+
+
+def describe(latencies: list[float]) -> str:
+    if not latencies:
+        return "no successful requests"
+    return f"median {statistics.median(latencies) * 1000:.0f} ms, max {max(latencies) * 1000:.0f} ms"
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    servers = {
+        "fast": FakeCompletions(args.fast_delay),
+        "slow": FakeCompletions(args.slow_delay),
+        "broken": BrokenCompletions(0.0),
+    }
+    runners = []
+    backends = {}
+    try:
+        for name, server in servers.items():
+            runner, port = await serve(server.app())
+            runners.append(runner)
+            backends[name] = TranscriptionBackend(
+                name=name, base_url=f"http://127.0.0.1:{port}/v1", model="fake", api_key="test"
+            )
+        problems = []
+
+        router = TranscriptionRouter(
+            [backends["slow"], backends["fast"]], hedge_delay=args.hedge_delay
+        )
+        hedged, failures = await run_requests(router, args.requests)
+        await router.aclose()
+        print(f"hedging  (slow first):   {describe(hedged)}")
+        print(f"  slow: {router.stats['slow'].describe()}")
+        print(f"  fast: {router.stats['fast'].describe()}")
+        if failures:
+            problems.append(f"hedging: {failures} requests failed")
+        if hedged and max(hedged) >= args.slow_delay:
+            problems.append("hedging: a request waited for the slow backend")
+        if servers["fast"].requests < args.requests:
+            problems.append("hedging: not every request reached the fast backend")
+
+        fast_before = servers["fast"].requests
+        router = TranscriptionRouter(
+            [backends["broken"], backends["fast"]], hedge_delay=args.hedge_delay
+        )
+        failed_over, failures = await run_requests(router, args.requests)
+        ranked_first = router.ranked()[0].name
+        await router.aclose()
+        print(f"failover (broken first): {describe(failed_over)}")
+        print(f"  broken: {router.stats['broken'].describe()}, tried {servers['broken'].requests}x")
+        print(f"  fast:   {router.stats['fast'].describe()}")
+        if failures:
+            problems.append(f"failover: {failures} requests failed")
+        if servers["fast"].requests - fast_before != args.requests:
+            problems.append("failover: the fast backend did not answer every request")
+        if ranked_first != "fast":
+            problems.append("failover: the broken backend is still ranked first")
+        if servers["broken"].requests >= args.requests:
+            problems.append("failover: the broken backend was tried for every request")
+
+        broken_before = servers["broken"].requests
+        router = TranscriptionRouter(
+            [backends["broken"], backends["fast"]], hedge_delay=args.hedge_delay
+        )
+        streamed, failures = await run_requests(router, args.requests, streaming=True)
+        await router.aclose()
+        print(f"streaming failover:      {describe(streamed)}, "
+              f"broken tried {servers['broken'].requests - broken_before}x")
+        if failures:
+            problems.append(f"streaming: {failures} requests failed")
+        if servers["slow"].requests > args.requests:
+            problems.append("streaming or failover requests reached the slow backend")
+
+        for problem in problems:
+            print(problem)
+        print("FAILED" if problems else "OK")
+        return 1 if problems else 0
+    finally:
+        for runner in runners:
+            await runner.cleanup()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--fast-delay", type=float, default=0.05)
+    parser.add_argument("--slow-delay", type=float, default=2.0)
+    parser.add_argument("--hedge-delay", type=float, default=0.3)
+    args = parser.parse_args()
+    # The router logs every injected failure with its traceback.
+    logging.basicConfig(level=logging.ERROR)
+    return asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,84 @@
 import asyncio
 import logging
+import os
+import signal
+from pathlib import Path
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 
 from dairy_bot.config import Settings
+from dairy_bot.handlers.catch_up import catch_up
 from dairy_bot.handlers.journal import router as journal_router
 from dairy_bot.middlewares.auth import AuthMiddleware
-from dairy_bot.services.git_sync import GitService
-from dairy_bot.services.scheduler import setup_scheduler
+from dairy_bot.services.ai_service import close_router
+from dairy_bot.services.language_store import get_language
+from dairy_bot.services.profiler import send_profile
+from dairy_bot.services.registry import (
+    ATTACHMENTS,
+    GIT_SERVICE,
+    REMINDERS,
+    SEND_QUEUE,
+    VOICE_JOBS,
+    ServiceRegistry,
+)
+from dairy_bot.services.scheduler import setup_scheduler, start_reminders
+from dairy_bot.services.send_queue import SendQueue
+from dairy_bot.services.voice_jobs import VoiceJobQueue
+
+logger = logging.getLogger(__name__)
+
+
+def _seconds_since_process_start() -> float | None:
+    """Wall time since the interpreter process was spawned (Linux only)."""
+    try:
+        stat = Path("/proc/self/stat").read_text().rsplit(")", 1)[1].split()
+        start_ticks = int(stat[19])
+        uptime = float(Path("/proc/uptime").read_text().split()[0])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _install_profile_signal(
+    bot: Bot, settings: Settings, services: ServiceRegistry
+) -> None:
+    """Send the owner a sampling profile whenever PROFILE_SIGNAL arrives."""
+    name = settings.profile_signal.upper()
+    try:
+        signum = signal.Signals[name if name.startswith("SIG") else f"SIG{name}"]
+    except KeyError:
+        logger.warning("Unknown PROFILE_SIGNAL %r, ignoring", settings.profile_signal)
+        return
+    loop = asyncio.get_running_loop()
+    running: set[asyncio.Task] = set()
+
+    def finished(task: asyncio.Task) -> None:
+        running.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Signal-triggered profile failed", exc_info=task.exception())
+
+    def on_signal() -> None:
+        if services.profiler.busy:
+            logger.info("%s ignored, a profile is already running", signum.name)
+            return
+        seconds = settings.profile_signal_seconds
+        logger.info("%s received, profiling for %ss", signum.name, seconds)
+        task = loop.create_task(
+            send_profile(
+                bot,
+                settings.allowed_user_id,
+                services.profiler,
+                seconds,
+                get_language(settings.allowed_user_id),
+            )
+        )
+        running.add(task)
+        task.add_done_callback(finished)
+
+    loop.add_signal_handler(signum, on_signal)
 
 
 async def main() -> None:
@@ -18,25 +88,50 @@ async def main() -> None:
     )
 
     settings = Settings()
-    git_service = GitService(
-        settings.journal_dir, enabled=settings.git_enabled, timezone=settings.timezone
-    )
+    services = ServiceRegistry(settings)
+    session = None
+    if settings.telegram_api_url:
+        # Self-hosted Bot API server (or the load-test stand-in).
+        session = AiohttpSession(
+            api=TelegramAPIServer.from_base(settings.telegram_api_url)
+        )
     bot = Bot(
         token=settings.bot_token.get_secret_value(),
+        session=session,
         default=DefaultBotProperties(parse_mode="HTML"),
     )
+    services.register(SEND_QUEUE, lambda _settings: SendQueue(bot))
+    services.register(
+        VOICE_JOBS,
+        lambda cfg: VoiceJobQueue(
+            bot, cfg, services.send_queue, workers=cfg.voice_workers
+        ),
+    )
     dispatcher = Dispatcher()
     dispatcher["settings"] = settings
-    dispatcher["git_service"] = git_service
+    dispatcher["services"] = services
 
     auth_middleware = AuthMiddleware(settings.allowed_user_id)
     dispatcher.message.middleware(auth_middleware)
     dispatcher.callback_query.middleware(auth_middleware)
     dispatcher.include_router(journal_router)
 
-    scheduler = setup_scheduler(bot=bot, settings=settings)
-    await bot.delete_webhook(drop_pending_updates=True)
+    scheduler = setup_scheduler(bot=bot, settings=settings, services=services)
+    await bot.delete_webhook(drop_pending_updates=not settings.catch_up_enabled)
+    if settings.catch_up_enabled:
+        await catch_up(bot, dispatcher, settings, services)
     scheduler.start()
+    if settings.reminders_enabled:
+        start_reminders(settings, services)
+    if settings.profile_signal:
+        _install_profile_signal(bot, settings, services)
+
+    async def log_startup_time() -> None:
+        elapsed = _seconds_since_process_start()
+        if elapsed is not None:
+            logger.info("Startup finished in %.0f ms, starting to poll", elapsed * 1000)
+
+    dispatcher.startup.register(log_startup_time)
 
     try:
         await dispatcher.start_polling(
@@ -44,6 +139,17 @@ async def main() -> None:
         )
     finally:
         scheduler.shutdown(wait=False)
+        if services.is_loaded(REMINDERS):
+            await services.reminders.close()
+        if services.is_loaded(VOICE_JOBS):
+            await services.voice_jobs.close()
+        await close_router()
+        if services.is_loaded(ATTACHMENTS):
+            services.attachments.close()
+        if services.is_loaded(SEND_QUEUE):
+            await services.send_queue.close()
+        if services.is_loaded(GIT_SERVICE):
+            services.git.close()
         await bot.session.close()
 
 
@@ -2,7 +2,7 @@ import logging
 from pathlib import Path
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from pydantic import AliasChoices, Field, SecretStr, field_validator
+from pydantic import AliasChoices, BaseModel, Field, SecretStr, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 DEFAULT_TZ_NAME = "Europe/Vienna"
@@ -11,9 +11,26 @@ DEFAULT_TZ = ZoneInfo(DEFAULT_TZ_NAME)
 logger = logging.getLogger(__name__)
 
 
+class TranscriptionBackend(BaseModel):
+    """One OpenAI-compatible endpoint/model pair used for transcription."""
+
+    name: str
+    base_url: str
+    model: str
+    api_key: SecretStr | None = None
+
+
+class GitMirror(BaseModel):
+    """A backup remote: a remote already configured in the journal repo, or a URL."""
+
+    name: str
+    url: str | None = None
+
+
 class Settings(BaseSettings):
     bot_token: SecretStr = Field(..., alias="BOT_TOKEN")
     allowed_user_id: int = Field(..., alias="ALLOWED_USER_ID")
+    telegram_api_url: str | None = Field(default=None, alias="TELEGRAM_API_URL")
     openrouter_api_key: SecretStr = Field(..., alias="OPENROUTER_API_KEY")
     voice_model_name: str = Field(
         default="mistralai/voxtral-small-24b-2507",
@@ -26,6 +43,18 @@ class Settings(BaseSettings):
         validation_alias=AliasChoices("JOURNAL_DIR", "JOURNAL_PATH"),
     )
     git_enabled: bool = Field(default=True, alias="GIT_ENABLED")
+    git_remote_url: str | None = Field(default=None, alias="GIT_REMOTE_URL")
+    git_clone_filter: str | None = Field(default="blob:none", alias="GIT_CLONE_FILTER")
+    git_clone_depth: int | None = Field(default=None, alias="GIT_CLONE_DEPTH")
+    git_merge_driver: bool = Field(default=True, alias="GIT_MERGE_DRIVER")
+    git_maintenance_enabled: bool = Field(
+        default=True, alias="GIT_MAINTENANCE_ENABLED"
+    )
+    git_maintenance_hour: int = Field(
+        default=4, ge=0, le=23, alias="GIT_MAINTENANCE_HOUR"
+    )
+    git_mirrors: list[GitMirror] = Field(default_factory=list, alias="GIT_MIRRORS")
+    git_mirror_timeout: float = Field(default=120.0, gt=0, alias="GIT_MIRROR_TIMEOUT")
     timezone: ZoneInfo = Field(
         default=DEFAULT_TZ,
         alias="TIMEZONE",
@@ -34,6 +63,42 @@ class Settings(BaseSettings):
     openrouter_base_url: str = Field(
         default="https://openrouter.ai/api/v1", alias="OPENROUTER_BASE_URL"
     )
+    transcription_backends: list[TranscriptionBackend] = Field(
+        default_factory=list, alias="TRANSCRIPTION_BACKENDS"
+    )
+    transcription_hedge_delay: float = Field(
+        default=8.0, gt=0, alias="TRANSCRIPTION_HEDGE_DELAY"
+    )
+    attachments_dir: str = Field(default="attachments", alias="ATTACHMENTS_DIR")
+    attachments_preview_size: int = Field(
+        default=1024, ge=64, alias="ATTACHMENTS_PREVIEW_SIZE"
+    )
+    voice_workers: int = Field(default=3, ge=1, alias="VOICE_WORKERS")
+    vad_enabled: bool = Field(default=True, alias="VAD_ENABLED")
+    vad_threshold_db: float = Field(default=-40.0, le=0, alias="VAD_THRESHOLD_DB")
+    vad_min_silence: float = Field(default=0.8, gt=0, alias="VAD_MIN_SILENCE")
+    vad_keep_silence: float = Field(default=0.25, ge=0, alias="VAD_KEEP_SILENCE")
+    voice_streaming: bool = Field(default=False, alias="VOICE_STREAMING")
+    voice_stream_edit_interval: float = Field(
+        default=1.5, gt=0, alias="VOICE_STREAM_EDIT_INTERVAL"
+    )
+    reminders_enabled: bool = Field(default=True, alias="REMINDERS_ENABLED")
+    reminder_times: str = Field(default="20:00", alias="REMINDER_TIMES")
+    state_dir: Path | None = Field(default=None, alias="STATE_DIR")
+    catch_up_enabled: bool = Field(default=True, alias="CATCH_UP_ENABLED")
+    tags_enabled: bool = Field(default=True, alias="TAGS_ENABLED")
+    calendar_format: str = Field(
+        default="png", pattern="^(png|svg)$", alias="CALENDAR_FORMAT"
+    )
+    related_enabled: bool = Field(default=True, alias="RELATED_ENABLED")
+    related_on_save: bool = Field(default=False, alias="RELATED_ON_SAVE")
+    related_limit: int = Field(default=5, ge=1, le=20, alias="RELATED_LIMIT")
+    related_index_dir: Path | None = Field(default=None, alias="RELATED_INDEX_DIR")
+    profile_max_seconds: int = Field(default=300, ge=1, alias="PROFILE_MAX_SECONDS")
+    profile_signal: str | None = Field(default=None, alias="PROFILE_SIGNAL")
+    profile_signal_seconds: int = Field(
+        default=30, ge=1, alias="PROFILE_SIGNAL_SECONDS"
+    )
 
     @field_validator("timezone", mode="before")
     @classmethod
@@ -56,4 +121,24 @@ class Settings(BaseSettings):
             )
         return DEFAULT_TZ
 
+    def resolved_state_dir(self) -> Path:
+        """Where local caches and bookkeeping live (git-ignored inside the journal)."""
+        return self.state_dir or self.journal_dir / ".dairy"
+
+    def resolved_transcription_backends(self) -> list[TranscriptionBackend]:
+        """Configured backends, or the single OpenRouter one if none are listed."""
+        backends = self.transcription_backends or [
+            TranscriptionBackend(
+                name="openrouter",
+                base_url=self.openrouter_base_url,
+                model=self.voice_model_name,
+            )
+        ]
+        return [
+            backend
+            if backend.api_key is not None
+            else backend.model_copy(update={"api_key": self.openrouter_api_key})
+            for backend in backends
+        ]
+
     model_config = SettingsConfigDict(env_file=".env", env_prefix="", extra="ignore")
@@ -0,0 +1,88 @@
+import logging
+import time
+from datetime import datetime
+
+from aiogram import Bot, Dispatcher
+from aiogram.exceptions import TelegramAPIError
+from aiogram.types import Message, Update
+
+from dairy_bot.config import Settings
+from dairy_bot.handlers.journal import save_backlog_entries
+from dairy_bot.services.catch_up import Backlog
+from dairy_bot.services.language_store import get_language
+from dairy_bot.services.registry import ServiceRegistry
+from dairy_bot.texts import messages
+
+logger = logging.getLogger(__name__)
+
+
+def _is_plain_entry(message: Message | None, settings: Settings) -> bool:
+    return bool(
+        message is not None
+        and message.text
+        and not message.text.startswith("/")
+        and message.from_user is not None
+        and message.from_user.id == settings.allowed_user_id
+    )
+
+
+async def catch_up(
+    bot: Bot, dispatcher: Dispatcher, settings: Settings, services: ServiceRegistry
+) -> None:
+    """Save messages sent while the bot was down instead of dropping them.
+
+    Plain text entries are written in one batch (one write per day, original
+    timestamps, a single pull/commit/push); entries at or below the persisted
+    high-water mark were already saved and are skipped. Everything else
+    (voice, commands, callbacks) is handed to the dispatcher as usual.
+    """
+    started = time.perf_counter()
+    backlog = Backlog(bot, settings.resolved_state_dir() / "backlog.jsonl")
+    updates = await backlog.fetch(dispatcher.resolve_used_update_types())
+    if not updates:
+        return
+
+    mark = services.update_mark
+    entries: list[tuple[datetime, str]] = []
+    entry_messages: list[Message] = []
+    others: list[Update] = []
+    for update in updates:
+        message = update.message
+        if _is_plain_entry(message, settings):
+            if not mark.seen(message.chat.id, message.message_id):
+                entries.append((message.date, message.text))
+                entry_messages.append(message)
+        else:
+            others.append(update)
+
+    if entries:
+        synced = await save_backlog_entries(entries, settings, services)
+        highest: dict[int, int] = {}
+        for message in entry_messages:
+            highest[message.chat.id] = max(
+                highest.get(message.chat.id, 0), message.message_id
+            )
+        for chat_id, message_id in highest.items():
+            mark.advance(chat_id, message_id)
+        lang = get_language(settings.allowed_user_id)
+        key = "catch_up_saved" if synced else "catch_up_saved_local"
+        try:
+            await services.send_queue.send(
+                settings.allowed_user_id,
+                messages.t(key, lang).format(count=len(entries)),
+            )
+        except TelegramAPIError:
+            logger.warning("Could not send the catch-up summary", exc_info=True)
+
+    for update in others:
+        try:
+            await dispatcher.feed_update(bot, update)
+        except Exception:
+            logger.exception("Handling backlog update %s failed", update.update_id)
+    await backlog.confirm(updates)
+    logger.info(
+        "Caught up on %d pending updates (%d journal entries) in %.2fs",
+        len(updates),
+        len(entries),
+        time.perf_counter() - started,
+    )
@@ -1,49 +1,91 @@
 import asyncio
 import logging
+import math
 import tempfile
-from datetime import datetime
+from datetime import date, datetime, time
 from html import escape
 from pathlib import Path
-from typing import Awaitable, Callable
+from typing import Awaitable, Callable, Sequence
 
 from aiogram import F, Router
-from aiogram.exceptions import TelegramNetworkError
-from aiogram.filters import Command, CommandStart, StateFilter
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter
+from aiogram.filters import Command, CommandObject, CommandStart, StateFilter
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from aiogram.types import CallbackQuery, Message
+from aiogram.types import BufferedInputFile, CallbackQuery, InlineKeyboardMarkup, Message
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from dairy_bot.config import Settings
-from dairy_bot.services.ai_service import transcribe_audio
-from dairy_bot.services.git_sync import GitService
+from dairy_bot.services.activity import FORMAT_PNG, RenderedCalendar
+from dairy_bot.services.attachments import PendingAttachment, normalize_suffix
+from dairy_bot.services.entry_index import (
+    EntrySpan,
+    entry_check,
+    format_entry_ref,
+    parse_entry_ref,
+)
 from dairy_bot.services.language_store import get_language, set_language
-from dairy_bot.services.storage import append_entry, read_daily_note
+from dairy_bot.services.profiler import send_profile
+from dairy_bot.services.registry import ACTIVITY, ServiceRegistry
+from dairy_bot.services.related import related_available
+from dairy_bot.services.reminders import apply_reminder_args
+from dairy_bot.services.scheduler import default_reminder_schedule
+from dairy_bot.services.storage import (
+    append_entries,
+    append_entry,
+    daily_note_path,
+    read_daily_note,
+)
+from dairy_bot.services.tags import (
+    LINK_PREFIX,
+    TAG_PREFIX,
+    TaggedEntry,
+    normalize_link,
+    normalize_tag,
+)
+from dairy_bot.services.voice_jobs import STAGE_FAILED, VoiceJob
 from dairy_bot.texts import LANG_BUTTONS, messages
 
 router = Router()
 logger = logging.getLogger(__name__)
 MAX_TG_MESSAGE_LEN = 4000
+ENTRY_SNIPPET_LEN = 60
+TAG_PAGE_SIZE = 10
 _journal_lock: asyncio.Lock | None = None
 
 
 class VoiceStates(StatesGroup):
-    waiting_decision = State()
     waiting_edit = State()
 
 
+class EntryStates(StatesGroup):
+    waiting_text = State()
+
+
 CONFIRM_CALLBACK = "voice_confirm"
 EDIT_CALLBACK = "voice_edit"
 CANCEL_CALLBACK = "voice_cancel"
 LANG_EN_CALLBACK = "lang_en"
 LANG_RU_CALLBACK = "lang_ru"
 LANG_CALLBACKS = {LANG_EN_CALLBACK, LANG_RU_CALLBACK}
+TAGS_CALLBACK = "tags"
+TAG_KINDS = {"t": TAG_PREFIX, "l": LINK_PREFIX}
+MAX_CALLBACK_DATA = 64
+CALENDAR_CALLBACK = "cal"
+MONTHS_PER_ROW = 6
+DAYS_PER_ROW = 7
 
 
 async def _safe_respond(action: str, op: Callable[[], Awaitable[object]]) -> None:
-    """Send a Telegram response but don't crash on transient network errors."""
+    """Send a Telegram response but don't crash on transient network errors.
+
+    Nothing is retried here: the send queue already sleeps through flood
+    waits and retries network errors for everything it delivers.
+    """
     try:
         await op()
+    except TelegramRetryAfter as exc:
+        logger.warning("Flood control during %s (retry after %ss)", action, exc.retry_after)
     except TelegramNetworkError:
         logger.warning("Telegram request failed during %s", action, exc_info=True)
     except Exception:  # pragma: no cover - defensive
@@ -106,18 +148,265 @@ def _get_journal_lock() -> asyncio.Lock:
     return _journal_lock
 
 
+def _review_keyboard(job_id: int, lang: str) -> InlineKeyboardMarkup:
+    keyboard = InlineKeyboardBuilder()
+    keyboard.button(
+        text=messages.t("btn_save", lang), callback_data=f"{CONFIRM_CALLBACK}:{job_id}"
+    )
+    keyboard.button(
+        text=messages.t("btn_edit", lang), callback_data=f"{EDIT_CALLBACK}:{job_id}"
+    )
+    keyboard.button(
+        text=messages.t("btn_cancel", lang), callback_data=f"{CANCEL_CALLBACK}:{job_id}"
+    )
+    keyboard.adjust(3)
+    return keyboard.as_markup()
+
+
+def _callback_job(callback: CallbackQuery, services: ServiceRegistry) -> VoiceJob | None:
+    _, _, raw_id = (callback.data or "").partition(":")
+    if not raw_id.isdigit() or not callback.from_user:
+        return None
+    return services.voice_reviews.get(callback.from_user.id, int(raw_id))
+
+
+async def _present_review(
+    job: VoiceJob, services: ServiceRegistry, in_place: bool = False
+) -> None:
+    """Show the preview with its keyboard, reusing the progress message if asked."""
+    preview = messages.format_transcription_preview(job.transcription, job.lang)
+    markup = _review_keyboard(job.id, job.lang)
+    if in_place and await services.voice_jobs.edit_progress(
+        job, preview, reply_markup=markup
+    ):
+        return
+    await _safe_respond(
+        "transcription preview",
+        lambda: services.send_queue.send(
+            job.chat_id, preview, merge=False, reply_markup=markup
+        ),
+    )
+
+
+async def _advance_reviews(job: VoiceJob, services: ServiceRegistry) -> None:
+    """Drop a decided job and show the next pending transcription, if any."""
+    next_job = services.voice_reviews.resolve(job.user_id, job.id)
+    if next_job is not None:
+        await services.voice_jobs.edit_progress(
+            next_job, messages.t("voice_progress_done", next_job.lang)
+        )
+        await _present_review(next_job, services)
+
+
+async def _finish_voice_job(job: VoiceJob, services: ServiceRegistry) -> None:
+    jobs = services.voice_jobs
+    if job.stage == STAGE_FAILED:
+        await jobs.edit_progress(job, messages.t("transcription_error", job.lang))
+        return
+    if not job.transcription:
+        await jobs.edit_progress(job, messages.t("transcription_empty", job.lang))
+        return
+
+    position = services.voice_reviews.add(job)
+    if position == 0:
+        # The progress message (already showing streamed text, if any) turns
+        # into the final preview with the Save/Edit/Cancel keyboard.
+        await _present_review(job, services, in_place=True)
+    else:
+        await jobs.edit_progress(
+            job, messages.t("voice_progress_waiting", job.lang).format(position=position)
+        )
+
+
 async def _save_entry_with_sync(
-    content: str, settings: Settings, git_service: GitService
+    content: str,
+    settings: Settings,
+    services: ServiceRegistry,
+    attachments: Sequence[PendingAttachment] = (),
 ) -> bool:
+    git_service = services.git
     async with _get_journal_lock():
         pulled = await asyncio.to_thread(git_service.pull_changes)
-        note_path = await append_entry(
-            settings.journal_dir, content, timezone=settings.timezone
+        # Attachments are moved into the repo only after the pull, so a file
+        # already pushed from another device is deduplicated, not clobbered.
+        extra_paths: list[Path] = []
+        if attachments:
+            store = services.attachments
+            embeds: list[str] = []
+            for pending in attachments:
+                stored = await store.store(pending.temp_path, pending.suffix)
+                embeds.append(store.format_embed(stored, pending.label))
+                extra_paths.append(stored.path)
+                if stored.preview is not None:
+                    extra_paths.append(stored.preview)
+            content = "\n\n".join([*embeds, content] if content.strip() else embeds)
+        moment = datetime.now(settings.timezone)
+        expected_path = daily_note_path(settings.journal_dir, moment, settings.timezone)
+        async with services.entry_index.tracking_append(expected_path):
+            note_path = await append_entry(
+                settings.journal_dir, content, moment=moment, timezone=settings.timezone
+            )
+        await asyncio.to_thread(_index_notes, [note_path], settings, services)
+        if _related_enabled(settings):
+            try:
+                await asyncio.to_thread(
+                    services.related.add, moment.date(), f"{moment:%H:%M}", content
+                )
+            except Exception:
+                logger.warning("Indexing entry for /related failed", exc_info=True)
+        pushed = await asyncio.to_thread(
+            git_service.commit_and_push, note_path, *extra_paths
         )
-        pushed = await asyncio.to_thread(git_service.commit_and_push, note_path)
         return pulled and pushed
 
 
+async def save_backlog_entries(
+    entries: Sequence[tuple[datetime, str]],
+    settings: Settings,
+    services: ServiceRegistry,
+) -> bool:
+    """Write many entries with their own timestamps behind one pull and one push."""
+    async with _get_journal_lock():
+        pulled = await asyncio.to_thread(services.git.pull_changes)
+        note_paths = await append_entries(
+            settings.journal_dir, entries, timezone=settings.timezone
+        )
+        await asyncio.to_thread(_index_notes, note_paths, settings, services)
+        if _related_enabled(settings):
+            try:
+                await asyncio.to_thread(_index_related_batch, entries, settings, services)
+            except Exception:
+                logger.warning("Indexing backlog for /related failed", exc_info=True)
+        pushed = await asyncio.to_thread(
+            services.git.commit_and_push,
+            *note_paths,
+            message=f"Journal backlog: {len(entries)} entries",
+        )
+        return pulled and pushed
+
+
+def _index_related_batch(
+    entries: Sequence[tuple[datetime, str]],
+    settings: Settings,
+    services: ServiceRegistry,
+) -> None:
+    for moment, content in entries:
+        local = moment.astimezone(settings.timezone)
+        services.related.add(local.date(), f"{local:%H:%M}", content)
+
+
+def _reindex_related(
+    day: date,
+    time_label: str,
+    old_text: str,
+    content: str | None,
+    services: ServiceRegistry,
+) -> None:
+    services.related.remove(day, time_label, old_text)
+    if content is not None and content.strip():
+        services.related.add(day, time_label, content.strip())
+
+
+def _index_notes(
+    note_paths: Sequence[Path], settings: Settings, services: ServiceRegistry
+) -> None:
+    """Re-scan written notes for /tag, /backlinks and /calendar; best effort."""
+    if settings.tags_enabled:
+        try:
+            for note_path in note_paths:
+                services.tags.update_note(note_path)
+        except Exception:
+            logger.warning("Updating the tag index failed", exc_info=True)
+    # The calendar is built on the first /calendar; until then there is nothing to update.
+    if services.is_loaded(ACTIVITY):
+        for note_path in note_paths:
+            services.activity.update_note(note_path)
+
+
+def _related_enabled(settings: Settings) -> bool:
+    return settings.related_enabled and related_available()
+
+
+async def _save_status_text(
+    synced: bool,
+    content: str,
+    settings: Settings,
+    services: ServiceRegistry,
+    lang: str,
+) -> str:
+    """Save confirmation, optionally followed by the closest past entries."""
+    status = messages.t("save_synced" if synced else "save_local_only", lang)
+    if not (settings.related_on_save and content.strip() and _related_enabled(settings)):
+        return status
+    try:
+        related = await asyncio.to_thread(
+            services.related.similar, content, settings.related_limit
+        )
+    except Exception:
+        logger.warning("Related-entries lookup failed", exc_info=True)
+        return status
+    if not related:
+        return status
+    return f"{status}\n\n{messages.format_related(related, lang)}"
+
+
+def _note_path_for_day(day: date, settings: Settings) -> Path:
+    moment = datetime.combine(day, time(12), tzinfo=settings.timezone)
+    return daily_note_path(settings.journal_dir, moment, settings.timezone)
+
+
+def _entry_problem(
+    entries: Sequence[tuple[EntrySpan, str]], number: int, check: str | None
+) -> str | None:
+    """Message key if entry ``number`` is gone or is no longer the listed one."""
+    if not 1 <= number <= len(entries):
+        return "entry_not_found"
+    span, body = entries[number - 1]
+    if check is not None and entry_check(span.time_label, body) != check:
+        return "entry_changed"
+    return None
+
+
+async def _rewrite_entry_with_sync(
+    day: date,
+    number: int,
+    check: str | None,
+    content: str | None,
+    settings: Settings,
+    services: ServiceRegistry,
+) -> tuple[str | None, bool]:
+    """Edit (or delete, if ``content`` is None) one entry.
+
+    Returns (problem, synced); problem is a message key when nothing was
+    changed because the entry is missing or no longer matches ``check``.
+    """
+    note_path = _note_path_for_day(day, settings)
+    async with _get_journal_lock():
+        pulled = await asyncio.to_thread(services.git.pull_changes)
+        entries = await services.entry_index.entry_texts(note_path)
+        problem = _entry_problem(entries, number, check)
+        if problem is not None:
+            return problem, pulled
+        if not await services.entry_index.replace_entry(note_path, number, content):
+            return "entry_not_found", pulled
+        await asyncio.to_thread(_index_notes, [note_path], settings, services)
+        if _related_enabled(settings):
+            span, old_text = entries[number - 1]
+            try:
+                await asyncio.to_thread(
+                    _reindex_related, day, span.time_label, old_text, content, services
+                )
+            except Exception:
+                logger.warning("Re-indexing entry for /related failed", exc_info=True)
+        action = "Delete" if content is None else "Edit"
+        pushed = await asyncio.to_thread(
+            services.git.commit_and_push,
+            note_path,
+            message=f"{action} journal entry {day:%Y-%m-%d} #{number}",
+        )
+        return None, pulled and pushed
+
+
 @router.message(CommandStart())
 async def handle_start(message: Message, state: FSMContext) -> None:
     await state.clear()
@@ -138,39 +427,678 @@ async def handle_start(message: Message, state: FSMContext) -> None:
 
 @router.message(Command("today"))
 async def handle_today(
-    message: Message, settings: Settings, git_service: GitService
+    message: Message, settings: Settings, services: ServiceRegistry
 ) -> None:
     lang = _user_lang(message.from_user.id if message.from_user else None)
 
     async with _get_journal_lock():
-        pulled = await asyncio.to_thread(git_service.pull_changes)
+        pulled = await asyncio.to_thread(services.git.pull_changes)
         if not pulled:
             logger.warning("Git pull failed before responding to /today")
         content = await read_daily_note(
             settings.journal_dir, timezone=settings.timezone
         )
+    send_queue = services.send_queue
+    chat_id = message.chat.id
     if not content.strip():
         await _safe_respond(
-            "today empty note", lambda: message.answer(messages.t("today_empty", lang))
+            "today empty note",
+            lambda: send_queue.send(chat_id, messages.t("today_empty", lang)),
         )
         return
 
     date_label = datetime.now(settings.timezone).strftime("%Y-%m-%d")
-    reply_text = messages.format_today_note(date_label, content, lang)
+    await _send_note(chat_id, date_label, content, services, lang, "today_header")
+
+
+async def _send_note(
+    chat_id: int,
+    date_label: str,
+    content: str,
+    services: ServiceRegistry,
+    lang: str,
+    title_key: str,
+) -> None:
+    send_queue = services.send_queue
+    reply_text = messages.format_today_note(date_label, content, lang, title_key)
     if len(reply_text) <= MAX_TG_MESSAGE_LEN:
-        await _safe_respond("today note", lambda: message.answer(reply_text))
+        await _safe_respond("note", lambda: send_queue.send(chat_id, reply_text))
         return
 
-    title = messages.t("today_header", lang).format(date=escape(date_label))
-    await _safe_respond("today note header", lambda: message.answer(title))
-    for index, chunk in enumerate(
-        _split_text_for_html(content.strip(), MAX_TG_MESSAGE_LEN), start=1
-    ):
-        escaped_chunk = escape(chunk)
+    # Queue the header and every chunk up front so they are delivered in order
+    # at the highest rate Telegram allows instead of one round trip at a time.
+    title = messages.t(title_key, lang).format(date=escape(date_label))
+    chunks = [
+        escape(chunk)
+        for chunk in _split_text_for_html(content.strip(), MAX_TG_MESSAGE_LEN)
+    ]
+    await _safe_respond(
+        "note chunks", lambda: send_queue.send_many(chat_id, [title, *chunks])
+    )
+
+
+@router.message(Command("entries"))
+async def handle_entries(
+    message: Message,
+    command: CommandObject,
+    settings: Settings,
+    services: ServiceRegistry,
+) -> None:
+    lang = _user_lang(message.from_user.id if message.from_user else None)
+    today = datetime.now(settings.timezone).date()
+    try:
+        day = date.fromisoformat(command.args.strip()) if command.args else today
+    except ValueError:
+        day = today
+    note_path = _note_path_for_day(day, settings)
+    async with _get_journal_lock():
+        await asyncio.to_thread(services.git.pull_changes)
+        entries = await services.entry_index.entry_texts(note_path)
+
+    date_label = f"{day:%Y-%m-%d}"
+    if not entries:
+        await _safe_respond(
+            "entries empty",
+            lambda: services.send_queue.send(
+                message.chat.id, messages.t("entries_empty", lang).format(date=date_label)
+            ),
+        )
+        return
+
+    lines = [f"<b>{escape(messages.t('entries_header', lang).format(date=date_label))}</b>"]
+    for number, (span, body) in enumerate(entries, start=1):
+        snippet = " ".join(body.split())
+        if len(snippet) > ENTRY_SNIPPET_LEN:
+            snippet = snippet[: ENTRY_SNIPPET_LEN - 1] + "…"
+        ref = format_entry_ref(day, number, today, entry_check(span.time_label, body))
+        lines.append(f"<code>{ref}</code> · {span.time_label} — {escape(snippet)}")
+    lines.append(messages.t("entries_hint", lang))
+    chunks = _split_text_for_html("\n".join(lines), MAX_TG_MESSAGE_LEN)
+    await _safe_respond(
+        "entries list", lambda: services.send_queue.send_many(message.chat.id, chunks)
+    )
+
+
+@router.message(Command("related"))
+async def handle_related(
+    message: Message,
+    command: CommandObject,
+    settings: Settings,
+    services: ServiceRegistry,
+) -> None:
+    """Past entries closest to the latest one, to entry <id>, or to free text."""
+    lang = _user_lang(message.from_user.id if message.from_user else None)
+    if not _related_enabled(settings):
+        await _safe_respond(
+            "related unavailable",
+            lambda: services.send_queue.send(
+                message.chat.id, messages.t("related_unavailable", lang)
+            ),
+        )
+        return
+
+    query = (command.args or "").strip()
+    limit = settings.related_limit
+    parsed = parse_entry_ref(query, datetime.now(settings.timezone).date()) if query else None
+    if parsed is not None:
+        day, number, _ = parsed
+        entry_text = await services.entry_index.read_entry(
+            _note_path_for_day(day, settings), number
+        )
+        query = entry_text or ""
+    if query:
+        related = await asyncio.to_thread(services.related.similar, query, limit)
+    else:
+        related = await asyncio.to_thread(services.related.similar_to_row, -1, limit)
+
+    text = (
+        messages.format_related(related, lang)
+        if related
+        else messages.t("related_empty", lang)
+    )
+    await _safe_respond(
+        "related list", lambda: services.send_queue.send(message.chat.id, text)
+    )
+
+
+def _tag_page_keyboard(
+    kind: str, term: str, page: int, pages: int
+) -> InlineKeyboardMarkup | None:
+    keyboard = InlineKeyboardBuilder()
+    buttons = 0
+    for target, label in ((page - 1, "◀"), (page + 1, "▶")):
+        if not 0 <= target < pages:
+            continue
+        data = f"{TAGS_CALLBACK}:{kind}:{target}:{term}"
+        if len(data.encode()) > MAX_CALLBACK_DATA:
+            return None
+        keyboard.button(text=label, callback_data=data)
+        buttons += 1
+    return keyboard.as_markup() if buttons else None
+
+
+async def _tag_page(
+    kind: str, term: str, page: int, settings: Settings, services: ServiceRegistry, lang: str
+) -> tuple[str, InlineKeyboardMarkup | None]:
+    """One page of entries tagged ``#term`` (kind "t") or linking ``[[term]]`` ("l")."""
+    key = TAG_KINDS[kind] + term
+    label = f"#{term}" if kind == "t" else f"[[{term}]]"
+
+    def lookup() -> tuple[int, list[TaggedEntry]]:
+        index = services.tags
+        return index.count(key), index.query(key, page * TAG_PAGE_SIZE, TAG_PAGE_SIZE)
+
+    total, entries = await asyncio.to_thread(lookup)
+    if not total:
+        return messages.t("tags_empty", lang).format(name=escape(label)), None
+    pages = math.ceil(total / TAG_PAGE_SIZE)
+    page = min(page, pages - 1)
+    header = messages.t("tags_header", lang).format(
+        name=escape(label), count=total, page=page + 1, pages=pages
+    )
+    today = datetime.now(settings.timezone).date()
+    lines = [f"<b>{header}</b>"]
+    for entry in entries:
+        ref = format_entry_ref(entry.day, entry.number, today, entry.check)
+        lines.append(
+            f"<code>{ref}</code> · {entry.day:%Y-%m-%d} {entry.time_label} — "
+            f"{escape(entry.snippet)}"
+        )
+    return "\n".join(lines), _tag_page_keyboard(kind, term, page, pages)
+
+
+async def _send_tag_results(
+    message: Message, kind: str, term: str, settings: Settings, services: ServiceRegistry
+) -> None:
+    lang = _user_lang(message.from_user.id if message.from_user else None)
+    if not settings.tags_enabled:
         await _safe_respond(
-            f"today note chunk {index}",
-            lambda chunk=escaped_chunk: message.answer(chunk),
+            "tags disabled",
+            lambda: services.send_queue.send(message.chat.id, messages.t("tags_disabled", lang)),
         )
+        return
+    async with _get_journal_lock():
+        await asyncio.to_thread(services.git.pull_changes)
+    text, markup = await _tag_page(kind, term, 0, settings, services, lang)
+    await _safe_respond(
+        "tag results",
+        lambda: services.send_queue.send(
+            message.chat.id, text, merge=False, reply_markup=markup
+        ),
+    )
+
+
+@router.message(Command("tag"))
+async def handle_tag(
+    message: Message,
+    command: CommandObject,
+    settings: Settings,
+    services: ServiceRegistry,
+) -> None:
+    """Entries carrying a #tag, newest first; without a name, the most used tags."""
+    term = normalize_tag(command.args or "")
+    if term or not settings.tags_enabled:
+        await _send_tag_results(message, "t", term, settings, services)
+        return
+
+    lang = _user_lang(message.from_user.id if message.from_user else None)
+    top = await asyncio.to_thread(lambda: services.tags.top_tags())
+    if top:
+        text = "\n".join(
+            [f"<b>{messages.t('tags_top', lang)}</b>"]
+            + [f"#{escape(tag)} ({count})" for tag, count in top]
+        )
+    else:
+        text = messages.t("tags_none", lang)
+    await _safe_respond(
+        "top tags", lambda: services.send_queue.send(message.chat.id, text)
+    )
+
+
+@router.message(Command("backlinks"))
+async def handle_backlinks(
+    message: Message,
+    command: CommandObject,
+    settings: Settings,
+    services: ServiceRegistry,
+) -> None:
+    """Entries linking to a note with ``[[note]]``, newest first."""
+    term = normalize_link(command.args or "")
+    if not term:
+        lang = _user_lang(message.from_user.id if message.from_user else None)
+        await _safe_respond(
+            "backlinks usage",
+            lambda: services.send_queue.send(
+                message.chat.id, messages.t("backlinks_usage", lang)
+            ),
+        )
+        return
+    await _send_tag_results(message, "l", term, settings, services)
+
+
+@router.callback_query(F.data.startswith(f"{TAGS_CALLBACK}:"))
+async def page_tag_results(
+    callback: CallbackQuery, settings: Settings, services: ServiceRegistry
+) -> None:
+    lang = _user_lang(callback.from_user.id)
+    parts = (callback.data or "").split(":", 3)
+    await _safe_respond("tag page answer", lambda: callback.answer())
+    if len(parts) != 4:
+        logger.warning("Malformed tag page callback %r", callback.data)
+        return
+    _, kind, raw_page, term = parts
+    if kind not in TAG_KINDS or not raw_page.isdigit() or not callback.message:
+        return
+    text, markup = await _tag_page(kind, term, int(raw_page), settings, services, lang)
+    await _safe_respond(
+        "tag page",
+        lambda: callback.message.edit_text(text, reply_markup=markup),
+    )
+
+
+def _calendar_keyboard(
+    year: int, years: Sequence[int], months: dict[int, list[int]], lang: str
+) -> InlineKeyboardMarkup | None:
+    """Buttons for the months that have notes, then the neighbouring years."""
+    names = messages.t("calendar_months", lang).split()
+    keyboard = InlineKeyboardBuilder()
+    for month in sorted(months):
+        keyboard.button(
+            text=names[month - 1], callback_data=f"{CALENDAR_CALLBACK}:m:{year}-{month:02d}"
+        )
+    rows = [min(MONTHS_PER_ROW, len(months) - start)
+            for start in range(0, len(months), MONTHS_PER_ROW)]
+    earlier = [other for other in years if other < year]
+    later = [other for other in years if other > year]
+    nav = 0
+    if earlier:
+        keyboard.button(
+            text=f"◀ {earlier[-1]}", callback_data=f"{CALENDAR_CALLBACK}:y:{earlier[-1]}"
+        )
+        nav += 1
+    if later:
+        keyboard.button(
+            text=f"{later[0]} ▶", callback_data=f"{CALENDAR_CALLBACK}:y:{later[0]}"
+        )
+        nav += 1
+    if nav:
+        rows.append(nav)
+    if not rows:
+        return None
+    keyboard.adjust(*rows)
+    return keyboard.as_markup()
+
+
+def _calendar_days_keyboard(year: int, month: int, days: Sequence[int]) -> InlineKeyboardMarkup:
+    keyboard = InlineKeyboardBuilder()
+    for day in days:
+        keyboard.button(
+            text=str(day), callback_data=f"{CALENDAR_CALLBACK}:d:{year}-{month:02d}-{day:02d}"
+        )
+    keyboard.button(text="⬅", callback_data=f"{CALENDAR_CALLBACK}:b:{year}")
+    rows = [min(DAYS_PER_ROW, len(days) - start) for start in range(0, len(days), DAYS_PER_ROW)]
+    keyboard.adjust(*rows, 1)
+    return keyboard.as_markup()
+
+
+def _calendar_markup(
+    year: int, services: ServiceRegistry, lang: str
+) -> InlineKeyboardMarkup | None:
+    calendar = services.activity
+    months = {
+        month: days
+        for month in range(1, 13)
+        if (days := calendar.active_days(year, month))
+    }
+    return _calendar_keyboard(year, calendar.years(), months, lang)
+
+
+def _calendar_view(
+    year: int, settings: Settings, services: ServiceRegistry, lang: str
+) -> tuple[RenderedCalendar | None, str, InlineKeyboardMarkup | None]:
+    """Heatmap, caption and month keyboard of ``year`` (blocking)."""
+    calendar = services.activity
+    summary = calendar.summary(year)
+    markup = _calendar_markup(year, services, lang)
+    if not summary.active_days:
+        return None, messages.t("calendar_empty", lang).format(year=year), markup
+    caption = messages.t("calendar_caption", lang).format(
+        year=year,
+        days=summary.active_days,
+        streak=summary.longest_streak,
+        kib=math.ceil(summary.total_bytes / 1024),
+    )
+    return calendar.render(year, settings.calendar_format), caption, markup
+
+
+async def _send_calendar(
+    message: Message, year: int, settings: Settings, services: ServiceRegistry, lang: str
+) -> None:
+    rendered, caption, markup = await asyncio.to_thread(
+        _calendar_view, year, settings, services, lang
+    )
+    if rendered is None:
+        await _safe_respond(
+            "calendar empty",
+            lambda: services.send_queue.send(
+                message.chat.id, caption, merge=False, reply_markup=markup
+            ),
+        )
+        return
+
+    async def send() -> None:
+        calendar = services.activity
+        media: str | BufferedInputFile | None = calendar.uploaded_file_id(rendered)
+        if media is None:
+            media = BufferedInputFile(rendered.data, filename=rendered.filename)
+        if rendered.fmt == FORMAT_PNG:
+            sent = await message.answer_photo(media, caption=caption, reply_markup=markup)
+            file_id = sent.photo[-1].file_id if sent.photo else None
+        else:
+            sent = await message.answer_document(media, caption=caption, reply_markup=markup)
+            file_id = sent.document.file_id if sent.document else None
+        if file_id:
+            calendar.remember_upload(rendered, file_id)
+
+    await _safe_respond("calendar", send)
+
+
+@router.message(Command("calendar"))
+async def handle_calendar(
+    message: Message,
+    command: CommandObject,
+    settings: Settings,
+    services: ServiceRegistry,
+) -> None:
+    """A GitHub-style heatmap of the days with notes; months open a day picker."""
+    lang = _user_lang(message.from_user.id if message.from_user else None)
+    raw_year = (command.args or "").strip()
+    if raw_year and not (raw_year.isdigit() and 1900 <= int(raw_year) <= 9999):
+        await _safe_respond(
+            "calendar usage",
+            lambda: services.send_queue.send(
+                message.chat.id, messages.t("calendar_usage", lang)
+            ),
+        )
+        return
+    year = int(raw_year) if raw_year else datetime.now(settings.timezone).year
+    async with _get_journal_lock():
+        await asyncio.to_thread(services.git.pull_changes)
+    await _send_calendar(message, year, settings, services, lang)
+
+
+@router.callback_query(F.data.startswith(f"{CALENDAR_CALLBACK}:"))
+async def handle_calendar_button(
+    callback: CallbackQuery, settings: Settings, services: ServiceRegistry
+) -> None:
+    """``y``: another year, ``m``: the days of a month, ``b``: back, ``d``: a note."""
+    lang = _user_lang(callback.from_user.id)
+    await _safe_respond("calendar answer", lambda: callback.answer())
+    message = callback.message
+    if not isinstance(message, Message):
+        return
+    try:
+        _, action, value = (callback.data or "").split(":", 2)
+        if action == "y":
+            await _send_calendar(message, int(value), settings, services, lang)
+        elif action == "b":
+            markup = await asyncio.to_thread(_calendar_markup, int(value), services, lang)
+            await _safe_respond(
+                "calendar months", lambda: message.edit_reply_markup(reply_markup=markup)
+            )
+        elif action == "m":
+            year, month = (int(part) for part in value.split("-"))
+            days = await asyncio.to_thread(services.activity.active_days, year, month)
+            markup = _calendar_days_keyboard(year, month, days)
+            await _safe_respond(
+                "calendar days", lambda: message.edit_reply_markup(reply_markup=markup)
+            )
+        elif action == "d":
+            day = date.fromisoformat(value)
+            moment = datetime.combine(day, time(12), tzinfo=settings.timezone)
+            async with _get_journal_lock():
+                await asyncio.to_thread(services.git.pull_changes)
+                content = await read_daily_note(
+                    settings.journal_dir, moment, timezone=settings.timezone
+                )
+            if not content.strip():
+                text = messages.t("entries_empty", lang).format(date=f"{day:%Y-%m-%d}")
+                await _safe_respond(
+                    "calendar empty day",
+                    lambda: services.send_queue.send(message.chat.id, text),
+                )
+                return
+            await _send_note(
+                message.chat.id, f"{day:%Y-%m-%d}", content, services, lang, "note_header"
+            )
+    except ValueError:
+        logger.warning("Malformed calendar callback %r", callback.data)
+
+
+@router.message(Command("edit"))
+async def handle_edit_entry(
+    message: Message,
+    command: CommandObject,
+    state: FSMContext,
+    settings: Settings,
+    services: ServiceRegistry,
+) -> None:
+    lang = _user_lang(message.from_user.id if message.from_user else None)
+    ref_text, _, new_text = (command.args or "").strip().partition(" ")
+    today = datetime.now(settings.timezone).date()
+    parsed = parse_entry_ref(ref_text, today) if ref_text else None
+    if parsed is None:
+        await _safe_respond(
+            "edit usage",
+            lambda: services.send_queue.send(
+                message.chat.id, messages.t("entry_usage_edit", lang)
+            ),
+        )
+        return
+    day, number, check = parsed
+    ref = format_entry_ref(day, number, today)
+
+    if new_text.strip():
+        await _finish_entry_rewrite(message, day, number, check, new_text, settings, services)
+        return
+
+    note_path = _note_path_for_day(day, settings)
+    async with _get_journal_lock():
+        await asyncio.to_thread(services.git.pull_changes)
+        entries = await services.entry_index.entry_texts(note_path)
+    problem = _entry_problem(entries, number, check)
+    if problem is not None:
+        await _safe_respond(
+            "edit entry problem",
+            lambda: services.send_queue.send(
+                message.chat.id, messages.t(problem, lang).format(id=ref)
+            ),
+        )
+        return
+    span, current = entries[number - 1]
+    # The reply is checked against the entry shown here, not the listing.
+    await state.set_state(EntryStates.waiting_text)
+    await state.update_data(
+        entry_day=day.isoformat(),
+        entry_number=number,
+        entry_check=entry_check(span.time_label, current),
+    )
+    prompt = messages.t("entry_prompt_edit", lang).format(
+        id=escape(ref), text=escape(current) or "…"
+    )
+    await _safe_respond(
+        "edit entry prompt",
+        lambda: services.send_queue.send(message.chat.id, prompt, merge=False),
+    )
+
+
+@router.message(Command("delete"))
+async def handle_delete_entry(
+    message: Message,
+    command: CommandObject,
+    settings: Settings,
+    services: ServiceRegistry,
+) -> None:
+    lang = _user_lang(message.from_user.id if message.from_user else None)
+    today = datetime.now(settings.timezone).date()
+    parsed = parse_entry_ref(command.args or "", today)
+    if parsed is None:
+        await _safe_respond(
+            "delete usage",
+            lambda: services.send_queue.send(
+                message.chat.id, messages.t("entry_usage_delete", lang)
+            ),
+        )
+        return
+    day, number, check = parsed
+    await _finish_entry_rewrite(message, day, number, check, None, settings, services)
+
+
+@router.message(F.text, StateFilter(EntryStates.waiting_text))
+async def handle_entry_text(
+    message: Message, state: FSMContext, settings: Settings, services: ServiceRegistry
+) -> None:
+    data = await state.get_data()
+    await state.clear()
+    day = date.fromisoformat(data["entry_day"])
+    await _finish_entry_rewrite(
+        message,
+        day,
+        data["entry_number"],
+        data.get("entry_check"),
+        message.text,
+        settings,
+        services,
+    )
+
+
+async def _finish_entry_rewrite(
+    message: Message,
+    day: date,
+    number: int,
+    check: str | None,
+    content: str | None,
+    settings: Settings,
+    services: ServiceRegistry,
+) -> None:
+    lang = _user_lang(message.from_user.id if message.from_user else None)
+    today = datetime.now(settings.timezone).date()
+    ref = escape(format_entry_ref(day, number, today))
+    problem, synced = await _rewrite_entry_with_sync(
+        day, number, check, content, settings, services
+    )
+    if problem is not None:
+        key = problem
+    elif content is None:
+        key = "entry_deleted" if synced else "entry_deleted_local"
+    else:
+        key = "entry_updated" if synced else "entry_updated_local"
+    await _safe_respond(
+        "entry rewrite status",
+        lambda: services.send_queue.send(
+            message.chat.id, messages.t(key, lang).format(id=ref)
+        ),
+    )
+
+
+@router.message(Command("reminders"))
+async def handle_reminders(
+    message: Message,
+    command: CommandObject,
+    settings: Settings,
+    services: ServiceRegistry,
+) -> None:
+    """Show the reminder schedule, or change it when arguments are given."""
+    user_id = message.from_user.id if message.from_user else settings.allowed_user_id
+    lang = _user_lang(user_id)
+    reminders = services.reminders
+    schedule = reminders.get(user_id) or default_reminder_schedule(settings, user_id)
+    if command.args:
+        try:
+            schedule = apply_reminder_args(schedule, command.args)
+        except ValueError:
+            await _safe_respond(
+                "reminders usage",
+                lambda: services.send_queue.send(
+                    message.chat.id, messages.t("reminders_usage", lang)
+                ),
+            )
+            return
+        reminders.update(schedule)
+
+    text = messages.format_reminder_schedule(
+        schedule, reminders.next_reminder(user_id), lang
+    )
+    await _safe_respond(
+        "reminders status", lambda: services.send_queue.send(message.chat.id, text)
+    )
+
+
+@router.message(Command("mirrors"))
+async def handle_mirrors(
+    message: Message,
+    command: CommandObject,
+    services: ServiceRegistry,
+) -> None:
+    """Show the push status of every backup mirror; ``/mirrors retry`` retries now."""
+    lang = _user_lang(message.from_user.id if message.from_user else None)
+    git_service = services.git
+    if (command.args or "").strip().lower() == "retry" and git_service.mirrors:
+        git_service.retry_mirrors()
+        await _safe_respond(
+            "mirrors retry",
+            lambda: services.send_queue.send(
+                message.chat.id, messages.t("mirrors_retrying", lang)
+            ),
+        )
+        return
+    text = messages.format_mirror_status(git_service.mirror_status(), lang)
+    await _safe_respond(
+        "mirrors status", lambda: services.send_queue.send(message.chat.id, text)
+    )
+
+
+@router.message(Command("profile"))
+async def handle_profile(
+    message: Message,
+    command: CommandObject,
+    settings: Settings,
+    services: ServiceRegistry,
+) -> None:
+    """Record a sampling profile of the running bot and send it as a document."""
+    lang = _user_lang(message.from_user.id if message.from_user else None)
+    raw_seconds = (command.args or "").strip()
+    seconds = int(raw_seconds) if raw_seconds.isdigit() else 0
+    if not 1 <= seconds <= settings.profile_max_seconds:
+        await _safe_respond(
+            "profile usage",
+            lambda: services.send_queue.send(
+                message.chat.id,
+                messages.t("profile_usage", lang).format(max=settings.profile_max_seconds),
+            ),
+        )
+        return
+    if services.profiler.busy:
+        await _safe_respond(
+            "profile busy",
+            lambda: services.send_queue.send(
+                message.chat.id, messages.t("profile_busy", lang)
+            ),
+        )
+        return
+
+    await _safe_respond(
+        "profile started",
+        lambda: services.send_queue.send(
+            message.chat.id, messages.t("profile_started", lang).format(seconds=seconds)
+        ),
+    )
+    await _safe_respond(
+        "profile document",
+        lambda: send_profile(
+            message.bot, message.chat.id, services.profiler, seconds, lang
+        ),
+    )
 
 
 @router.callback_query(F.data.in_(LANG_CALLBACKS))
@@ -194,123 +1122,124 @@ async def choose_language(callback: CallbackQuery, state: FSMContext) -> None:
         )
 
 
-@router.message(StateFilter(VoiceStates.waiting_decision))
-async def handle_pending_decision(message: Message, state: FSMContext) -> None:
-    lang = _user_lang(message.from_user.id if message.from_user else None)
-    await _safe_respond(
-        "voice pending decision",
-        lambda: message.answer(messages.t("voice_pending_decision", lang)),
-    )
-
-
 @router.message(F.text, StateFilter(VoiceStates.waiting_edit))
 async def handle_edit(
-    message: Message, state: FSMContext, settings: Settings, git_service: GitService
+    message: Message, state: FSMContext, settings: Settings, services: ServiceRegistry
 ) -> None:
     lang = _user_lang(message.from_user.id if message.from_user else None)
-    synced = await _save_entry_with_sync(message.text, settings, git_service)
-    status_key = "save_synced" if synced else "save_local_only"
+    data = await state.get_data()
+    synced = await _save_entry_with_sync(message.text, settings, services)
+    status = await _save_status_text(synced, message.text, settings, services, lang)
     await _safe_respond(
-        "edit save confirmation", lambda: message.answer(messages.t(status_key, lang))
+        "edit save confirmation",
+        lambda: services.send_queue.send(message.chat.id, status),
     )
     await state.clear()
+    job = (
+        services.voice_reviews.get(message.from_user.id, data.get("job_id", 0))
+        if message.from_user
+        else None
+    )
+    if job is not None:
+        await _advance_reviews(job, services)
 
 
 @router.message(F.text, StateFilter(None))
 async def handle_text(
-    message: Message, state: FSMContext, settings: Settings, git_service: GitService
+    message: Message, state: FSMContext, settings: Settings, services: ServiceRegistry
 ) -> None:
     lang = _user_lang(message.from_user.id if message.from_user else None)
-    synced = await _save_entry_with_sync(message.text, settings, git_service)
-    status_key = "save_synced" if synced else "save_local_only"
+    synced = await _save_entry_with_sync(message.text, settings, services)
+    # A redelivered copy of this update (e.g. after a crash) is skipped on startup.
+    services.update_mark.advance(message.chat.id, message.message_id)
+    status = await _save_status_text(synced, message.text, settings, services, lang)
     await _safe_respond(
-        "text save confirmation", lambda: message.answer(messages.t(status_key, lang))
+        "text save confirmation",
+        lambda: services.send_queue.send(message.chat.id, status),
     )
     await state.clear()
 
 
-@router.message(F.voice, StateFilter(None))
-async def handle_voice(message: Message, state: FSMContext, settings: Settings) -> None:
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".oga") as temp_oga:
-        temp_oga_path = Path(temp_oga.name)
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_wav:
-        temp_wav_path = Path(temp_wav.name)
+@router.message(F.photo | F.document, StateFilter(None))
+async def handle_attachment(
+    message: Message, settings: Settings, services: ServiceRegistry
+) -> None:
+    lang = _user_lang(message.from_user.id if message.from_user else None)
+    if message.photo:
+        telegram_file = message.photo[-1]  # largest size
+        suffix, label = ".jpg", None
+    else:
+        telegram_file = message.document
+        label = message.document.file_name
+        suffix = normalize_suffix(label, message.document.mime_type)
 
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
+        temp_path = Path(temp_file.name)
     try:
-        await message.bot.download(message.voice, destination=temp_oga_path)
-        # Convert OGG Opus to WAV for API compatibility
-        process = await asyncio.create_subprocess_exec(
-            "ffmpeg",
-            "-y",
-            "-i", str(temp_oga_path),
-            "-ar", "16000",
-            "-ac", "1",
-            str(temp_wav_path),
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        _, _ = await process.communicate()
-        if process.returncode != 0:
-            raise RuntimeError("FFmpeg conversion failed")
-        transcription = await transcribe_audio(temp_wav_path, settings)
+        await message.bot.download(telegram_file, destination=temp_path)
+        synced = await _save_entry_with_sync(
+            message.caption or "",
+            settings,
+            services,
+            attachments=[PendingAttachment(temp_path, suffix, label)],
+        )
     except Exception:
-        lang = _user_lang(message.from_user.id if message.from_user else None)
+        logger.exception("Saving attachment failed")
         await _safe_respond(
-            "transcription error notice",
-            lambda: message.answer(messages.t("transcription_error", lang)),
+            "attachment error notice",
+            lambda: services.send_queue.send(
+                message.chat.id, messages.t("attachment_error", lang)
+            ),
         )
         return
     finally:
-        temp_oga_path.unlink(missing_ok=True)
-        temp_wav_path.unlink(missing_ok=True)
+        temp_path.unlink(missing_ok=True)
 
-    if not transcription:
-        lang = _user_lang(message.from_user.id if message.from_user else None)
-        await _safe_respond(
-            "transcription empty notice",
-            lambda: message.answer(messages.t("transcription_empty", lang)),
-        )
-        return
+    status = await _save_status_text(
+        synced, message.caption or "", settings, services, lang
+    )
+    await _safe_respond(
+        "attachment save confirmation",
+        lambda: services.send_queue.send(message.chat.id, status),
+    )
 
-    lang = _user_lang(message.from_user.id if message.from_user else None)
-    keyboard = InlineKeyboardBuilder()
-    keyboard.button(text=messages.t("btn_save", lang), callback_data=CONFIRM_CALLBACK)
-    keyboard.button(text=messages.t("btn_edit", lang), callback_data=EDIT_CALLBACK)
-    keyboard.button(text=messages.t("btn_cancel", lang), callback_data=CANCEL_CALLBACK)
-    keyboard.adjust(3)
 
-    preview = messages.format_transcription_preview(transcription, lang)
-    await _safe_respond(
-        "transcription preview",
-        lambda: message.answer(preview, reply_markup=keyboard.as_markup()),
+@router.message(F.voice)
+async def handle_voice(message: Message, services: ServiceRegistry) -> None:
+    """Queue the voice note for background processing and return immediately."""
+    lang = _user_lang(message.from_user.id if message.from_user else None)
+    job = VoiceJob(
+        chat_id=message.chat.id,
+        user_id=message.from_user.id if message.from_user else 0,
+        file_id=message.voice.file_id,
+        lang=lang,
     )
-    await state.set_state(VoiceStates.waiting_decision)
-    await state.update_data(transcription=transcription)
+    # Not awaited: the job starts right away, even while the chat's rate
+    # limit holds the progress message back; its edits queue up behind it.
+    job.progress = services.send_queue.submit(
+        message.chat.id, messages.t("voice_progress_queued", lang), merge=False
+    )
+    services.voice_jobs.submit(job, lambda done: _finish_voice_job(done, services))
 
 
-@router.callback_query(
-    F.data == CONFIRM_CALLBACK, StateFilter(VoiceStates.waiting_decision)
-)
+@router.callback_query(F.data.startswith(CONFIRM_CALLBACK))
 async def confirm_voice(
     callback: CallbackQuery,
-    state: FSMContext,
     settings: Settings,
-    git_service: GitService,
+    services: ServiceRegistry,
 ) -> None:
-    data = await state.get_data()
-    transcription = data.get("transcription", "")
+    job = _callback_job(callback, services)
     lang = _user_lang(callback.from_user.id if callback.from_user else None)
-    if not transcription:
+    if job is None or not job.transcription:
         await _safe_respond(
             "nothing to save alert",
             lambda: callback.answer(
                 messages.t("nothing_to_save", lang), show_alert=True
             ),
         )
-        await state.clear()
         return
 
-    synced = await _save_entry_with_sync(transcription, settings, git_service)
+    synced = await _save_entry_with_sync(job.transcription, settings, services)
     status_key = "save_synced" if synced else "save_local_only"
     await _safe_respond(
         "voice confirm callback answer",
@@ -321,18 +1250,31 @@ async def confirm_voice(
             "voice confirm remove markup",
             lambda: callback.message.edit_reply_markup(reply_markup=None),
         )
+        status = await _save_status_text(
+            synced, job.transcription, settings, services, lang
+        )
         await _safe_respond(
             "voice confirm status message",
-            lambda: callback.message.answer(messages.t(status_key, lang)),
+            lambda: services.send_queue.send(callback.message.chat.id, status),
         )
-    await state.clear()
+    await _advance_reviews(job, services)
 
 
-@router.callback_query(
-    F.data == EDIT_CALLBACK, StateFilter(VoiceStates.waiting_decision)
-)
-async def edit_voice(callback: CallbackQuery, state: FSMContext) -> None:
+@router.callback_query(F.data.startswith(EDIT_CALLBACK))
+async def edit_voice(
+    callback: CallbackQuery, state: FSMContext, services: ServiceRegistry
+) -> None:
+    job = _callback_job(callback, services)
     lang = _user_lang(callback.from_user.id if callback.from_user else None)
+    if job is None:
+        await _safe_respond(
+            "nothing to edit alert",
+            lambda: callback.answer(
+                messages.t("nothing_to_save", lang), show_alert=True
+            ),
+        )
+        return
+
     await _safe_respond("edit voice callback answer", callback.answer)
     if callback.message:
         await _safe_respond(
@@ -344,13 +1286,14 @@ async def edit_voice(callback: CallbackQuery, state: FSMContext) -> None:
             lambda: callback.message.answer(messages.t("voice_prompt_edit", lang)),
         )
     await state.set_state(VoiceStates.waiting_edit)
+    await state.update_data(job_id=job.id)
 
 
-@router.callback_query(
-    F.data == CANCEL_CALLBACK, StateFilter(VoiceStates.waiting_decision)
-)
-async def cancel_voice(callback: CallbackQuery, state: FSMContext) -> None:
+@router.callback_query(F.data.startswith(CANCEL_CALLBACK))
+async def cancel_voice(callback: CallbackQuery, services: ServiceRegistry) -> None:
+    job = _callback_job(callback, services)
     await _safe_respond("cancel voice callback answer", callback.answer)
     if callback.message:
         await _safe_respond("cancel voice delete message", callback.message.delete)
-    await state.clear()
+    if job is not None:
+        await _advance_reviews(job, services)
@@ -0,0 +1,381 @@
+from __future__ import annotations
+
+import io
+import logging
+import os
+import re
+import threading
+from array import array
+from dataclasses import dataclass
+from datetime import date, timedelta
+from functools import cache
+from html import escape
+from pathlib import Path
+from typing import Iterable
+
+logger = logging.getLogger(__name__)
+
+NOTE_PATH_RE = re.compile(r"^(\d{4})/(\d{2})/(\d{4})-(\d{2})-(\d{2})\.md$")
+YEAR_DIR_RE = re.compile(r"^\d{4}$")
+MONTH_DIR_RE = re.compile(r"^\d{2}$")
+
+CELL = 11
+GAP = 3
+STEP = CELL + GAP
+LEFT = 32
+TOP = 22
+BOTTOM = 26
+COLORS = ("#ebedf0", "#9be9a8", "#40c463", "#30a14e", "#216e39")
+TEXT_COLOR = "#57606a"
+MONTH_LABELS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun",
+                "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+WEEKDAY_LABELS = {0: "Mon", 2: "Wed", 4: "Fri"}
+PNG_SCALE = 2
+
+FORMAT_PNG = "png"
+FORMAT_SVG = "svg"
+
+
+@cache
+def png_available() -> bool:
+    """PNG rendering needs Pillow from the optional ``previews`` extra."""
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        logger.info("Pillow is not installed; /calendar sends SVG documents")
+        return False
+    return True
+
+
+def _days_in_year(year: int) -> int:
+    return (date(year + 1, 1, 1) - date(year, 1, 1)).days
+
+
+@dataclass(frozen=True)
+class YearSummary:
+    year: int
+    active_days: int
+    longest_streak: int
+    total_bytes: int
+
+
+@dataclass(frozen=True)
+class RenderedCalendar:
+    year: int
+    version: int
+    fmt: str
+    data: bytes
+
+    @property
+    def filename(self) -> str:
+        return f"journal-{self.year}.{self.fmt}"
+
+
+class ActivityCalendar:
+    """Per-day journaling activity for ``/calendar``, one dense array per year.
+
+    A day's value is the size of its daily note in bytes, read with ``stat``
+    from one walk over the ``YYYY/MM`` directories, so building a ten-year
+    view opens no note. Saves and pulls update single days; every change
+    bumps that year's version, and rendered images are cached per year and
+    format until the version moves, as is the Telegram file id of the last
+    upload of each, so an unchanged image is re-sent by id.
+    """
+
+    def __init__(self, journal_dir: Path) -> None:
+        self.journal_dir = Path(journal_dir)
+        self._lock = threading.RLock()
+        self._years: dict[int, array] = {}
+        self._versions: dict[int, int] = {}
+        self._renders: dict[tuple[int, str], RenderedCalendar] = {}
+        self._uploads: dict[tuple[int, str], tuple[int, str]] = {}
+
+    def rebuild(self) -> None:
+        """Re-read the size of every daily note from the directory layout."""
+        years: dict[int, array] = {}
+        for year_dir in _scandir(self.journal_dir):
+            if not (year_dir.is_dir() and YEAR_DIR_RE.match(year_dir.name)):
+                continue
+            for month_dir in _scandir(Path(year_dir.path)):
+                if not (month_dir.is_dir() and MONTH_DIR_RE.match(month_dir.name)):
+                    continue
+                for note in _scandir(Path(month_dir.path)):
+                    day = _note_day(f"{year_dir.name}/{month_dir.name}/{note.name}")
+                    if day is None or not note.is_file():
+                        continue
+                    values = years.get(day.year)
+                    if values is None:
+                        values = years[day.year] = _empty_year(day.year)
+                    values[day.timetuple().tm_yday - 1] = note.stat().st_size
+        with self._lock:
+            for year in years.keys() | self._years.keys():
+                if years.get(year) != self._years.get(year):
+                    self._versions[year] = self._versions.get(year, 0) + 1
+            self._years = years
+        logger.info("Activity calendar built: %d years", len(years))
+
+    def update_note(self, note_path: Path) -> None:
+        """Refresh one day after its note was written, edited or deleted.
+
+        The nearest notes before and after it are refreshed too, since a new
+        note rewrites their nav lines.
+        """
+        try:
+            path = note_path.resolve().relative_to(self.journal_dir.resolve()).as_posix()
+        except ValueError:
+            return
+        day = _note_day(path)
+        if day is None:
+            return
+        paths = [path]
+        for neighbour in (self._nearest(day, -1), self._nearest(day, 1)):
+            if neighbour is not None:
+                paths.append(f"{neighbour:%Y}/{neighbour:%m}/{neighbour:%Y-%m-%d}.md")
+        self.apply_changes(paths)
+
+    def _nearest(self, day: date, step: int) -> date | None:
+        """The closest day before (``step=-1``) or after (``1``) with a note."""
+        with self._lock:
+            years = sorted(self._years, reverse=step < 0)
+            for year in years:
+                if (year - day.year) * step < 0:
+                    continue
+                values = self._years[year]
+                if year == day.year:
+                    index = day.timetuple().tm_yday - 1 + step
+                else:
+                    index = 0 if step > 0 else len(values) - 1
+                while 0 <= index < len(values):
+                    if values[index]:
+                        return date(year, 1, 1) + timedelta(days=index)
+                    index += step
+        return None
+
+    def apply_changes(self, paths: Iterable[str] | None, head: str | None = None) -> None:
+        """Refresh the daily notes among ``paths`` (relative, as from ``git diff``).
+
+        ``None`` means the changes are unknown and everything is re-read.
+        """
+        if paths is None:
+            self.rebuild()
+            return
+        for path in paths:
+            day = _note_day(path)
+            if day is None:
+                continue
+            try:
+                size = (self.journal_dir / path).stat().st_size
+            except FileNotFoundError:
+                size = 0
+            self._set(day, size)
+
+    def _set(self, day: date, size: int) -> None:
+        with self._lock:
+            values = self._years.get(day.year)
+            if values is None:
+                if not size:
+                    return
+                values = self._years[day.year] = _empty_year(day.year)
+            index = day.timetuple().tm_yday - 1
+            if values[index] != size:
+                values[index] = size
+                self._versions[day.year] = self._versions.get(day.year, 0) + 1
+
+    def years(self) -> list[int]:
+        """Years with at least one daily note, oldest first."""
+        with self._lock:
+            return sorted(year for year, values in self._years.items() if any(values))
+
+    def days(self, year: int) -> array:
+        """A copy of the year's values, index 0 is January 1st."""
+        with self._lock:
+            values = self._years.get(year)
+            return array("I", values) if values is not None else _empty_year(year)
+
+    def active_days(self, year: int, month: int) -> list[int]:
+        """Days of the month that have a note."""
+        start = date(year, month, 1)
+        end = date(year + month // 12, month % 12 + 1, 1)
+        offset = start.timetuple().tm_yday - 1
+        values = self.days(year)
+        return [
+            number
+            for number in range(1, (end - start).days + 1)
+            if values[offset + number - 1]
+        ]
+
+    def summary(self, year: int) -> YearSummary:
+        values = self.days(year)
+        longest = current = 0
+        for value in values:
+            current = current + 1 if value else 0
+            longest = max(longest, current)
+        return YearSummary(
+            year=year,
+            active_days=sum(1 for value in values if value),
+            longest_streak=longest,
+            total_bytes=sum(values),
+        )
+
+    def render(self, year: int, fmt: str = FORMAT_PNG) -> RenderedCalendar:
+        """The heatmap of ``year``, from the cache unless the year changed since."""
+        if fmt == FORMAT_PNG and not png_available():
+            fmt = FORMAT_SVG
+        with self._lock:
+            version = self._versions.get(year, 0)
+            cached = self._renders.get((year, fmt))
+            if cached is not None and cached.version == version:
+                return cached
+            values = self.days(year)
+        data = render_png(year, values) if fmt == FORMAT_PNG else render_svg(year, values)
+        rendered = RenderedCalendar(year, version, fmt, data)
+        with self._lock:
+            if self._versions.get(year, 0) == version:
+                self._renders[(year, fmt)] = rendered
+        return rendered
+
+    def uploaded_file_id(self, rendered: RenderedCalendar) -> str | None:
+        """Telegram file id of an earlier upload of exactly this image."""
+        with self._lock:
+            upload = self._uploads.get((rendered.year, rendered.fmt))
+        if upload is None or upload[0] != rendered.version:
+            return None
+        return upload[1]
+
+    def remember_upload(self, rendered: RenderedCalendar, file_id: str) -> None:
+        with self._lock:
+            self._uploads[(rendered.year, rendered.fmt)] = (rendered.version, file_id)
+
+
+def _scandir(path: Path) -> list[os.DirEntry]:
+    try:
+        with os.scandir(path) as entries:
+            return list(entries)
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+
+
+def _note_day(path: str) -> date | None:
+    match = NOTE_PATH_RE.match(path)
+    if match is None or match.group(1) != match.group(3) or match.group(2) != match.group(4):
+        return None
+    try:
+        return date(int(match.group(3)), int(match.group(4)), int(match.group(5)))
+    except ValueError:
+        return None
+
+
+def _empty_year(year: int) -> array:
+    return array("I", bytes(4 * _days_in_year(year)))
+
+
+def activity_levels(values: array) -> list[int]:
+    """0 for no note, else 1-4 by quartile of the year's non-empty days."""
+    sizes = sorted(value for value in values if value)
+    if not sizes:
+        return [0] * len(values)
+    cuts = [sizes[len(sizes) * quarter // 4] for quarter in (1, 2, 3)]
+    levels = []
+    for value in values:
+        if not value:
+            levels.append(0)
+        else:
+            levels.append(1 + sum(1 for cut in cuts if value >= cut))
+    return levels
+
+
+def _layout(year: int, values: array) -> tuple[int, int, list[tuple[int, int, int]]]:
+    """Image size and ``(x, y, level)`` per day: weeks are columns, Monday on top."""
+    first = date(year, 1, 1)
+    lead = first.weekday()
+    weeks = (lead + len(values) + 6) // 7
+    cells = []
+    for index, level in enumerate(activity_levels(values)):
+        column, row = divmod(lead + index, 7)
+        cells.append((LEFT + column * STEP, TOP + row * STEP, level))
+    return LEFT + weeks * STEP + GAP, TOP + 7 * STEP + BOTTOM, cells
+
+
+def _month_columns(year: int) -> list[tuple[str, int]]:
+    lead = date(year, 1, 1).weekday()
+    columns = []
+    for month in range(1, 13):
+        index = date(year, month, 1).timetuple().tm_yday - 1
+        columns.append((MONTH_LABELS[month - 1], LEFT + (lead + index) // 7 * STEP))
+    return columns
+
+
+def render_svg(year: int, values: array) -> bytes:
+    width, height, cells = _layout(year, values)
+    font = 'font-family="-apple-system,Segoe UI,Helvetica,Arial,sans-serif" font-size="10"'
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}">',
+        f'<rect width="{width}" height="{height}" fill="#ffffff"/>',
+        f'<g {font} fill="{TEXT_COLOR}">',
+        f'<text x="{GAP}" y="{height - 8}">{year}</text>',
+    ]
+    for label, x in _month_columns(year):
+        parts.append(f'<text x="{x}" y="{TOP - 7}">{label}</text>')
+    for row, label in WEEKDAY_LABELS.items():
+        parts.append(f'<text x="{GAP}" y="{TOP + row * STEP + CELL - 1}">{label}</text>')
+    parts.append("</g>")
+    first = date(year, 1, 1)
+    for index, (x, y, level) in enumerate(cells):
+        day = first + timedelta(days=index)
+        parts.append(
+            f'<rect x="{x}" y="{y}" width="{CELL}" height="{CELL}" rx="2" '
+            f'fill="{COLORS[level]}"><title>{escape(day.isoformat())}</title></rect>'
+        )
+    legend_x = width - GAP - len(COLORS) * STEP - 30
+    parts.append(f'<g {font} fill="{TEXT_COLOR}">')
+    parts.append(f'<text x="{legend_x - 30}" y="{height - 8}">Less</text>')
+    parts.append(f'<text x="{legend_x + len(COLORS) * STEP + 4}" y="{height - 8}">More</text>')
+    parts.append("</g>")
+    for level, color in enumerate(COLORS):
+        parts.append(
+            f'<rect x="{legend_x + level * STEP}" y="{height - 8 - CELL + 1}" '
+            f'width="{CELL}" height="{CELL}" rx="2" fill="{color}"/>'
+        )
+    parts.append("</svg>")
+    return "\n".join(parts).encode()
+
+
+def render_png(year: int, values: array) -> bytes:
+    from PIL import Image, ImageDraw, ImageFont
+
+    width, height, cells = _layout(year, values)
+    scale = PNG_SCALE
+    image = Image.new("RGB", (width * scale, height * scale), "#ffffff")
+    draw = ImageDraw.Draw(image)
+    try:
+        font = ImageFont.load_default(size=10 * scale)
+    except TypeError:  # Pillow < 10.1 has only the fixed bitmap font
+        font = ImageFont.load_default()
+
+    def text(x: int, baseline: int, label: str) -> None:
+        draw.text((x * scale, baseline * scale), label, fill=TEXT_COLOR, font=font, anchor="ls")
+
+    def square(x: int, y: int, color: str) -> None:
+        draw.rounded_rectangle(
+            (x * scale, y * scale, (x + CELL) * scale - 1, (y + CELL) * scale - 1),
+            radius=2 * scale,
+            fill=color,
+        )
+
+    text(GAP, height - 8, str(year))
+    for label, x in _month_columns(year):
+        text(x, TOP - 7, label)
+    for row, label in WEEKDAY_LABELS.items():
+        text(GAP, TOP + row * STEP + CELL - 1, label)
+    for x, y, level in cells:
+        square(x, y, COLORS[level])
+    legend_x = width - GAP - len(COLORS) * STEP - 30
+    text(legend_x - 30, height - 8, "Less")
+    text(legend_x + len(COLORS) * STEP + 4, height - 8, "More")
+    for level, color in enumerate(COLORS):
+        square(legend_x + level * STEP, height - 8 - CELL + 1, color)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", compress_level=1)
+    return buffer.getvalue()
@@ -1,11 +1,12 @@
 import base64
 from pathlib import Path
-from typing import Any
-
-from openai import AsyncOpenAI
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
 
 from dairy_bot.config import Settings
 
+if TYPE_CHECKING:
+    from dairy_bot.services.transcription_router import TranscriptionRouter
+
 PROMPT_TEXT = (
     "Role: You are an expert personal stenographer creating clean, readable notes for a diary.\n"
     "Context: The speaker is a Russian native speaker living in Austria who works in Tech/ML.\n"
@@ -32,38 +33,87 @@ def _decode_message_content(content: Any) -> str:
     return ""
 
 
-async def transcribe_audio(path: Path, settings: Settings) -> str:
-    audio_bytes = path.read_bytes()
-    audio_base64 = base64.b64encode(audio_bytes).decode("utf-8")
-
-    client = AsyncOpenAI(
-        base_url=settings.openrouter_base_url,
-        api_key=settings.openrouter_api_key.get_secret_value(),
-    )
-
-    try:
-        completion = await client.chat.completions.create(
-            model=settings.voice_model_name,
-            messages=[
+def _build_messages(audio_base64: str) -> list[dict[str, Any]]:
+    return [
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": PROMPT_TEXT},
                 {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": PROMPT_TEXT},
-                        {
-                            "type": "input_audio",
-                            "input_audio": {"data": audio_base64, "format": "wav"},
-                        },
-                    ],
-                }
+                    "type": "input_audio",
+                    "input_audio": {"data": audio_base64, "format": "wav"},
+                },
             ],
+        }
+    ]
+
+
+async def _consume_stream(
+    stream: Any, on_partial: Callable[[str], Awaitable[None]]
+) -> str:
+    parts: list[str] = []
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            continue
+        parts.append(delta)
+        await on_partial("".join(parts))
+    return "".join(parts).strip()
+
+
+async def request_transcription(
+    client: Any,
+    model: str,
+    audio_base64: str,
+    on_partial: Callable[[str], Awaitable[None]] | None = None,
+) -> str:
+    """Run one transcription request against an ``AsyncOpenAI`` client."""
+    if on_partial is not None:
+        stream = await client.chat.completions.create(
+            model=model, messages=_build_messages(audio_base64), stream=True
         )
-    except Exception as exc:  # pragma: no cover - best-effort guard
-        raise RuntimeError("Transcription failed") from exc
-    finally:
-        try:
-            await client.close()
-        except Exception:  # pragma: no cover - best-effort cleanup
-            pass
-
-    choice = completion.choices[0].message.content
-    return _decode_message_content(choice)
+        return await _consume_stream(stream, on_partial)
+    completion = await client.chat.completions.create(
+        model=model, messages=_build_messages(audio_base64)
+    )
+    return _decode_message_content(completion.choices[0].message.content)
+
+
+_router: "TranscriptionRouter | None" = None
+
+
+def get_router(settings: Settings) -> "TranscriptionRouter":
+    """Return the process-wide router, rebuilding it if the settings changed."""
+    global _router
+    # Imported lazily: pulls in the openai SDK only once a voice note arrives.
+    from dairy_bot.services.transcription_router import TranscriptionRouter
+
+    if _router is None or _router.settings is not settings:
+        _router = TranscriptionRouter.from_settings(settings)
+    return _router
+
+
+async def close_router() -> None:
+    """Close the pooled backend clients of the router, if one was built."""
+    global _router
+    if _router is not None:
+        await _router.aclose()
+        _router = None
+
+
+async def transcribe_audio(
+    path: Path,
+    settings: Settings,
+    on_partial: Callable[[str], Awaitable[None]] | None = None,
+) -> str:
+    """Transcribe a WAV file; with ``on_partial`` the completion is streamed.
+
+    ``on_partial`` receives the accumulated text after every streamed delta.
+    Requests are routed across the configured backends (see
+    ``TranscriptionRouter``).
+    """
+    audio_bytes = path.read_bytes()
+    audio_base64 = base64.b64encode(audio_bytes).decode("utf-8")
+    return await get_router(settings).transcribe(audio_base64, on_partial)
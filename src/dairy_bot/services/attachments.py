@@ -0,0 +1,175 @@
+import asyncio
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+PREVIEWS_SUBDIR = "previews"
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".tiff"}
+SAFE_SUFFIX_RE = re.compile(r"^\.[a-z0-9]{1,8}$")
+
+
+@dataclass(frozen=True)
+class PendingAttachment:
+    """A downloaded file waiting to be stored alongside a journal entry."""
+
+    temp_path: Path
+    suffix: str
+    label: str | None = None
+
+
+@dataclass(frozen=True)
+class StoredAttachment:
+    path: Path
+    digest: str
+    created: bool
+    preview: Path | None = None
+
+    @property
+    def is_image(self) -> bool:
+        return self.path.suffix in IMAGE_SUFFIXES
+
+
+def normalize_suffix(file_name: str | None, mime_type: str | None) -> str:
+    """Pick a safe lowercase extension from the file name or MIME type."""
+    suffix = Path(file_name or "").suffix.lower()
+    if not SAFE_SUFFIX_RE.match(suffix) and mime_type:
+        suffix = (mimetypes.guess_extension(mime_type) or "").lower()
+    if suffix == ".jpe":
+        suffix = ".jpg"
+    return suffix if SAFE_SUFFIX_RE.match(suffix) else ".bin"
+
+
+def _sha256(path: Path) -> str:
+    with path.open("rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
+
+
+def _make_preview(source: str, destination: str, max_size: int) -> bool:
+    """Write a downscaled JPEG preview; runs in a worker process."""
+    from PIL import Image, ImageOps
+
+    tmp = f"{destination}.tmp"
+    try:
+        with Image.open(source) as image:
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((max_size, max_size))
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            image.save(tmp, format="JPEG", quality=82, optimize=True)
+        os.replace(tmp, destination)
+    except BaseException:
+        # A stray preview would sit untracked in the journal working tree.
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return True
+
+
+class AttachmentStore:
+    """Content-addressed attachment storage inside the journal repo.
+
+    Files live at ``<attachments_dir>/<aa>/<sha256><ext>``, so forwarding the
+    same file again costs nothing on disk or in git. Image previews are
+    rendered in a process pool (Pillow is optional; previews are skipped
+    without it) so decoding never blocks the event loop.
+    """
+
+    def __init__(
+        self,
+        journal_dir: Path,
+        attachments_dir: str = "attachments",
+        preview_size: int = 1024,
+        preview_workers: int = 1,
+    ) -> None:
+        self.journal_dir = Path(journal_dir)
+        self.root = self.journal_dir / attachments_dir
+        self.preview_size = preview_size
+        self.preview_workers = preview_workers
+        self._pool: ProcessPoolExecutor | None = None
+        self._previews_available: bool | None = None
+
+    def path_for(self, digest: str, suffix: str) -> Path:
+        return self.root / digest[:2] / f"{digest}{suffix}"
+
+    def preview_path_for(self, digest: str) -> Path:
+        return self.root / PREVIEWS_SUBDIR / digest[:2] / f"{digest}.jpg"
+
+    async def store(self, temp_path: Path, suffix: str) -> StoredAttachment:
+        """Move a downloaded file into place, or drop it if already stored."""
+        digest = await asyncio.to_thread(_sha256, temp_path)
+        target = self.path_for(digest, suffix)
+        if target.exists():
+            temp_path.unlink(missing_ok=True)
+            created = False
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            # Downloads land in the system temp dir, which may be another device.
+            await asyncio.to_thread(shutil.move, temp_path, target)
+            created = True
+
+        preview = None
+        if target.suffix in IMAGE_SUFFIXES:
+            preview = await self._ensure_preview(target, digest)
+        return StoredAttachment(target, digest, created, preview)
+
+    async def _ensure_preview(self, source: Path, digest: str) -> Path | None:
+        destination = self.preview_path_for(digest)
+        if destination.exists():
+            return destination
+        if not self._pillow_available():
+            return None
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(
+                self._executor(),
+                _make_preview,
+                str(source),
+                str(destination),
+                self.preview_size,
+            )
+        except Exception:
+            logger.warning("Preview generation failed for %s", source.name, exc_info=True)
+            return None
+        return destination
+
+    def _pillow_available(self) -> bool:
+        if self._previews_available is None:
+            try:
+                import PIL  # noqa: F401
+            except ImportError:
+                logger.info("Pillow is not installed; attachment previews are disabled")
+                self._previews_available = False
+            else:
+                self._previews_available = True
+        return self._previews_available
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.preview_workers)
+        return self._pool
+
+    def relative(self, path: Path) -> str:
+        return path.relative_to(self.journal_dir).as_posix()
+
+    def format_embed(self, stored: StoredAttachment, label: str | None = None) -> str:
+        """Obsidian markup: embed the (preview) image, or link other files."""
+        original = self.relative(stored.path)
+        if stored.preview is not None:
+            return f"![[{self.relative(stored.preview)}]]\n[[{original}|original]]"
+        if stored.is_image:
+            return f"![[{original}]]"
+        safe_label = re.sub(r"[\[\]|]", "", label or "") or stored.path.name
+        return f"[[{original}|{safe_label}]]"
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,95 @@
+import asyncio
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+SAMPLE_RATE = 16000
+WAV_BYTES_PER_SECOND = SAMPLE_RATE * 2  # 16-bit mono PCM
+WAV_HEADER_BYTES = 44
+DURATION_RE = re.compile(rb"Duration:\s*(\d+):(\d{2}):(\d{2}(?:\.\d+)?)")
+
+
+@dataclass(frozen=True)
+class SilenceTrim:
+    """Voice-activity thresholds for ffmpeg's ``silenceremove`` filter.
+
+    Audio quieter than ``threshold_db`` counts as silence. Leading silence is
+    trimmed, and every pause longer than ``min_silence`` seconds (including
+    the tail) is compacted down to ``keep_silence`` seconds so sentences stay
+    separated.
+    """
+
+    threshold_db: float = -40.0
+    min_silence: float = 0.8
+    keep_silence: float = 0.25
+
+    def ffmpeg_filter(self) -> str:
+        threshold = f"{self.threshold_db}dB"
+        trim_start = (
+            f"silenceremove=start_periods=1:start_threshold={threshold}"
+            f":start_silence={self.keep_silence}:detection=rms"
+        )
+        compact = (
+            f"silenceremove=stop_periods=-1:stop_duration={self.min_silence}"
+            f":stop_threshold={threshold}:stop_silence={self.keep_silence}"
+            ":detection=rms"
+        )
+        return f"{trim_start},{compact}"
+
+
+@dataclass(frozen=True)
+class AudioReport:
+    input_seconds: float
+    output_seconds: float
+    output_bytes: int
+
+    @property
+    def removed_seconds(self) -> float:
+        return max(0.0, self.input_seconds - self.output_seconds)
+
+    @property
+    def removed_bytes(self) -> int:
+        """WAV bytes saved compared to an untrimmed conversion."""
+        return max(0, round(self.removed_seconds * WAV_BYTES_PER_SECOND))
+
+
+def _parse_duration(stderr: bytes) -> float | None:
+    match = DURATION_RE.search(stderr)
+    if not match:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+async def convert_to_wav(
+    source: Path, destination: Path, trim: SilenceTrim | None = None
+) -> AudioReport:
+    """Convert a Telegram voice note (OGG Opus) to 16 kHz mono WAV via ffmpeg.
+
+    With ``trim`` the same ffmpeg pass also drops leading/trailing silence and
+    compacts long pauses, so fewer bytes are base64-encoded and uploaded.
+    """
+    filter_args = ["-af", trim.ffmpeg_filter()] if trim else []
+    process = await asyncio.create_subprocess_exec(
+        "ffmpeg",
+        "-y",
+        "-i", str(source),
+        *filter_args,
+        "-ar", str(SAMPLE_RATE),
+        "-ac", "1",
+        str(destination),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    _, stderr = await process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError("FFmpeg conversion failed")
+
+    output_bytes = destination.stat().st_size
+    output_seconds = max(0, output_bytes - WAV_HEADER_BYTES) / WAV_BYTES_PER_SECOND
+    input_seconds = _parse_duration(stderr)
+    return AudioReport(
+        input_seconds=input_seconds if input_seconds is not None else output_seconds,
+        output_seconds=output_seconds,
+        output_bytes=output_bytes,
+    )
@@ -0,0 +1,126 @@
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+from aiogram import Bot
+from aiogram.types import Update
+
+logger = logging.getLogger(__name__)
+
+BACKLOG_PAGE_SIZE = 100
+
+
+def ensure_state_dir(state_dir: Path) -> None:
+    """Create the state dir; the default one sits inside the journal repo."""
+    state_dir.mkdir(parents=True, exist_ok=True)
+    ignore = state_dir / ".gitignore"
+    if not ignore.exists():
+        ignore.write_text("*\n")
+
+
+class UpdateMark:
+    """Highest saved ``message_id`` per chat, persisted across restarts.
+
+    Telegram may hand out the same update again after a crash or restart;
+    anything at or below the mark has already been written to the journal.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._marks: dict[int, int] | None = None
+
+    def _load(self) -> dict[int, int]:
+        if self._marks is None:
+            try:
+                raw = json.loads(self.path.read_text())
+                self._marks = {int(chat): int(mark) for chat, mark in raw.items()}
+            except FileNotFoundError:
+                self._marks = {}
+            except (OSError, ValueError, AttributeError):
+                logger.warning("Ignoring unreadable update mark %s", self.path)
+                self._marks = {}
+        return self._marks
+
+    def seen(self, chat_id: int, message_id: int) -> bool:
+        with self._lock:
+            return message_id <= self._load().get(chat_id, 0)
+
+    def advance(self, chat_id: int, message_id: int) -> None:
+        with self._lock:
+            marks = self._load()
+            if message_id <= marks.get(chat_id, 0):
+                return
+            marks[chat_id] = message_id
+            self._save(marks)
+
+    def _save(self, marks: dict[int, int]) -> None:
+        ensure_state_dir(self.path.parent)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({str(chat): mark for chat, mark in marks.items()}))
+        os.replace(tmp, self.path)
+
+
+class Backlog:
+    """Updates that arrived while the bot was down.
+
+    ``getUpdates`` returns at most 100 updates and asking for the next page
+    confirms the previous one, so every page is spooled to disk before the
+    next request. A crash mid catch-up therefore loses nothing: the spool is
+    read back on the next start and only removed once the batch is saved.
+    """
+
+    def __init__(self, bot: Bot, spool_path: Path) -> None:
+        self.bot = bot
+        self.spool_path = Path(spool_path)
+
+    def _read_spool(self) -> list[Update]:
+        try:
+            lines = self.spool_path.read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            return []
+        updates: list[Update] = []
+        for line in lines:
+            try:
+                updates.append(
+                    Update.model_validate_json(line, context={"bot": self.bot})
+                )
+            except ValueError:
+                logger.warning("Skipping unreadable spooled update")
+        return updates
+
+    def _spool(self, page: list[Update]) -> None:
+        ensure_state_dir(self.spool_path.parent)
+        with self.spool_path.open("a", encoding="utf-8") as file:
+            for update in page:
+                file.write(update.model_dump_json(exclude_none=True) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+    async def fetch(self, allowed_updates: list[str]) -> list[Update]:
+        """Spooled updates from an interrupted run plus everything pending."""
+        updates = {update.update_id: update for update in self._read_spool()}
+        offset: int | None = None
+        while True:
+            page = await self.bot.get_updates(
+                offset=offset,
+                limit=BACKLOG_PAGE_SIZE,
+                timeout=0,
+                allowed_updates=allowed_updates,
+            )
+            if not page:
+                break
+            self._spool(page)
+            updates.update((update.update_id, update) for update in page)
+            offset = page[-1].update_id + 1
+        return [updates[update_id] for update_id in sorted(updates)]
+
+    async def confirm(self, updates: list[Update]) -> None:
+        """Acknowledge processed updates and drop the spool."""
+        if updates:
+            await self.bot.get_updates(
+                offset=updates[-1].update_id + 1, limit=1, timeout=0
+            )
+        self.spool_path.unlink(missing_ok=True)
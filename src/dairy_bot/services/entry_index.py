@@ -0,0 +1,209 @@
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import AsyncIterator
+
+ENTRY_HEADER_RE = re.compile(rb"^## (\d{2}:\d{2})[ \t]*\r?$", re.MULTILINE)
+ENTRY_REF_RE = re.compile(
+    r"^(?:(\d{4}-\d{2}-\d{2})[:#/])?(\d+)(?:@(\d{4}-[0-9a-f]{4}))?$", re.IGNORECASE
+)
+
+
+def entry_check(time_label: str, body: str) -> str:
+    """Short ``HHMM-xxxx`` fingerprint of an entry's heading and stripped body."""
+    digest = hashlib.blake2b(body.strip().encode(), digest_size=2).hexdigest()
+    return f"{time_label.replace(':', '')}-{digest}"
+
+
+def parse_entry_ref(ref: str, today: date) -> tuple[date, int, str | None] | None:
+    """Parse ``N`` (today's N-th entry) or ``YYYY-MM-DD:N`` into (day, N, check).
+
+    Refs listed by the bot end in ``@HHMM-xxxx`` (see ``entry_check``) so a
+    numbering shifted by a pull is noticed; hand-typed refs have no check.
+    """
+    match = ENTRY_REF_RE.match(ref.strip())
+    if not match:
+        return None
+    day_text, number, check = match.groups()
+    try:
+        day = date.fromisoformat(day_text) if day_text else today
+    except ValueError:
+        return None
+    return day, int(number), check.lower() if check else None
+
+
+def format_entry_ref(day: date, number: int, today: date, check: str | None = None) -> str:
+    ref = str(number) if day == today else f"{day:%Y-%m-%d}:{number}"
+    return f"{ref}@{check}" if check else ref
+
+
+@dataclass(frozen=True)
+class EntrySpan:
+    """Byte range ``[start, end)`` of one ``## HH:MM`` block in a daily note."""
+
+    start: int
+    end: int
+    time_label: str
+
+
+@dataclass
+class _NoteIndex:
+    mtime_ns: int
+    size: int
+    entries: list[EntrySpan] = field(default_factory=list)
+
+
+def _scan(data: bytes, base: int = 0) -> list[tuple[int, str]]:
+    return [
+        (base + match.start(), match.group(1).decode())
+        for match in ENTRY_HEADER_RE.finditer(data)
+    ]
+
+
+def _spans(headers: list[tuple[int, str]], size: int) -> list[EntrySpan]:
+    spans: list[EntrySpan] = []
+    for index, (start, label) in enumerate(headers):
+        end = headers[index + 1][0] if index + 1 < len(headers) else size
+        spans.append(EntrySpan(start, end, label))
+    return spans
+
+
+def _write_atomic(note_path: Path, data: bytes) -> None:
+    mode = note_path.stat().st_mode & 0o777
+    fd, tmp_name = tempfile.mkstemp(dir=note_path.parent, prefix=f".{note_path.name}.")
+    try:
+        os.fchmod(fd, mode)
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_name, note_path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+class EntryIndex:
+    """Byte offsets of the entries in each daily note.
+
+    The index for a note is trusted while its ``(mtime, size)`` is unchanged
+    and rebuilt from a single regex scan otherwise (e.g. after a pull or an
+    edit in Obsidian). Appends made by the bot only scan the appended tail, and
+    edits/deletes splice one span and shift the offsets after it.
+    """
+
+    def __init__(self) -> None:
+        self._notes: dict[Path, _NoteIndex] = {}
+
+    def _load(self, note_path: Path) -> _NoteIndex | None:
+        try:
+            stat = note_path.stat()
+        except FileNotFoundError:
+            self._notes.pop(note_path, None)
+            return None
+        cached = self._notes.get(note_path)
+        if cached and (cached.mtime_ns, cached.size) == (stat.st_mtime_ns, stat.st_size):
+            return cached
+        data = note_path.read_bytes()
+        cached = _NoteIndex(
+            stat.st_mtime_ns, len(data), _spans(_scan(data), len(data))
+        )
+        self._notes[note_path] = cached
+        return cached
+
+    async def entries(self, note_path: Path) -> list[EntrySpan]:
+        cached = await asyncio.to_thread(self._load, note_path)
+        return list(cached.entries) if cached else []
+
+    @asynccontextmanager
+    async def tracking_append(self, note_path: Path) -> AsyncIterator[None]:
+        """Wrap an append so only the newly written tail gets scanned."""
+        before = await asyncio.to_thread(self._load, note_path)
+        yield
+        if before is None:
+            return
+        await asyncio.to_thread(self._extend, note_path, before)
+
+    def _extend(self, note_path: Path, before: _NoteIndex) -> None:
+        stat = note_path.stat()
+        if stat.st_size < before.size:
+            self._notes.pop(note_path, None)
+            return
+        with note_path.open("rb") as file:
+            file.seek(before.size)
+            tail = file.read()
+        headers = [(span.start, span.time_label) for span in before.entries]
+        headers += _scan(tail, base=before.size)
+        self._notes[note_path] = _NoteIndex(
+            stat.st_mtime_ns, stat.st_size, _spans(headers, stat.st_size)
+        )
+
+    async def entry_texts(self, note_path: Path) -> list[tuple[EntrySpan, str]]:
+        """All entries of a note with their bodies, read in one pass."""
+        return await asyncio.to_thread(self._entry_texts, note_path)
+
+    def _entry_texts(self, note_path: Path) -> list[tuple[EntrySpan, str]]:
+        cached = self._load(note_path)
+        if cached is None:
+            return []
+        data = note_path.read_bytes()
+        result: list[tuple[EntrySpan, str]] = []
+        for span in cached.entries:
+            block = data[span.start : span.end].decode("utf-8", errors="replace")
+            result.append((span, block.partition("\n")[2].strip()))
+        return result
+
+    async def read_entry(self, note_path: Path, number: int) -> str | None:
+        """Return the body of entry ``number`` (1-based) without its heading."""
+        return await asyncio.to_thread(self._read_entry, note_path, number)
+
+    def _read_entry(self, note_path: Path, number: int) -> str | None:
+        cached = self._load(note_path)
+        if cached is None or not 1 <= number <= len(cached.entries):
+            return None
+        span = cached.entries[number - 1]
+        with note_path.open("rb") as file:
+            file.seek(span.start)
+            block = file.read(span.end - span.start).decode("utf-8")
+        _, _, body = block.partition("\n")
+        return body.strip()
+
+    async def replace_entry(
+        self, note_path: Path, number: int, content: str | None
+    ) -> bool:
+        """Rewrite entry ``number`` with ``content`` (or delete it if None).
+
+        Only that span is replaced; the file is swapped in atomically.
+        """
+        return await asyncio.to_thread(self._replace_entry, note_path, number, content)
+
+    def _replace_entry(self, note_path: Path, number: int, content: str | None) -> bool:
+        cached = self._load(note_path)
+        if cached is None or not 1 <= number <= len(cached.entries):
+            return False
+        span = cached.entries[number - 1]
+        data = note_path.read_bytes()
+        if content is None:
+            replacement = b""
+        else:
+            replacement = f"## {span.time_label}\n\n{content.strip()}\n\n".encode()
+        updated = data[: span.start] + replacement + data[span.end :]
+        _write_atomic(note_path, updated)
+
+        delta = len(replacement) - (span.end - span.start)
+        entries = cached.entries[: number - 1]
+        if replacement:
+            entries.append(EntrySpan(span.start, span.start + len(replacement), span.time_label))
+        entries += [
+            EntrySpan(entry.start + delta, entry.end + delta, entry.time_label)
+            for entry in cached.entries[number:]
+        ]
+        stat = note_path.stat()
+        self._notes[note_path] = _NoteIndex(stat.st_mtime_ns, stat.st_size, entries)
+        return True
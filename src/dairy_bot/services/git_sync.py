@@ -1,14 +1,45 @@
+from __future__ import annotations
+
 import logging
+import os
+import random
+import shlex
+import shutil
+import sys
+import tempfile
+import time
 from datetime import datetime
 from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Sequence
 from zoneinfo import ZoneInfo
 
-from git import GitCommandError, InvalidGitRepositoryError, NoSuchPathError, Repo
-
 from dairy_bot.config import DEFAULT_TZ
 
+if TYPE_CHECKING:
+    from git import GitCommandError, Repo
+
+    from dairy_bot.services.mirrors import Mirror, MirrorStatus
+
 logger = logging.getLogger(__name__)
 
+# Cheap tasks that keep history walks fast without rewriting the whole pack set.
+DAILY_MAINTENANCE_TASKS = ("commit-graph", "loose-objects", "incremental-repack")
+FULL_MAINTENANCE_TASKS = DAILY_MAINTENANCE_TASKS + ("gc",)
+MAINTENANCE_CONFIG = {
+    ("core", "commitGraph"): "true",
+    ("fetch", "writeCommitGraph"): "true",
+    ("gc", "writeCommitGraph"): "true",
+}
+MERGE_DRIVER_NAME = "dairy-journal"
+# Kept in .git/info/attributes so the user's repository is not modified.
+MERGE_DRIVER_ATTRIBUTES = (
+    f"[0-9][0-9][0-9][0-9]/[0-9][0-9]/*.md merge={MERGE_DRIVER_NAME}\n"
+)
+SYNC_ATTEMPTS = 5
+SYNC_RETRY_DELAY = 0.3
+
+PullListener = Callable[[list[str] | None, str], None]
+
 
 def _format_git_error(error: GitCommandError) -> str:
     cmd = error.command
@@ -31,31 +62,211 @@ def _format_git_error(error: GitCommandError) -> str:
 
 
 class GitService:
-    """Thin wrapper around GitPython for pull/commit/push workflow."""
+    """Thin wrapper around GitPython for pull/commit/push workflow.
+
+    GitPython is imported on first use so a disabled service never loads it.
+    Mirrors get every commit the primary remote has, pushed in the
+    background after the primary push or a pull returns.
+    """
 
     def __init__(
-        self, journal_dir: Path, enabled: bool = True, timezone: ZoneInfo | None = None
+        self,
+        journal_dir: Path,
+        enabled: bool = True,
+        timezone: ZoneInfo | None = None,
+        remote_url: str | None = None,
+        clone_filter: str | None = None,
+        clone_depth: int | None = None,
+        merge_driver: bool = True,
+        mirrors: Sequence[Mirror] = (),
+        state_dir: Path | None = None,
     ) -> None:
         self.journal_dir = Path(journal_dir)
+        # Local bookkeeping that may already sit in an empty journal dir
+        # before the first clone; it does not count as user files.
+        self.state_dir = Path(state_dir) if state_dir is not None else None
         self.enabled = enabled
         self.timezone = timezone or DEFAULT_TZ
+        self.remote_url = remote_url
+        self.clone_filter = clone_filter
+        self.clone_depth = clone_depth
+        self.merge_driver = merge_driver
+        self.mirrors = list(mirrors)
         self._repo: Repo | None = None
+        self._pull_listeners: list[PullListener] = []
+
+    def add_pull_listener(self, listener: PullListener) -> None:
+        """Call ``listener(changed_paths, new_head)`` whenever a sync brings in commits.
+
+        ``changed_paths`` is ``None`` when the diff could not be computed.
+        """
+        self._pull_listeners.append(listener)
+
+    def head(self) -> str | None:
+        """Current commit of the journal, or ``None`` without git or commits."""
+        if not self.enabled:
+            return None
+        try:
+            return self._ensure_repo().head.commit.hexsha
+        except Exception:
+            return None
+
+    def changed_files(self, since: str, until: str = "HEAD") -> list[str] | None:
+        """Paths touched between two commits, or ``None`` if that is unknown."""
+        if not self.enabled:
+            return None
+        from git import GitCommandError
+
+        try:
+            output = self._ensure_repo().git.diff(
+                "--name-only", "--no-renames", "-z", since, until
+            )
+        except (GitCommandError, ValueError):
+            return None
+        return [path for path in output.split("\0") if path]
 
     def _ensure_repo(self) -> Repo:
         if self._repo is None:
-            self._repo = Repo(self.journal_dir)
+            from git import InvalidGitRepositoryError, NoSuchPathError, Repo
+
+            try:
+                self._repo = Repo(self.journal_dir)
+            except (NoSuchPathError, InvalidGitRepositoryError):
+                if not self.remote_url or self._has_foreign_files():
+                    raise
+                self._repo = self._bootstrap_clone()
+            # Written once here rather than by the nightly job, which runs in a
+            # worker thread while saves use the same Repo.
+            self._apply_maintenance_config(self._repo)
+            if self.merge_driver:
+                self._install_merge_driver(self._repo)
         return self._repo
 
+    @staticmethod
+    def _install_merge_driver(repo: Repo) -> None:
+        """Let git merge concurrent appends to a daily note by entry blocks."""
+        from dairy_bot.services import merge_driver
+
+        command = " ".join(
+            [shlex.quote(sys.executable), shlex.quote(merge_driver.__file__)]
+        )
+        driver = f"{command} %O %A %B %P"
+        reader = repo.config_reader()
+        section = f'merge "{MERGE_DRIVER_NAME}"'
+        if not reader.has_option(section, "driver") or reader.get_value(
+            section, "driver"
+        ) != driver:
+            with repo.config_writer() as writer:
+                writer.set_value(section, "name", "dAIry daily note merge")
+                writer.set_value(section, "driver", driver)
+
+        attributes = Path(repo.git_dir) / "info" / "attributes"
+        existing = attributes.read_text() if attributes.exists() else ""
+        if MERGE_DRIVER_ATTRIBUTES not in existing:
+            attributes.parent.mkdir(parents=True, exist_ok=True)
+            separator = "" if not existing or existing.endswith("\n") else "\n"
+            attributes.write_text(existing + separator + MERGE_DRIVER_ATTRIBUTES)
+
+    @staticmethod
+    def _abort_unfinished(repo: Repo) -> None:
+        """Abort a rebase/merge left behind by a failed sync so the next one can run."""
+        git_dir = Path(repo.git_dir)
+        if (git_dir / "rebase-merge").exists() or (git_dir / "rebase-apply").exists():
+            logger.warning("Aborting an unfinished rebase in the journal repository")
+            repo.git.rebase("--abort")
+        if (git_dir / "MERGE_HEAD").exists():
+            logger.warning("Aborting an unfinished merge in the journal repository")
+            repo.git.merge("--abort")
+
+    def _rebase_onto_remote(self, repo: Repo) -> None:
+        """Fetch and replay local commits on top of the remote branch."""
+        from git import GitCommandError
+
+        self._abort_unfinished(repo)
+        before = repo.head.commit.hexsha if repo.head.is_valid() else None
+        try:
+            repo.git.pull("--rebase", "--autostash")
+        except GitCommandError:
+            self._abort_unfinished(repo)
+            raise
+        if self._pull_listeners and before is not None:
+            self._notify_pull(repo, before)
+        self._push_mirrors(repo)
+
+    def _notify_pull(self, repo: Repo, before: str) -> None:
+        after = repo.head.commit.hexsha
+        if after == before:
+            return
+        changed = self.changed_files(before, after)
+        for listener in self._pull_listeners:
+            try:
+                listener(changed, after)
+            except Exception:
+                logger.exception("Pull listener %r failed", listener)
+
+    def _has_foreign_files(self) -> bool:
+        if not self.journal_dir.exists():
+            return False
+        ignored = self._state_entry()
+        return any(entry.name != ignored for entry in self.journal_dir.iterdir())
+
+    def _state_entry(self) -> str | None:
+        """Top-level name in the journal dir that holds the state dir, if any."""
+        if self.state_dir is None:
+            return None
+        try:
+            relative = self.state_dir.resolve().relative_to(self.journal_dir.resolve())
+        except ValueError:
+            return None
+        return relative.parts[0] if relative.parts else None
+
+    def _bootstrap_clone(self) -> Repo:
+        """Clone the journal into an empty directory, partially/shallowly if configured."""
+        from git import Repo
+
+        options: list[str] = []
+        if self.clone_filter:
+            options.append(f"--filter={self.clone_filter}")
+        if self.clone_depth:
+            options.append(f"--depth={self.clone_depth}")
+        logger.info(
+            "Bootstrapping journal repository from remote (%s)",
+            " ".join(options) or "full clone",
+        )
+        started = time.perf_counter()
+        # Clone next to the journal dir and move it into place, so state
+        # written before the first sync (reminders, backlog, ...) survives.
+        self.journal_dir.parent.mkdir(parents=True, exist_ok=True)
+        staging = Path(
+            tempfile.mkdtemp(prefix=f".{self.journal_dir.name}-clone-", dir=self.journal_dir.parent)
+        )
+        try:
+            Repo.clone_from(self.remote_url, staging, multi_options=options or None)
+            if self.journal_dir.exists():
+                for entry in staging.iterdir():
+                    target = self.journal_dir / entry.name
+                    if target.exists():
+                        raise FileExistsError(f"{target} exists in the journal and the clone")
+                    os.replace(entry, target)
+            else:
+                os.replace(staging, self.journal_dir)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        logger.info("Journal clone finished in %.1fs", time.perf_counter() - started)
+        return Repo(self.journal_dir)
+
     def pull_changes(self) -> bool:
-        """Fetch and merge latest changes from the default remote."""
+        """Fetch and rebase local commits onto the default remote, with retries."""
         if not self.enabled:
             return True
+        from git import GitCommandError, InvalidGitRepositoryError, NoSuchPathError
+
         try:
             repo = self._ensure_repo()
             if not repo.remotes:
                 logger.error("Git pull skipped: no remotes configured")
                 return False
-            repo.remote().pull()
+            self._pull_with_retry(repo)
             return True
         except (NoSuchPathError, InvalidGitRepositoryError):
             logger.exception("Journal directory is not a git repository")
@@ -65,22 +276,47 @@ class GitService:
             logger.exception("Unexpected error during git pull")
         return False
 
-    def commit_and_push(self, file_path: Path) -> bool:
-        """Stage the given file, create a commit if needed, and push."""
+    def _pull_with_retry(self, repo: Repo) -> None:
+        from git import GitCommandError
+
+        for attempt in range(1, SYNC_ATTEMPTS + 1):
+            try:
+                self._rebase_onto_remote(repo)
+                return
+            except GitCommandError as exc:
+                if attempt == SYNC_ATTEMPTS:
+                    raise
+                logger.warning(
+                    "Git pull attempt %d failed, retrying (%s)",
+                    attempt,
+                    _format_git_error(exc),
+                )
+                time.sleep(random.uniform(0, SYNC_RETRY_DELAY * attempt))
+
+    def commit_and_push(
+        self, file_path: Path, *extra_paths: Path, message: str | None = None
+    ) -> bool:
+        """Stage the given files, create a single commit if needed, and push."""
         if not self.enabled:
             return True
+        from git import GitCommandError, InvalidGitRepositoryError, NoSuchPathError
+
         try:
             repo = self._ensure_repo()
-            rel_path = file_path.resolve().relative_to(repo.working_tree_dir)
-        except (NoSuchPathError, InvalidGitRepositoryError, ValueError):
+            rel_paths = [
+                str(path.resolve().relative_to(repo.working_tree_dir))
+                for path in (file_path, *extra_paths)
+            ]
+        except (NoSuchPathError, InvalidGitRepositoryError, GitCommandError, OSError, ValueError):
+            # GitCommandError and OSError come from a failed bootstrap clone.
             logger.exception(
-                "Cannot resolve journal file inside repo",
+                "Cannot open the journal repository or resolve the file inside it",
                 extra={"file": str(file_path)},
             )
             return False
 
         try:
-            repo.index.add([str(rel_path)])
+            repo.index.add(rel_paths)
             has_staged_changes = repo.is_dirty(
                 index=True, working_tree=False, untracked_files=False
             )
@@ -88,11 +324,12 @@ class GitService:
                 return True
 
             timestamp = datetime.now(self.timezone).strftime("%Y-%m-%d %H:%M:%S %Z")
-            repo.index.commit(f"Journal entry: {timestamp}")
+            repo.index.commit(message or f"Journal entry: {timestamp}")
             if not repo.remotes:
                 logger.error("Git push skipped: no remotes configured")
                 return False
-            repo.remote().push()
+            self._push_with_rebase(repo)
+            self._push_mirrors(repo, repo.head.commit.hexsha)
             return True
         except GitCommandError as exc:
             logger.exception(
@@ -104,3 +341,111 @@ class GitService:
                 extra={"file": str(file_path)},
             )
         return False
+
+    def _push_with_rebase(self, repo: Repo) -> None:
+        """Push; if another device pushed first, rebase onto it and try again."""
+        from git import GitCommandError
+
+        for attempt in range(1, SYNC_ATTEMPTS + 1):
+            try:
+                repo.git.push(repo.remote().name, "HEAD")
+                return
+            except GitCommandError as exc:
+                if attempt == SYNC_ATTEMPTS:
+                    raise
+                logger.info(
+                    "Push attempt %d rejected, rebasing onto remote (%s)",
+                    attempt,
+                    _format_git_error(exc),
+                )
+            # Jittered, so devices that collided do not retry in lockstep.
+            time.sleep(random.uniform(0, SYNC_RETRY_DELAY * attempt))
+            self._rebase_onto_remote(repo)
+
+    def _push_mirrors(self, repo: Repo, commit: str | None = None) -> None:
+        """Queue ``commit`` (default: the primary's branch tip) on every mirror.
+
+        Only commits the primary remote already has are mirrored, so a
+        mirror never receives local commits that a later rebase rewrites.
+        """
+        if not self.mirrors:
+            return
+        try:
+            if repo.head.is_detached:
+                return
+            branch = repo.active_branch
+            if commit is None:
+                tracking = branch.tracking_branch()
+                if tracking is None:
+                    return
+                commit = tracking.commit.hexsha
+        except (TypeError, ValueError):
+            return
+        for mirror in self.mirrors:
+            mirror.push(commit, branch.name)
+
+    def mirror_status(self) -> list[MirrorStatus]:
+        return [mirror.status() for mirror in self.mirrors]
+
+    def retry_mirrors(self) -> None:
+        """Push to failing mirrors now instead of waiting out their backoff."""
+        for mirror in self.mirrors:
+            mirror.retry_now()
+
+    def close(self) -> None:
+        for mirror in self.mirrors:
+            mirror.close()
+
+    def run_maintenance(self, full: bool = False) -> bool:
+        """Write the commit-graph and repack incrementally; ``full`` also runs gc.
+
+        Uses its own git command object instead of the shared ``Repo`` so it can
+        run in a worker thread alongside saves; git guards its own files with
+        lockfiles, so a concurrent commit or push is never blocked.
+        """
+        if not self.enabled:
+            return True
+        from git import Git, GitCommandError, InvalidGitRepositoryError, NoSuchPathError
+
+        try:
+            repo = self._ensure_repo()
+            git_cmd = Git(repo.working_tree_dir)
+        except (NoSuchPathError, InvalidGitRepositoryError):
+            logger.exception("Journal directory is not a git repository")
+            return False
+        except (GitCommandError, OSError):
+            logger.exception("Cannot bootstrap the journal repository for maintenance")
+            return False
+
+        tasks = FULL_MAINTENANCE_TASKS if full else DAILY_MAINTENANCE_TASKS
+        ok = True
+        for task in tasks:
+            started = time.perf_counter()
+            try:
+                git_cmd.maintenance("run", f"--task={task}")
+            except GitCommandError as exc:
+                ok = False
+                logger.warning(
+                    "Git maintenance task %s failed (%s)", task, _format_git_error(exc)
+                )
+                continue
+            logger.info(
+                "Git maintenance task %s finished in %.2fs",
+                task,
+                time.perf_counter() - started,
+            )
+        return ok
+
+    @staticmethod
+    def _apply_maintenance_config(repo: Repo) -> None:
+        reader = repo.config_reader()
+        missing = {
+            key: value
+            for key, value in MAINTENANCE_CONFIG.items()
+            if not reader.has_option(*key)
+        }
+        if not missing:
+            return
+        with repo.config_writer() as writer:
+            for (section, option), value in missing.items():
+                writer.set_value(section, option, value)
@@ -0,0 +1,326 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Sequence
+from zoneinfo import ZoneInfo
+
+from dairy_bot.config import Settings
+from dairy_bot.services.ai_service import transcribe_audio
+from dairy_bot.services.audio import SilenceTrim, convert_to_wav
+from dairy_bot.services.catch_up import ensure_state_dir
+from dairy_bot.services.git_sync import GitService
+from dairy_bot.services.storage import write_notes
+
+logger = logging.getLogger(__name__)
+
+AUDIO_SUFFIXES = {".ogg", ".oga", ".opus", ".mp3", ".m4a", ".wav", ".flac", ".webm"}
+TELEGRAM_AUDIO_MEDIA = {"voice_message", "audio_file", "video_message"}
+# 2023-04-05 21.30.12, 20230405_213012, 2023-04-05T21-30 ...
+FILENAME_MOMENT_RE = re.compile(
+    r"(\d{4})-?(\d{2})-?(\d{2})[ _T-]?(\d{2})[.:_-]?(\d{2})(?:[.:_-]?(\d{2}))?"
+)
+DEFAULT_CONCURRENCY = 4
+DEFAULT_COMMIT_ENTRIES = 2000
+
+
+@dataclass(frozen=True)
+class ImportItem:
+    """One future journal entry: text, or an audio file still to transcribe."""
+
+    key: str
+    moment: datetime
+    text: str = ""
+    audio: Path | None = None
+
+
+@dataclass
+class ImportReport:
+    entries: int = 0
+    days: int = 0
+    notes_written: int = 0
+    commits: int = 0
+    transcribed: int = 0
+    cached_transcripts: int = 0
+    skipped_done: int = 0
+    failed: list[str] = field(default_factory=list)
+    synced: bool = True
+    seconds: float = 0.0
+
+    @property
+    def entries_per_second(self) -> float:
+        return self.entries / self.seconds if self.seconds else 0.0
+
+
+def _message_text(raw: Any) -> str:
+    """Telegram export text is a string or a list of strings and entity dicts."""
+    if isinstance(raw, str):
+        return raw
+    if isinstance(raw, list):
+        return "".join(part if isinstance(part, str) else part.get("text", "") for part in raw)
+    return ""
+
+
+def read_telegram_export(
+    export_path: Path, timezone: ZoneInfo, from_id: str | None = None
+) -> list[ImportItem]:
+    """Text and voice messages from a Telegram Desktop ``result.json`` export."""
+    base = export_path.parent
+    data = json.loads(export_path.read_text(encoding="utf-8"))
+    items: list[ImportItem] = []
+    for message in data.get("messages", []):
+        if message.get("type") != "message":
+            continue
+        sender = str(message.get("from_id", "")).removeprefix("user")
+        if from_id and sender != from_id.removeprefix("user"):
+            continue
+        if "date_unixtime" in message:
+            moment = datetime.fromtimestamp(int(message["date_unixtime"]), timezone)
+        else:
+            moment = datetime.fromisoformat(message["date"]).replace(tzinfo=timezone)
+        key = f"tg:{message['id']}"
+        text = _message_text(message.get("text", "")).strip()
+        audio = None
+        if message.get("media_type") in TELEGRAM_AUDIO_MEDIA:
+            file_name = message.get("file", "")
+            candidate = base / file_name
+            if file_name and candidate.is_file():
+                audio = candidate
+            else:
+                logger.warning("Message %s: audio file not in the export, skipped", message["id"])
+        if text or audio is not None:
+            items.append(ImportItem(key, moment, text, audio))
+    return items
+
+
+def _moment_from_name(path: Path, timezone: ZoneInfo) -> datetime:
+    match = FILENAME_MOMENT_RE.search(path.stem)
+    if match:
+        year, month, day, hour, minute, second = match.groups()
+        try:
+            return datetime(
+                int(year), int(month), int(day), int(hour), int(minute), int(second or 0),
+                tzinfo=timezone,
+            )
+        except ValueError:
+            pass
+    return datetime.fromtimestamp(path.stat().st_mtime, timezone)
+
+
+def read_audio_dir(directory: Path, timezone: ZoneInfo) -> list[ImportItem]:
+    """Audio files under ``directory``, dated by file name or else by mtime."""
+    items = []
+    for path in sorted(directory.rglob("*")):
+        if path.is_file() and path.suffix.lower() in AUDIO_SUFFIXES:
+            key = f"audio:{path.relative_to(directory).as_posix()}"
+            items.append(ImportItem(key, _moment_from_name(path, timezone), audio=path))
+    return items
+
+
+def read_source(source: Path, timezone: ZoneInfo, from_id: str | None = None) -> list[ImportItem]:
+    if source.is_dir() and (source / "result.json").is_file():
+        source = source / "result.json"
+    if source.is_dir():
+        return read_audio_dir(source, timezone)
+    return read_telegram_export(source, timezone, from_id)
+
+
+class ImportState:
+    """Progress of one import, so a crashed run continues where it stopped.
+
+    Finished transcriptions are appended to ``transcripts.jsonl`` as they
+    arrive; ``progress.json`` records the last day that was committed.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.transcripts_path = directory / "transcripts.jsonl"
+        self.progress_path = directory / "progress.json"
+        self.transcripts: dict[str, str] = {}
+        self.committed_until: date | None = None
+
+    @classmethod
+    def for_source(cls, state_dir: Path, source: Path) -> "ImportState":
+        digest = hashlib.blake2b(str(source.resolve()).encode(), digest_size=6).hexdigest()
+        return cls(state_dir / "imports" / digest)
+
+    def load(self) -> None:
+        try:
+            lines = self.transcripts_path.read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            lines = []
+        for line in lines:
+            try:
+                record = json.loads(line)
+                self.transcripts[record["key"]] = record["text"]
+            except (ValueError, KeyError, TypeError):
+                continue  # a torn last line after a crash
+        try:
+            raw = json.loads(self.progress_path.read_text())
+            self.committed_until = date.fromisoformat(raw["committed_until"])
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            self.committed_until = None
+
+    def add_transcript(self, key: str, text: str) -> None:
+        ensure_state_dir(self.directory)
+        with self.transcripts_path.open("a", encoding="utf-8") as file:
+            file.write(json.dumps({"key": key, "text": text}, ensure_ascii=False) + "\n")
+        self.transcripts[key] = text
+
+    def commit_progress(self, day: date) -> None:
+        ensure_state_dir(self.directory)
+        tmp = self.progress_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"committed_until": day.isoformat()}))
+        os.replace(tmp, self.progress_path)
+        self.committed_until = day
+
+
+def _chunks(items: Sequence[ImportItem], timezone: ZoneInfo, size: int) -> list[list[ImportItem]]:
+    """Consecutive days grouped into chunks of roughly ``size`` entries."""
+    chunks: list[list[ImportItem]] = []
+    current: list[ImportItem] = []
+    for item in items:
+        day = item.moment.astimezone(timezone).date()
+        if len(current) >= size and current[-1].moment.astimezone(timezone).date() != day:
+            chunks.append(current)
+            current = []
+        current.append(item)
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class JournalImporter:
+    """Bulk import: concurrent transcription, one write per note, few commits.
+
+    Audio is transcribed by up to ``concurrency`` workers in chronological
+    order while earlier chunks are already being written and committed, so
+    the pipeline never waits for the whole archive. Each chunk of about
+    ``commit_entries`` entries (whole days only) is written with
+    ``write_notes`` and committed once.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        git: GitService,
+        state: ImportState,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        commit_entries: int = DEFAULT_COMMIT_ENTRIES,
+    ) -> None:
+        self.settings = settings
+        self.git = git
+        self.state = state
+        self.concurrency = concurrency
+        self.commit_entries = commit_entries
+        self.timezone = settings.timezone
+
+    def _silence_trim(self) -> SilenceTrim | None:
+        if not self.settings.vad_enabled:
+            return None
+        return SilenceTrim(
+            threshold_db=self.settings.vad_threshold_db,
+            min_silence=self.settings.vad_min_silence,
+            keep_silence=self.settings.vad_keep_silence,
+        )
+
+    async def _transcribe(self, item: ImportItem, limit: asyncio.Semaphore) -> str:
+        async with limit:
+            with tempfile.TemporaryDirectory(prefix="dairy-import-") as workdir:
+                wav_path = Path(workdir) / "audio.wav"
+                await convert_to_wav(item.audio, wav_path, trim=self._silence_trim())
+                text = (await transcribe_audio(wav_path, self.settings)).strip()
+        await asyncio.to_thread(self.state.add_transcript, item.key, text)
+        return text
+
+    async def run(self, items: Sequence[ImportItem]) -> ImportReport:
+        started = time.perf_counter()
+        report = ImportReport()
+        self.state.load()
+        done = self.state.committed_until
+        pending = sorted(items, key=lambda item: item.moment)
+        if done is not None:
+            remaining = [i for i in pending if i.moment.astimezone(self.timezone).date() > done]
+            report.skipped_done = len(pending) - len(remaining)
+            pending = remaining
+
+        limit = asyncio.Semaphore(self.concurrency)
+        transcriptions: dict[str, asyncio.Task[str]] = {}
+        for item in pending:
+            if item.audio is None:
+                continue
+            if item.key in self.state.transcripts:
+                report.cached_transcripts += 1
+            else:
+                transcriptions[item.key] = asyncio.create_task(self._transcribe(item, limit))
+
+        await asyncio.to_thread(self.git.pull_changes)
+        try:
+            for chunk in _chunks(pending, self.timezone, self.commit_entries):
+                entries = await self._chunk_entries(chunk, transcriptions, report)
+                if report.failed:
+                    break
+                await self._write_chunk(chunk, entries, report)
+        finally:
+            for task in transcriptions.values():
+                task.cancel()
+            await asyncio.gather(*transcriptions.values(), return_exceptions=True)
+        report.seconds = time.perf_counter() - started
+        return report
+
+    async def _chunk_entries(
+        self,
+        chunk: list[ImportItem],
+        transcriptions: dict[str, asyncio.Task[str]],
+        report: ImportReport,
+    ) -> list[tuple[datetime, str]]:
+        entries: list[tuple[datetime, str]] = []
+        for item in chunk:
+            parts = [item.text] if item.text else []
+            if item.audio is not None:
+                transcript = self.state.transcripts.get(item.key)
+                if item.key in transcriptions:
+                    try:
+                        transcript = await transcriptions[item.key]
+                        report.transcribed += 1
+                    except Exception as exc:
+                        logger.warning("Transcribing %s failed: %s", item.audio, exc)
+                        report.failed.append(str(item.audio))
+                        continue
+                if transcript:
+                    parts.append(transcript)
+            if parts:
+                entries.append((item.moment, "\n\n".join(parts)))
+        return entries
+
+    async def _write_chunk(
+        self,
+        chunk: list[ImportItem],
+        entries: list[tuple[datetime, str]],
+        report: ImportReport,
+    ) -> None:
+        first = chunk[0].moment.astimezone(self.timezone).date()
+        last = chunk[-1].moment.astimezone(self.timezone).date()
+        if entries:
+            note_paths = await asyncio.to_thread(
+                write_notes, self.settings.journal_dir, entries, self.timezone
+            )
+            synced = await asyncio.to_thread(
+                self.git.commit_and_push,
+                *note_paths,
+                message=f"Import {len(entries)} entries ({first:%Y-%m-%d} – {last:%Y-%m-%d})",
+            )
+            report.synced = report.synced and synced
+            report.commits += 1
+            report.notes_written += len(note_paths)
+            report.entries += len(entries)
+            report.days += len({moment.astimezone(self.timezone).date() for moment, _ in entries})
+        await asyncio.to_thread(self.state.commit_progress, last)
+        logger.info("Imported %s – %s: %d entries", first, last, len(entries))
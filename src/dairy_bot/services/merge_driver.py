@@ -0,0 +1,163 @@
+"""Git merge driver for daily notes.
+
+Registered by ``GitService`` as ``merge.dairy-journal.driver`` and invoked by
+git as ``merge_driver.py %O %A %B %P``. It is run as a plain script by the git
+subprocess, so it only depends on the standard library.
+
+A daily note is a preamble (``# YYYY-MM-DD`` header, nav line, anything else
+above the first entry) followed by ``## HH:MM`` blocks. Blocks are merged as
+units: a block removed (or edited) on one side is dropped, blocks added on
+either side are kept once, and additions are interleaved by their time label.
+The nav line is recomputed from both sides' links, so two devices creating
+neighbouring days never conflict on it.
+"""
+
+import re
+import sys
+from collections import Counter
+from pathlib import Path
+
+ENTRY_HEADER_RE = re.compile(r"^## \d{2}:\d{2}[ \t]*$", re.MULTILINE)
+TIME_LABEL_RE = re.compile(r"^## (\d{2}:\d{2})")
+DATE_HEADER_RE = re.compile(r"^#\s+\d{4}-\d{2}-\d{2}\s*$")
+NAV_LINK_RE = re.compile(r"\[\[(\d{4}-\d{2}-\d{2})\|(Prev|Next) day\]\]")
+
+
+def split_note(text: str) -> tuple[str, list[str]]:
+    """Split a note into its preamble and its ``## HH:MM`` blocks."""
+    starts = [match.start() for match in ENTRY_HEADER_RE.finditer(text)]
+    if not starts:
+        return text, []
+    bounds = [*starts, len(text)]
+    blocks = [text[bounds[index] : bounds[index + 1]] for index in range(len(starts))]
+    return text[: starts[0]], blocks
+
+
+def _block_key(block: str) -> str:
+    return "\n".join(line.rstrip() for line in block.strip().splitlines())
+
+
+def _time_label(block: str) -> str:
+    match = TIME_LABEL_RE.match(block)
+    return match.group(1) if match else ""
+
+
+def merge_blocks(base: list[str], ours: list[str], theirs: list[str]) -> list[str]:
+    base_keys = Counter(_block_key(block) for block in base)
+    ours_keys = Counter(_block_key(block) for block in ours)
+    theirs_keys = Counter(_block_key(block) for block in theirs)
+
+    # Blocks they removed (or rewrote) disappear from ours as well.
+    removed_by_them = base_keys - theirs_keys
+    kept_ours: list[str] = []
+    for block in ours:
+        key = _block_key(block)
+        if removed_by_them[key] and base_keys[key]:
+            removed_by_them[key] -= 1
+            continue
+        kept_ours.append(block)
+
+    # Blocks only they added; ones we removed or already have are skipped.
+    added_by_them = theirs_keys - base_keys - ours_keys
+    new_theirs: list[str] = []
+    for block in theirs:
+        key = _block_key(block)
+        if added_by_them[key]:
+            added_by_them[key] -= 1
+            new_theirs.append(block)
+
+    merged: list[str] = []
+    index = 0
+    for block in kept_ours:
+        while index < len(new_theirs) and _time_label(new_theirs[index]) < _time_label(block):
+            merged.append(new_theirs[index])
+            index += 1
+        merged.append(block)
+    merged.extend(new_theirs[index:])
+    return [block if block.endswith("\n\n") else block.rstrip("\n") + "\n\n" for block in merged]
+
+
+def _nav_links(line: str) -> dict[str, str]:
+    return {kind: day for day, kind in NAV_LINK_RE.findall(line)}
+
+
+def _merge_nav(lines: list[str]) -> str:
+    """Nearest previous and next day linked by any side."""
+    prev_days = [links["Prev"] for links in map(_nav_links, lines) if "Prev" in links]
+    next_days = [links["Next"] for links in map(_nav_links, lines) if "Next" in links]
+    parts: list[str] = []
+    if prev_days:
+        parts.append(f"[[{max(prev_days)}|Prev day]]")
+    if next_days:
+        parts.append(f"[[{min(next_days)}|Next day]]")
+    return " · ".join(parts)
+
+
+def _split_preamble(preamble: str) -> tuple[str | None, str | None, list[str]]:
+    lines = preamble.splitlines()
+    if not lines or not DATE_HEADER_RE.match(lines[0]):
+        return None, None, lines
+    if len(lines) > 1 and NAV_LINK_RE.search(lines[1]):
+        return lines[0], lines[1], lines[2:]
+    return lines[0], None, lines[1:]
+
+
+def merge_preamble(base: str, ours: str, theirs: str) -> str:
+    if ours == theirs or theirs == base:
+        return ours
+    if ours == base:
+        return theirs
+    # The nav line is rebuilt from ours and theirs alone.
+    base_header, _, base_rest = _split_preamble(base)
+    ours_header, ours_nav, ours_rest = _split_preamble(ours)
+    theirs_header, theirs_nav, theirs_rest = _split_preamble(theirs)
+
+    if ours_rest == theirs_rest or theirs_rest == base_rest:
+        rest = ours_rest
+    elif ours_rest == base_rest:
+        rest = theirs_rest
+    else:
+        rest = ours_rest + [line for line in theirs_rest if line not in ours_rest]
+
+    header = ours_header or theirs_header or base_header
+    lines: list[str] = [header] if header else []
+    nav_sources = [line for line in (ours_nav, theirs_nav) if line]
+    if header and nav_sources:
+        lines.append(_merge_nav(nav_sources))
+    lines.extend(rest)
+    text = "\n".join(lines)
+    return text + "\n" if text else ""
+
+
+def merge_daily_note(base: str, ours: str, theirs: str) -> str:
+    base_preamble, base_blocks = split_note(base)
+    ours_preamble, ours_blocks = split_note(ours)
+    theirs_preamble, theirs_blocks = split_note(theirs)
+    preamble = merge_preamble(base_preamble, ours_preamble, theirs_preamble)
+    blocks = merge_blocks(base_blocks, ours_blocks, theirs_blocks)
+    if blocks and preamble and not preamble.endswith("\n\n"):
+        preamble = preamble.rstrip("\n") + "\n\n"
+    return preamble + "".join(blocks)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = sys.argv[1:] if argv is None else argv
+    if len(args) < 3:
+        print("usage: merge_driver.py BASE OURS THEIRS [PATH]", file=sys.stderr)
+        return 2
+    base_path, ours_path, theirs_path = (Path(arg) for arg in args[:3])
+    try:
+        merged = merge_daily_note(
+            base_path.read_text(encoding="utf-8"),
+            ours_path.read_text(encoding="utf-8"),
+            theirs_path.read_text(encoding="utf-8"),
+        )
+    except (OSError, UnicodeDecodeError) as exc:
+        print(f"dairy merge driver failed: {exc}", file=sys.stderr)
+        return 1
+    ours_path.write_text(merged, encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
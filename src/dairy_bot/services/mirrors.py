@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from dairy_bot.config import DEFAULT_TZ
+
+logger = logging.getLogger(__name__)
+
+PUSH_TIMEOUT = 120.0
+RETRY_BASE_DELAY = 5.0
+RETRY_MAX_DELAY = 900.0
+ERROR_MAX_LEN = 200
+
+
+@dataclass(frozen=True)
+class MirrorStatus:
+    name: str
+    pushed: str | None  # last commit the mirror accepted in this process
+    pending: str | None  # commit still waiting to be pushed
+    last_success: datetime | None
+    last_error: str | None
+    failures: int  # consecutive
+    retry_at: datetime | None
+
+
+class Mirror:
+    """One backup remote, pushed from its own worker thread.
+
+    ``push`` only records the wanted commit and returns at once, so a slow
+    or unreachable mirror never holds up the primary push. Commits made
+    while a push is running collapse into one push of the newest one. A
+    failed push is retried with exponential backoff; every mirror keeps its
+    own status and backoff.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        target: str,
+        working_dir: Path,
+        timeout: float = PUSH_TIMEOUT,
+        timezone: ZoneInfo | None = None,
+        retry_base: float = RETRY_BASE_DELAY,
+        retry_max: float = RETRY_MAX_DELAY,
+    ) -> None:
+        self.name = name
+        self.target = target  # a configured remote name or a URL
+        self.working_dir = Path(working_dir)
+        self.timeout = timeout
+        self.timezone = timezone or DEFAULT_TZ
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.pushes = 0
+        self._cond = threading.Condition()
+        self._wanted: tuple[str, str] | None = None  # (commit, branch)
+        self._pushed: str | None = None
+        self._last_success: datetime | None = None
+        self._last_error: str | None = None
+        self._failures = 0
+        self._retry_at = 0.0  # time.monotonic()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+
+    def push(self, commit: str, branch: str) -> None:
+        """Make ``commit`` the next thing pushed to ``branch`` on the mirror."""
+        with self._cond:
+            if self._closed or self._wanted == (commit, branch):
+                return
+            self._wanted = (commit, branch)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=f"mirror-{self.name}", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify_all()
+
+    def retry_now(self) -> None:
+        """Skip the remaining backoff of a failing mirror."""
+        with self._cond:
+            self._retry_at = 0.0
+            self._cond.notify_all()
+
+    def close(self) -> None:
+        """Stop the worker; a push in flight is abandoned with the process."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def wait_idle(self, timeout: float | None = None) -> bool:
+        """Block until the wanted commit is pushed (for tools and benchmarks)."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self._wanted is None or self._wanted[0] == self._pushed, timeout
+            )
+
+    def status(self) -> MirrorStatus:
+        with self._cond:
+            pending = self._wanted[0] if self._wanted else None
+            retry_at = None
+            if self._failures and self._retry_at:
+                delay = max(0.0, self._retry_at - time.monotonic())
+                retry_at = datetime.fromtimestamp(time.time() + delay, self.timezone)
+            return MirrorStatus(
+                name=self.name,
+                pushed=self._pushed,
+                pending=None if pending == self._pushed else pending,
+                last_success=self._last_success,
+                last_error=self._last_error,
+                failures=self._failures,
+                retry_at=retry_at,
+            )
+
+    def _next_job(self) -> tuple[str, str] | None:
+        with self._cond:
+            while not self._closed:
+                wanted = self._wanted
+                if wanted is None or wanted[0] == self._pushed:
+                    self._cond.wait()
+                    continue
+                delay = self._retry_at - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                return wanted
+            return None
+
+    def _run(self) -> None:
+        while (job := self._next_job()) is not None:
+            commit, branch = job
+            started = time.perf_counter()
+            try:
+                self._push(commit, branch)
+            except Exception as exc:
+                with self._cond:
+                    self._failures += 1
+                    self._last_error = _short_error(exc)
+                    delay = min(self.retry_max, self.retry_base * 2 ** (self._failures - 1))
+                    self._retry_at = time.monotonic() + delay
+                    failures = self._failures
+                logger.warning(
+                    "Mirror %s push failed (%d in a row), retrying in %.1fs: %s",
+                    self.name,
+                    failures,
+                    delay,
+                    self._last_error,
+                )
+                continue
+            with self._cond:
+                self.pushes += 1
+                self._pushed = commit
+                self._failures = 0
+                self._last_error = None
+                self._retry_at = 0.0
+                self._last_success = datetime.now(self.timezone)
+                self._cond.notify_all()
+            logger.info(
+                "Mirror %s at %s (%.2fs)", self.name, commit[:8], time.perf_counter() - started
+            )
+
+    def _push(self, commit: str, branch: str) -> None:
+        # A separate git command object, like maintenance: the shared Repo
+        # keeps serving saves while this thread waits on the network.
+        from git import Git
+
+        Git(self.working_dir).push(
+            self.target, f"{commit}:refs/heads/{branch}", kill_after_timeout=self.timeout
+        )
+
+
+def _short_error(exc: Exception) -> str:
+    from git import GitCommandError
+
+    if isinstance(exc, GitCommandError):
+        stderr = (exc.stderr or "").strip().removeprefix("stderr:").strip().strip("'")
+        lines = [line.strip() for line in stderr.splitlines() if line.strip()]
+        # The first "fatal:"/"error:" line names the cause; hints follow it.
+        causes = [line for line in lines if line.startswith(("fatal:", "error:"))]
+        text = (causes or lines or [f"git exited with {exc.status}"])[0]
+        if text.startswith("Timeout:"):
+            # GitPython quotes the whole command line, URL credentials included.
+            text = "push timed out"
+    else:
+        text = str(exc) or type(exc).__name__
+    return text if len(text) <= ERROR_MAX_LEN else text[: ERROR_MAX_LEN - 1] + "…"
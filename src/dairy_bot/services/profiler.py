@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from types import FrameType
+from typing import Any
+
+from aiogram import Bot
+from aiogram.types import BufferedInputFile
+
+from dairy_bot.texts import messages
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 0.01
+MAX_STACK_DEPTH = 128
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    path = Path(code.co_filename)
+    return f"{code.co_qualname} ({path.parent.name}/{path.name}:{code.co_firstlineno})"
+
+
+def _thread_stack(frame: FrameType | None) -> list[str]:
+    stack: list[str] = []
+    while frame is not None and len(stack) < MAX_STACK_DEPTH:
+        stack.append(_frame_label(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def _task_stack(task: asyncio.Task) -> list[str]:
+    """Follow a task's ``await`` chain down to whatever it is waiting on."""
+    stack: list[str] = []
+    awaitable: Any = task.get_coro()
+    while awaitable is not None and len(stack) < MAX_STACK_DEPTH:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+        if frame is None:  # a Future (e.g. run_in_executor) or a C awaitable
+            break
+        stack.append(_frame_label(frame))
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(
+            awaitable, "gi_yieldfrom", None
+        )
+    return stack
+
+
+@dataclass(frozen=True)
+class Profile:
+    """Collapsed stacks (``frame;frame;frame count`` per line), flamegraph-ready."""
+
+    folded: str
+    samples: int
+    seconds: float
+    interval: float
+
+
+class SamplingProfiler:
+    """Statistical profiler for the running bot.
+
+    A short-lived thread wakes every ``interval`` seconds and records the
+    Python stack of every other thread (the event loop and the
+    ``asyncio.to_thread`` workers running git) plus the ``await`` chain of
+    every pending task, so a coroutine waiting on ffmpeg or on a worker thread
+    shows up under ``task;`` even though the loop itself is idle in ``select``.
+    Nothing is installed while no profile is running.
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL) -> None:
+        self.interval = interval
+        self._running = threading.Lock()
+
+    @property
+    def busy(self) -> bool:
+        return self._running.locked()
+
+    async def record(self, seconds: float) -> Profile:
+        """Sample for ``seconds`` and return the collapsed stacks."""
+        if not self._running.acquire(blocking=False):
+            raise RuntimeError("A profile is already being recorded")
+        loop = asyncio.get_running_loop()
+        done: asyncio.Future[Profile] = loop.create_future()
+
+        def run() -> None:
+            try:
+                result = self._sample(loop, seconds)
+            except BaseException as exc:  # pragma: no cover - surfaced to the caller
+                loop.call_soon_threadsafe(done.set_exception, exc)
+            else:
+                loop.call_soon_threadsafe(done.set_result, result)
+            finally:
+                self._running.release()
+
+        # A dedicated thread, so the sampler neither occupies nor shows up as
+        # one of the to_thread workers it is measuring.
+        threading.Thread(target=run, name="dairy-profiler", daemon=True).start()
+        return await done
+
+    def _sample(self, loop: asyncio.AbstractEventLoop, seconds: float) -> Profile:
+        own_id = threading.get_ident()
+        counts: Counter[str] = Counter()
+        samples = 0
+        started = time.perf_counter()
+        deadline = started + seconds
+        next_tick = started
+        while next_tick < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                name = names.get(thread_id, str(thread_id))
+                counts[";".join([f"thread:{name}", *_thread_stack(frame)])] += 1
+            try:
+                tasks = list(asyncio.all_tasks(loop))
+            except RuntimeError:
+                tasks = []
+            for task in tasks:
+                if task.done():
+                    continue
+                stack = _task_stack(task)
+                if stack:
+                    counts[";".join(["task", *stack])] += 1
+            samples += 1
+            next_tick += self.interval
+            time.sleep(max(0.0, next_tick - time.perf_counter()))
+
+        folded = "".join(f"{stack} {count}\n" for stack, count in sorted(counts.items()))
+        return Profile(folded, samples, time.perf_counter() - started, self.interval)
+
+
+async def send_profile(
+    bot: Bot, chat_id: int, profiler: SamplingProfiler, seconds: float, lang: str
+) -> None:
+    """Record a profile and deliver it to ``chat_id`` as a ``.folded`` document."""
+    profile = await profiler.record(seconds)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    caption = messages.t("profile_caption", lang).format(
+        seconds=f"{profile.seconds:.0f}",
+        samples=profile.samples,
+        interval=f"{profile.interval * 1000:.0f}",
+    )
+    await bot.send_document(
+        chat_id,
+        BufferedInputFile(profile.folded.encode(), filename=f"dairy-profile-{stamp}.folded"),
+        caption=caption,
+    )
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, Callable
+
+from dairy_bot.config import Settings
+
+if TYPE_CHECKING:
+    from dairy_bot.services.activity import ActivityCalendar
+    from dairy_bot.services.attachments import AttachmentStore
+    from dairy_bot.services.catch_up import UpdateMark
+    from dairy_bot.services.entry_index import EntryIndex
+    from dairy_bot.services.git_sync import GitService
+    from dairy_bot.services.profiler import SamplingProfiler
+    from dairy_bot.services.related import RelatedIndex
+    from dairy_bot.services.reminders import ReminderDispatcher
+    from dairy_bot.services.send_queue import SendQueue
+    from dairy_bot.services.tags import TagIndex
+    from dairy_bot.services.voice_jobs import PendingReviews, VoiceJobQueue
+
+logger = logging.getLogger(__name__)
+
+GIT_SERVICE = "git_service"
+SEND_QUEUE = "send_queue"
+VOICE_JOBS = "voice_jobs"
+VOICE_REVIEWS = "voice_reviews"
+ATTACHMENTS = "attachments"
+ENTRY_INDEX = "entry_index"
+RELATED = "related"
+PROFILER = "profiler"
+UPDATE_MARK = "update_mark"
+REMINDERS = "reminders"
+TAGS = "tags"
+ACTIVITY = "activity"
+
+
+class ServiceRegistry:
+    """Build heavy services on first use instead of at import time.
+
+    Factories are registered by name and only called when a handler asks for
+    the service, so optional features (git sync, transcription backends, ...)
+    do not pay their import cost during startup.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self.settings = settings
+        self._factories: dict[str, Callable[[Settings], Any]] = {}
+        self._instances: dict[str, Any] = {}
+        # Re-entrant: a factory may ask for the services it depends on.
+        self._lock = threading.RLock()
+        self.register(GIT_SERVICE, _build_git_service)
+        self.register(VOICE_REVIEWS, _build_voice_reviews)
+        self.register(ATTACHMENTS, _build_attachment_store)
+        self.register(ENTRY_INDEX, _build_entry_index)
+        self.register(RELATED, _build_related_index)
+        self.register(PROFILER, _build_profiler)
+        self.register(UPDATE_MARK, _build_update_mark)
+        self.register(REMINDERS, _build_reminders)
+        self.register(TAGS, lambda settings: _build_tag_index(settings, self.git))
+        self.register(ACTIVITY, lambda settings: _build_activity(settings, self.git))
+
+    def register(self, name: str, factory: Callable[[Settings], Any]) -> None:
+        """Register (or replace) the factory used to build a service."""
+        with self._lock:
+            self._factories[name] = factory
+            self._instances.pop(name, None)
+
+    def get(self, name: str) -> Any:
+        """Return the service, constructing it on the first call."""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            instance = self._instances.get(name)
+            if instance is None:
+                factory = self._factories[name]
+                instance = factory(self.settings)
+                self._instances[name] = instance
+                logger.debug("Service %s initialised", name)
+        return instance
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._instances
+
+    @property
+    def git(self) -> GitService:
+        return self.get(GIT_SERVICE)
+
+    @property
+    def send_queue(self) -> SendQueue:
+        return self.get(SEND_QUEUE)
+
+    @property
+    def voice_jobs(self) -> VoiceJobQueue:
+        return self.get(VOICE_JOBS)
+
+    @property
+    def voice_reviews(self) -> PendingReviews:
+        return self.get(VOICE_REVIEWS)
+
+    @property
+    def attachments(self) -> AttachmentStore:
+        return self.get(ATTACHMENTS)
+
+    @property
+    def entry_index(self) -> EntryIndex:
+        return self.get(ENTRY_INDEX)
+
+    @property
+    def related(self) -> RelatedIndex:
+        return self.get(RELATED)
+
+    @property
+    def profiler(self) -> SamplingProfiler:
+        return self.get(PROFILER)
+
+    @property
+    def update_mark(self) -> UpdateMark:
+        return self.get(UPDATE_MARK)
+
+    @property
+    def tags(self) -> TagIndex:
+        return self.get(TAGS)
+
+    @property
+    def reminders(self) -> ReminderDispatcher:
+        return self.get(REMINDERS)
+
+    @property
+    def activity(self) -> ActivityCalendar:
+        return self.get(ACTIVITY)
+
+
+def _build_git_service(settings: Settings) -> GitService:
+    from dairy_bot.services.git_sync import GitService
+    from dairy_bot.services.mirrors import Mirror
+
+    mirrors = [
+        Mirror(
+            mirror.name,
+            mirror.url or mirror.name,
+            settings.journal_dir,
+            timeout=settings.git_mirror_timeout,
+            timezone=settings.timezone,
+        )
+        for mirror in settings.git_mirrors
+    ]
+    return GitService(
+        settings.journal_dir,
+        enabled=settings.git_enabled,
+        timezone=settings.timezone,
+        remote_url=settings.git_remote_url,
+        clone_filter=settings.git_clone_filter,
+        clone_depth=settings.git_clone_depth,
+        merge_driver=settings.git_merge_driver,
+        mirrors=mirrors if settings.git_enabled else (),
+        state_dir=settings.resolved_state_dir(),
+    )
+
+
+def _build_voice_reviews(settings: Settings) -> PendingReviews:
+    from dairy_bot.services.voice_jobs import PendingReviews
+
+    return PendingReviews()
+
+
+def _build_attachment_store(settings: Settings) -> AttachmentStore:
+    from dairy_bot.services.attachments import AttachmentStore
+
+    return AttachmentStore(
+        settings.journal_dir,
+        attachments_dir=settings.attachments_dir,
+        preview_size=settings.attachments_preview_size,
+    )
+
+
+def _build_entry_index(settings: Settings) -> EntryIndex:
+    from dairy_bot.services.entry_index import EntryIndex
+
+    return EntryIndex()
+
+
+def _build_related_index(settings: Settings) -> RelatedIndex:
+    from dairy_bot.services.related import RelatedIndex
+
+    index_dir = settings.related_index_dir or settings.resolved_state_dir() / "related"
+    return RelatedIndex(index_dir, settings.journal_dir)
+
+
+def _build_profiler(settings: Settings) -> SamplingProfiler:
+    from dairy_bot.services.profiler import SamplingProfiler
+
+    return SamplingProfiler()
+
+
+def _build_update_mark(settings: Settings) -> UpdateMark:
+    from dairy_bot.services.catch_up import UpdateMark
+
+    return UpdateMark(settings.resolved_state_dir() / "update_mark.json")
+
+
+def _build_reminders(settings: Settings) -> ReminderDispatcher:
+    from dairy_bot.services.reminders import ReminderDispatcher, ReminderStore
+
+    store = ReminderStore(settings.resolved_state_dir() / "reminders.json")
+    return ReminderDispatcher(store, settings.journal_dir)
+
+
+def _build_tag_index(settings: Settings, git: GitService) -> TagIndex:
+    from dairy_bot.services.tags import TagIndex
+
+    index = TagIndex(settings.resolved_state_dir() / "tags", settings.journal_dir)
+    index.open(git if git.enabled else None)
+    git.add_pull_listener(index.apply_changes)
+    return index
+
+
+def _build_activity(settings: Settings, git: GitService) -> ActivityCalendar:
+    from dairy_bot.services.activity import ActivityCalendar
+
+    calendar = ActivityCalendar(settings.journal_dir)
+    calendar.rebuild()
+    git.add_pull_listener(calendar.apply_changes)
+    return calendar
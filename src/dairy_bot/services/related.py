@@ -0,0 +1,484 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date
+from functools import cache
+from pathlib import Path
+from typing import Any, Iterator
+
+from dairy_bot.services.entry_index import ENTRY_HEADER_RE
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+NOTE_NAME_RE = re.compile(r"^\d{4}-\d{2}-\d{2}\.md$")
+TOKEN_RE = re.compile(r"[^\W\d_]{2,}", re.UNICODE)
+# Path-style wikilinks are attachment embeds; their hashes are not words.
+PATH_LINK_RE = re.compile(r"!?\[\[[^\]]*/[^\]]*\]\]")
+SNIPPET_LEN = 80
+
+INDPTR_FILE = "indptr.i32"
+INDICES_FILE = "indices.i32"
+DATA_FILE = "data.f32"
+DF_FILE = "df.i32"
+VOCAB_FILE = "vocab.txt"
+ENTRIES_FILE = "entries.jsonl"
+REMOVED_FILE = "removed.i32"
+META_FILE = "meta.json"
+
+
+@cache
+def related_available() -> bool:
+    """NumPy and SciPy come with the optional ``related`` extra."""
+    try:
+        import numpy  # noqa: F401
+        import scipy.sparse  # noqa: F401
+    except ImportError:
+        logger.info("NumPy/SciPy are not installed; related entries are disabled")
+        return False
+    return True
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_RE.findall(PATH_LINK_RE.sub(" ", text).lower())
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(" ".join(text.split()).encode(), digest_size=8).hexdigest()
+
+
+def _snippet(text: str) -> str:
+    flat = " ".join(PATH_LINK_RE.sub(" ", text).split())
+    return flat if len(flat) <= SNIPPET_LEN else flat[: SNIPPET_LEN - 1] + "…"
+
+
+def _idf(df: Any, documents: int) -> Any:
+    import numpy as np
+
+    return (np.log((1 + documents) / (1 + df.astype(np.float32))) + 1).astype(np.float32)
+
+
+def iter_journal_entries(journal_dir: Path) -> Iterator[tuple[date, str, str]]:
+    """Yield ``(day, "HH:MM", text)`` for every entry of every daily note."""
+    for note_path in sorted(journal_dir.glob("[0-9][0-9][0-9][0-9]/[0-9][0-9]/*.md")):
+        if not NOTE_NAME_RE.match(note_path.name):
+            continue
+        try:
+            day = date.fromisoformat(note_path.stem)
+            data = note_path.read_bytes()
+        except (OSError, ValueError):
+            continue
+        headers = list(ENTRY_HEADER_RE.finditer(data))
+        for index, match in enumerate(headers):
+            end = headers[index + 1].start() if index + 1 < len(headers) else len(data)
+            body = data[match.end() : end].decode("utf-8", errors="replace").strip()
+            if body:
+                yield day, match.group(1).decode(), body
+
+
+@dataclass(frozen=True)
+class RelatedEntry:
+    day: date
+    time_label: str
+    snippet: str
+    score: float
+
+
+class RelatedIndex:
+    """Local TF-IDF similarity search over all journal entries.
+
+    The entry × term matrix is kept on disk as raw CSR arrays (``indptr``,
+    ``indices``, ``data``) and opened with ``numpy.memmap``, so the page cache
+    rather than the Python heap holds it. A query is a single sparse
+    mat-vec product followed by ``argpartition``.
+
+    Rows are appended as entries are saved: each new row is L2-normalised
+    with the IDF known at that moment, while queries always use current
+    document frequencies. ``rebuild`` re-reads every note and rewrites the
+    matrix with up-to-date weights; it also picks up entries edited or added
+    outside the bot. Entries edited or deleted through the bot are dropped
+    with ``remove``, which appends the row number to a tombstone list
+    instead of rewriting the matrix.
+    """
+
+    def __init__(self, index_dir: Path, journal_dir: Path) -> None:
+        self.index_dir = Path(index_dir)
+        self.journal_dir = Path(journal_dir)
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._rows = 0
+        self._nnz = 0
+        self._vocab: dict[str, int] = {}
+        self._df: Any = None
+        self._digests: list[str] = []
+        self._entries: list[tuple[str, str, str]] = []
+        self._removed: list[int] = []
+        self._keys: set[tuple[str, str, str]] | None = None  # (day, time, digest)
+        self._matrix: Any = None
+        self._matrix_shape: tuple[int, int] | None = None
+
+    @property
+    def rows(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return self._live_rows()
+
+    # -- persistence -----------------------------------------------------
+
+    def _path(self, name: str) -> Path:
+        return self.index_dir / name
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        try:
+            self._load()
+        except (OSError, ValueError, KeyError) as exc:
+            logger.info("Related-entries index unusable (%s), rebuilding", exc)
+            self._rebuild()
+        self._loaded = True
+
+    def _load(self) -> None:
+        import numpy as np
+
+        meta = json.loads(self._path(META_FILE).read_text())
+        if meta.get("version") != INDEX_VERSION:
+            raise ValueError("index version changed")
+        rows, nnz, terms = meta["rows"], meta["nnz"], meta["terms"]
+        removed = meta.get("removed", 0)
+
+        # Drop anything a crashed append wrote past the last committed row.
+        for name, count in ((INDPTR_FILE, rows + 1), (INDICES_FILE, nnz), (DATA_FILE, nnz)):
+            path = self._path(name)
+            if path.stat().st_size < count * 4:
+                raise ValueError(f"{name} is truncated")
+            os.truncate(path, count * 4)
+
+        vocab_terms = self._path(VOCAB_FILE).read_text(encoding="utf-8").split("\n")[:terms]
+        entry_lines = self._path(ENTRIES_FILE).read_text(encoding="utf-8").splitlines()[:rows]
+        df = np.fromfile(self._path(DF_FILE), dtype=np.int32)
+        if len(vocab_terms) != terms or len(entry_lines) != rows or len(df) < terms:
+            raise ValueError("index files disagree with meta.json")
+        tombstones: list[int] = []
+        if removed:
+            removed_path = self._path(REMOVED_FILE)
+            if removed_path.stat().st_size < removed * 4:
+                raise ValueError(f"{REMOVED_FILE} is truncated")
+            os.truncate(removed_path, removed * 4)
+            tombstones = np.fromfile(removed_path, dtype=np.int32).tolist()
+        else:
+            self._path(REMOVED_FILE).unlink(missing_ok=True)
+
+        entries = [json.loads(line) for line in entry_lines]
+        self._rows, self._nnz = rows, nnz
+        self._vocab = {term: index for index, term in enumerate(vocab_terms)}
+        self._df = df[:terms].copy()
+        self._digests = [entry["digest"] for entry in entries]
+        self._entries = [(entry["day"], entry["time"], entry["snippet"]) for entry in entries]
+        self._removed = tombstones
+        self._keys = None
+        self._rewrite_text_files()
+        self._matrix = None
+
+    def _rewrite_text_files(self) -> None:
+        """Trim vocab/entries to the committed counts after an interrupted append."""
+        vocab_path, entries_path = self._path(VOCAB_FILE), self._path(ENTRIES_FILE)
+        vocab_text = "".join(f"{term}\n" for term in self._vocab)
+        if vocab_path.stat().st_size != len(vocab_text.encode()):
+            vocab_path.write_text(vocab_text, encoding="utf-8")
+        entries_text = "".join(
+            self._entry_line(day, time_label, snippet, digest)
+            for (day, time_label, snippet), digest in zip(self._entries, self._digests)
+        )
+        if entries_path.stat().st_size != len(entries_text.encode()):
+            entries_path.write_text(entries_text, encoding="utf-8")
+
+    @staticmethod
+    def _entry_line(day: str, time_label: str, snippet: str, digest: str) -> str:
+        record = {"day": day, "time": time_label, "snippet": snippet, "digest": digest}
+        return json.dumps(record, ensure_ascii=False) + "\n"
+
+    def _write_meta(self, directory: Path | None = None) -> None:
+        directory = directory or self.index_dir
+        meta = {
+            "version": INDEX_VERSION,
+            "rows": self._rows,
+            "nnz": self._nnz,
+            "terms": len(self._vocab),
+            "removed": len(self._removed),
+        }
+        tmp = directory / f"{META_FILE}.tmp"
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, directory / META_FILE)
+
+    def _open_matrix(self) -> Any:
+        import numpy as np
+        from scipy.sparse import csr_matrix
+
+        shape = (self._rows, len(self._vocab))
+        if self._matrix is not None and self._matrix_shape == shape:
+            return self._matrix
+        if not self._rows:
+            return None
+
+        def mapped(name: str, dtype: Any, count: int) -> Any:
+            return np.memmap(self._path(name), dtype=dtype, mode="r", shape=(count,))
+
+        indptr = mapped(INDPTR_FILE, np.int32, self._rows + 1)
+        indices = mapped(INDICES_FILE, np.int32, self._nnz)
+        data = mapped(DATA_FILE, np.float32, self._nnz)
+        self._matrix = csr_matrix((data, indices, indptr), shape=shape, copy=False)
+        self._matrix_shape = shape
+        return self._matrix
+
+    # -- building --------------------------------------------------------
+
+    def rebuild(self) -> int:
+        """Re-index every entry in the journal; returns the number of rows."""
+        with self._lock:
+            self._rebuild()
+            self._loaded = True
+            return self._rows
+
+    def _rebuild(self) -> None:
+        import numpy as np
+
+        vocab: dict[str, int] = {}
+        counts: list[Counter[int]] = []
+        records: list[tuple[str, str, str, str]] = []
+        for day, time_label, text in iter_journal_entries(self.journal_dir):
+            counter = Counter(vocab.setdefault(token, len(vocab)) for token in tokenize(text))
+            counts.append(counter)
+            records.append((day.isoformat(), time_label, _snippet(text), _digest(text)))
+
+        df = np.zeros(len(vocab), dtype=np.int32)
+        for counter in counts:
+            df[list(counter)] += 1
+        idf = _idf(df, len(counts))
+
+        staging = self.index_dir.with_name(f"{self.index_dir.name}.new")
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        nnz = 0
+        with (
+            (staging / INDPTR_FILE).open("wb") as indptr_file,
+            (staging / INDICES_FILE).open("wb") as indices_file,
+            (staging / DATA_FILE).open("wb") as data_file,
+        ):
+            np.array([0], dtype=np.int32).tofile(indptr_file)
+            for counter in counts:
+                indices, data = self._weigh(counter, idf)
+                indices.tofile(indices_file)
+                data.tofile(data_file)
+                nnz += len(indices)
+                np.array([nnz], dtype=np.int32).tofile(indptr_file)
+        df.tofile(staging / DF_FILE)
+        (staging / VOCAB_FILE).write_text(
+            "".join(f"{term}\n" for term in vocab), encoding="utf-8"
+        )
+        (staging / ENTRIES_FILE).write_text(
+            "".join(self._entry_line(*record) for record in records), encoding="utf-8"
+        )
+
+        self._rows, self._nnz = len(counts), nnz
+        self._vocab, self._df = vocab, df
+        self._entries = [record[:3] for record in records]
+        self._digests = [record[3] for record in records]
+        self._removed = []
+        self._keys = None
+        self._write_meta(staging)
+
+        self._matrix = None
+        self._matrix_shape = None
+        shutil.rmtree(self.index_dir, ignore_errors=True)
+        staging.rename(self.index_dir)
+        # The default location is inside the journal repo; keep it out of git.
+        (self.index_dir / ".gitignore").write_text("*\n")
+        logger.info("Related-entries index rebuilt: %d entries, %d terms", len(counts), len(vocab))
+
+    @staticmethod
+    def _weigh(counter: Counter[int], idf: Any) -> tuple[Any, Any]:
+        import numpy as np
+
+        indices = np.fromiter(sorted(counter), dtype=np.int32, count=len(counter))
+        tf = np.array([1 + math.log(counter[int(i)]) for i in indices], dtype=np.float32)
+        weights = tf * idf[indices] if len(indices) else tf
+        norm = float(np.linalg.norm(weights))
+        if norm:
+            weights /= norm
+        return indices, weights.astype(np.float32)
+
+    def add(self, day: date, time_label: str, text: str) -> None:
+        """Append one entry as a new row (called right after ``append_entry``).
+
+        An entry that is already indexed is skipped: when this call builds
+        the index, the rebuild has read the entry from its note already.
+        """
+        import numpy as np
+
+        with self._lock:
+            self._ensure_loaded()
+            record = (day.isoformat(), time_label, _snippet(text), _digest(text))
+            key = (record[0], record[1], record[3])
+            if key in self._indexed_keys():
+                return
+            counter: Counter[int] = Counter()
+            new_terms: list[str] = []
+            for token in tokenize(text):
+                term_id = self._vocab.get(token)
+                if term_id is None:
+                    term_id = len(self._vocab)
+                    self._vocab[token] = term_id
+                    new_terms.append(token)
+                counter[term_id] += 1
+
+            if new_terms:
+                self._df = np.concatenate(
+                    [self._df, np.zeros(len(new_terms), dtype=np.int32)]
+                )
+            if counter:
+                self._df[list(counter)] += 1
+            indices, data = self._weigh(counter, _idf(self._df, self._live_rows() + 1))
+
+            with self._path(INDICES_FILE).open("ab") as file:
+                indices.tofile(file)
+            with self._path(DATA_FILE).open("ab") as file:
+                data.tofile(file)
+            with self._path(INDPTR_FILE).open("ab") as file:
+                np.array([self._nnz + len(indices)], dtype=np.int32).tofile(file)
+            if new_terms:
+                with self._path(VOCAB_FILE).open("a", encoding="utf-8") as file:
+                    file.write("".join(f"{term}\n" for term in new_terms))
+            with self._path(ENTRIES_FILE).open("a", encoding="utf-8") as file:
+                file.write(self._entry_line(*record))
+            tmp_df = self._path(f"{DF_FILE}.tmp")
+            self._df.tofile(tmp_df)
+            os.replace(tmp_df, self._path(DF_FILE))
+
+            self._rows += 1
+            self._nnz += len(indices)
+            self._entries.append(record[:3])
+            self._digests.append(record[3])
+            self._keys.add(key)
+            self._write_meta()
+
+    def remove(self, day: date, time_label: str, text: str) -> bool:
+        """Drop an edited or deleted entry; False if it is not indexed."""
+        import numpy as np
+
+        with self._lock:
+            self._ensure_loaded()
+            key = (day.isoformat(), time_label)
+            digest = _digest(text)
+            removed = set(self._removed)
+            row = next(
+                (
+                    row
+                    for row in range(self._rows - 1, -1, -1)
+                    if row not in removed
+                    and self._digests[row] == digest
+                    and self._entries[row][:2] == key
+                ),
+                None,
+            )
+            if row is None:
+                return False
+            matrix = self._open_matrix()
+            start, end = int(matrix.indptr[row]), int(matrix.indptr[row + 1])
+            self._df[np.asarray(matrix.indices[start:end])] -= 1
+
+            with self._path(REMOVED_FILE).open("ab") as file:
+                np.array([row], dtype=np.int32).tofile(file)
+            tmp_df = self._path(f"{DF_FILE}.tmp")
+            self._df.tofile(tmp_df)
+            os.replace(tmp_df, self._path(DF_FILE))
+            self._removed.append(row)
+            self._indexed_keys().discard((*key, digest))
+            self._write_meta()
+            return True
+
+    def _indexed_keys(self) -> set[tuple[str, str, str]]:
+        if self._keys is None:
+            removed = set(self._removed)
+            self._keys = {
+                (day, time_label, digest)
+                for row, ((day, time_label, _), digest) in enumerate(
+                    zip(self._entries, self._digests)
+                )
+                if row not in removed
+            }
+        return self._keys
+
+    def _live_rows(self) -> int:
+        return self._rows - len(self._removed)
+
+    # -- querying --------------------------------------------------------
+
+    def similar(self, text: str, limit: int = 5) -> list[RelatedEntry]:
+        """Entries most similar to ``text``, excluding identical entries."""
+        import numpy as np
+
+        with self._lock:
+            self._ensure_loaded()
+            counts = Counter(
+                self._vocab[token] for token in tokenize(text) if token in self._vocab
+            )
+            if not counts:
+                return []
+            idf = _idf(self._df, self._live_rows())
+            query = np.zeros(len(self._vocab), dtype=np.float32)
+            for term_id, count in counts.items():
+                query[term_id] = (1 + math.log(count)) * idf[term_id]
+            query /= np.linalg.norm(query) or 1.0
+            return self._rank(query, limit, exclude_digest=_digest(text))
+
+    def similar_to_row(self, row: int, limit: int = 5) -> list[RelatedEntry]:
+        """Entries most similar to an already indexed one (``-1`` = newest)."""
+        import numpy as np
+
+        with self._lock:
+            self._ensure_loaded()
+            matrix = self._open_matrix()
+            if matrix is None:
+                return []
+            row = row % self._rows
+            removed = set(self._removed)
+            while row in removed and row > 0:
+                row -= 1  # the newest entry still in the journal
+            if row in removed:
+                return []
+            start, end = int(matrix.indptr[row]), int(matrix.indptr[row + 1])
+            query = np.zeros(len(self._vocab), dtype=np.float32)
+            query[matrix.indices[start:end]] = matrix.data[start:end]
+            return self._rank(query, limit, exclude_digest=self._digests[row])
+
+    def _rank(self, query: Any, limit: int, exclude_digest: str) -> list[RelatedEntry]:
+        import numpy as np
+
+        matrix = self._open_matrix()
+        if matrix is None:
+            return []
+        scores = np.asarray(matrix @ query).ravel()
+        if self._removed:
+            scores[self._removed] = 0
+        candidates = min(len(scores), limit * 2 + 1)
+        top = np.argpartition(scores, -candidates)[-candidates:]
+        results: list[RelatedEntry] = []
+        for row in top[np.argsort(scores[top])[::-1]]:
+            score = float(scores[row])
+            if score <= 0 or len(results) >= limit:
+                break
+            if self._digests[row] == exclude_digest:
+                continue
+            day, time_label, snippet = self._entries[row]
+            results.append(
+                RelatedEntry(date.fromisoformat(day), time_label, snippet, score)
+            )
+        return results
@@ -0,0 +1,405 @@
+import asyncio
+import heapq
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field, replace
+from datetime import datetime, time, timedelta
+from pathlib import Path
+from typing import Awaitable, Callable
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from dairy_bot.config import DEFAULT_TZ
+from dairy_bot.services.catch_up import ensure_state_dir
+from dairy_bot.services.storage import notes_with_content
+
+logger = logging.getLogger(__name__)
+
+ALL_WEEKDAYS = frozenset(range(7))
+WORK_WEEKDAYS = frozenset(range(5))
+WEEKDAY_NAMES = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+MAX_REMINDER_TIMES = 12
+# Upper bound for one sleep of the dispatcher loop, so a wall-clock jump
+# (suspend, NTP step) delays a reminder by at most this much.
+MAX_SLEEP = 60.0
+COMPACT_MIN_LINES = 256
+
+Notify = Callable[[int], Awaitable[None]]
+
+
+def parse_time(value: str) -> time:
+    hours, _, minutes = value.strip().partition(":")
+    if not hours.isdigit() or not minutes.isdigit():
+        raise ValueError(f"Not a HH:MM time: {value!r}")
+    return time(int(hours), int(minutes))
+
+
+def parse_times(value: str) -> tuple[time, ...]:
+    """``"09:00, 20:30"`` -> sorted, de-duplicated times."""
+    parts = [part for part in value.replace(",", " ").split() if part]
+    times = tuple(sorted({parse_time(part) for part in parts}))
+    if not times or len(times) > MAX_REMINDER_TIMES:
+        raise ValueError(f"Expected 1-{MAX_REMINDER_TIMES} times, got {value!r}")
+    return times
+
+
+def parse_weekdays(value: str) -> frozenset[int]:
+    """``all``, ``weekdays``, ``weekends`` or a list such as ``mon,wed,fri``."""
+    value = value.strip().lower()
+    if value in ("all", "daily"):
+        return ALL_WEEKDAYS
+    if value == "weekdays":
+        return WORK_WEEKDAYS
+    if value == "weekends":
+        return ALL_WEEKDAYS - WORK_WEEKDAYS
+    days = set()
+    for part in value.replace(",", " ").split():
+        if part[:3] not in WEEKDAY_NAMES:
+            raise ValueError(f"Unknown weekday: {part!r}")
+        days.add(WEEKDAY_NAMES.index(part[:3]))
+    if not days:
+        raise ValueError("No weekdays given")
+    return frozenset(days)
+
+
+def format_weekdays(days: frozenset[int]) -> str:
+    if days == ALL_WEEKDAYS:
+        return "all"
+    if days == WORK_WEEKDAYS:
+        return "weekdays"
+    return ",".join(WEEKDAY_NAMES[day] for day in sorted(days))
+
+
+@dataclass(frozen=True)
+class ReminderSchedule:
+    """When one user wants to be nudged, in their own timezone.
+
+    Reminder times that fall inside the quiet hours are skipped; the quiet
+    window may wrap around midnight (``22:00-07:00``).
+    """
+
+    user_id: int
+    times: tuple[time, ...] = (time(20, 0),)
+    weekdays: frozenset[int] = ALL_WEEKDAYS
+    quiet: tuple[time, time] | None = None
+    timezone: ZoneInfo = field(default=DEFAULT_TZ)
+    enabled: bool = True
+
+    @property
+    def weekdays_label(self) -> str:
+        return format_weekdays(self.weekdays)
+
+    def is_quiet(self, moment: time) -> bool:
+        if self.quiet is None:
+            return False
+        start, end = self.quiet
+        if start <= end:
+            return start <= moment < end
+        return moment >= start or moment < end
+
+    def next_fire(self, after: datetime) -> datetime | None:
+        """First reminder strictly after ``after``, or ``None`` if there is none."""
+        if not self.enabled:
+            return None
+        local = after.astimezone(self.timezone)
+        stamp = after.timestamp()
+        for offset in range(8):
+            day = local.date() + timedelta(days=offset)
+            if day.weekday() not in self.weekdays:
+                continue
+            # Compared as instants: a time skipped by a DST switch lands later
+            # on the wall clock, possibly after the day's next listed time.
+            later = [
+                instant
+                for moment in self.times
+                if not self.is_quiet(moment)
+                and (instant := datetime.combine(day, moment, tzinfo=self.timezone).timestamp())
+                > stamp
+            ]
+            if later:
+                return datetime.fromtimestamp(min(later), self.timezone)
+        return None
+
+    def to_json(self) -> dict:
+        return {
+            "times": [f"{moment:%H:%M}" for moment in self.times],
+            "weekdays": sorted(self.weekdays),
+            "quiet": [f"{moment:%H:%M}" for moment in self.quiet] if self.quiet else None,
+            "timezone": self.timezone.key,
+            "enabled": self.enabled,
+        }
+
+    @classmethod
+    def from_json(cls, user_id: int, raw: dict) -> "ReminderSchedule":
+        quiet = raw.get("quiet")
+        return cls(
+            user_id=user_id,
+            times=tuple(sorted(parse_time(value) for value in raw["times"])),
+            weekdays=frozenset(int(day) for day in raw["weekdays"]),
+            quiet=(parse_time(quiet[0]), parse_time(quiet[1])) if quiet else None,
+            timezone=ZoneInfo(raw["timezone"]),
+            enabled=bool(raw.get("enabled", True)),
+        )
+
+
+def apply_reminder_args(schedule: ReminderSchedule, args: str) -> ReminderSchedule:
+    """Update a schedule from ``/reminders`` arguments; raises ``ValueError``.
+
+    ``on`` / ``off``, ``days <spec>``, ``quiet HH:MM-HH:MM`` / ``quiet off``,
+    ``tz <Area/City>``, or a list of ``HH:MM`` times.
+    """
+    keyword, _, rest = args.strip().partition(" ")
+    keyword = keyword.lower()
+    rest = rest.strip()
+    if keyword in ("on", "off"):
+        return replace(schedule, enabled=keyword == "on")
+    if keyword == "days":
+        return replace(schedule, weekdays=parse_weekdays(rest))
+    if keyword == "quiet":
+        if rest.lower() == "off":
+            return replace(schedule, quiet=None)
+        start, sep, end = rest.partition("-")
+        if not sep:
+            raise ValueError(f"Expected HH:MM-HH:MM, got {rest!r}")
+        return replace(schedule, quiet=(parse_time(start), parse_time(end)))
+    if keyword == "tz":
+        try:
+            return replace(schedule, timezone=ZoneInfo(rest))
+        except (ZoneInfoNotFoundError, ValueError) as exc:
+            raise ValueError(f"Unknown timezone: {rest!r}") from exc
+    return replace(schedule, times=parse_times(args), enabled=True)
+
+
+class ReminderStore:
+    """Schedules plus how far each one has been served, persisted as JSON.
+
+    ``served_until`` is the last reminder moment that was handled (sent, or
+    skipped because the page had content); on restart everything after it
+    is still owed. Progress is appended to a side log, one line per batch,
+    so serving a few reminders never rewrites every schedule; the log is
+    folded back into the snapshot once it outgrows it.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.log_path = self.path.with_suffix(".log")
+        self._lock = threading.Lock()
+        self._schedules: dict[int, ReminderSchedule] = {}
+        self._served: dict[int, datetime] = {}
+        self._log_lines = 0
+        self._load()
+        self._replay_log()
+
+    def _load(self) -> None:
+        try:
+            raw = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable reminder store %s", self.path)
+            return
+        for user, item in raw.get("schedules", {}).items():
+            try:
+                self._schedules[int(user)] = ReminderSchedule.from_json(int(user), item)
+            except (KeyError, TypeError, ValueError, ZoneInfoNotFoundError):
+                logger.warning("Skipping unreadable reminder schedule for %s", user)
+        for user, stamp in raw.get("served_until", {}).items():
+            try:
+                self._served[int(user)] = datetime.fromisoformat(stamp)
+            except (TypeError, ValueError):
+                continue
+
+    def _replay_log(self) -> None:
+        try:
+            lines = self.log_path.read_text().splitlines()
+        except FileNotFoundError:
+            return
+        for line in lines:
+            try:
+                batch = json.loads(line)
+                for user, stamp in batch.items():
+                    self._served[int(user)] = datetime.fromisoformat(stamp)
+            except (TypeError, ValueError, AttributeError):
+                continue  # a torn last line after a crash
+        self._log_lines = len(lines)
+
+    def _save(self) -> None:
+        ensure_state_dir(self.path.parent)
+        payload = {
+            "schedules": {
+                str(user): schedule.to_json() for user, schedule in self._schedules.items()
+            },
+            "served_until": {
+                str(user): moment.isoformat() for user, moment in self._served.items()
+            },
+        }
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(payload))
+        os.replace(tmp, self.path)
+        self.log_path.unlink(missing_ok=True)
+        self._log_lines = 0
+
+    def get(self, user_id: int) -> ReminderSchedule | None:
+        return self._schedules.get(user_id)
+
+    def schedules(self) -> list[ReminderSchedule]:
+        with self._lock:
+            return list(self._schedules.values())
+
+    def served_until(self, user_id: int) -> datetime | None:
+        return self._served.get(user_id)
+
+    def put(self, schedule: ReminderSchedule, now: datetime) -> None:
+        """Store a schedule; reminders before ``now`` are not owed for it."""
+        with self._lock:
+            self._schedules[schedule.user_id] = schedule
+            self._served[schedule.user_id] = max(
+                now, self._served.get(schedule.user_id, now)
+            )
+            self._save()
+
+    def mark_served(self, served: dict[int, datetime]) -> None:
+        """Record a whole batch of handled reminders with a single write."""
+        if not served:
+            return
+        with self._lock:
+            self._served.update(served)
+            if self._log_lines >= max(COMPACT_MIN_LINES, len(self._schedules)):
+                self._save()
+                return
+            ensure_state_dir(self.log_path.parent)
+            line = json.dumps({str(user): moment.isoformat() for user, moment in served.items()})
+            with self.log_path.open("a") as file:
+                file.write(line + "\n")
+            self._log_lines += 1
+
+
+class ReminderDispatcher:
+    """One loop serving every reminder schedule from a timing heap.
+
+    The heap holds ``(due timestamp, user_id, generation)``; each wake-up
+    pops only the entries that are due, so the per-tick cost does not grow
+    with the number of schedules. Replacing a schedule bumps its generation
+    and stale heap entries are dropped when they surface. Everyone due in
+    the same tick is checked against the journal in one batch (one read per
+    distinct local day) and their progress is persisted with one write.
+
+    Reminders missed while the bot was down are sent once on startup if
+    they are from the user's current day; older ones are no longer useful.
+    """
+
+    def __init__(
+        self,
+        store: ReminderStore,
+        journal_dir: Path,
+        clock: Callable[[], datetime] | None = None,
+    ) -> None:
+        self.store = store
+        self.journal_dir = journal_dir
+        self._clock = clock or (lambda: datetime.now(ZoneInfo("UTC")))
+        self._heap: list[tuple[float, int, int]] = []
+        self._generation: dict[int, int] = {}
+        self._wake = asyncio.Event()
+        self._notify: Notify | None = None
+        self._task: asyncio.Task | None = None
+
+    def get(self, user_id: int) -> ReminderSchedule | None:
+        return self.store.get(user_id)
+
+    def next_reminder(self, user_id: int) -> datetime | None:
+        schedule = self.store.get(user_id)
+        return schedule.next_fire(self._clock()) if schedule else None
+
+    def _push(self, schedule: ReminderSchedule, due: datetime | None) -> None:
+        if due is None:
+            return
+        generation = self._generation.get(schedule.user_id, 0)
+        heapq.heappush(self._heap, (due.timestamp(), schedule.user_id, generation))
+
+    def _first_due(self, schedule: ReminderSchedule, now: datetime) -> datetime | None:
+        served = self.store.served_until(schedule.user_id)
+        if served is not None:
+            owed = schedule.next_fire(served)
+            if owed is not None and owed <= now:
+                local_day = now.astimezone(schedule.timezone).date()
+                if owed.astimezone(schedule.timezone).date() == local_day:
+                    return owed
+        return schedule.next_fire(now)
+
+    def start(self, notify: Notify) -> None:
+        self._notify = notify
+        now = self._clock()
+        for schedule in self.store.schedules():
+            self._push(schedule, self._first_due(schedule, now))
+        self._task = asyncio.create_task(self._run(), name="dairy-reminders")
+        logger.info("Reminder dispatcher serving %d schedules", len(self._heap))
+
+    def update(self, schedule: ReminderSchedule) -> None:
+        """Store a new or changed schedule and reschedule it."""
+        now = self._clock()
+        self.store.put(schedule, now)
+        self._generation[schedule.user_id] = self._generation.get(schedule.user_id, 0) + 1
+        self._push(schedule, schedule.next_fire(now))
+        self._wake.set()
+
+    def _pop_due(self, now: datetime) -> list[tuple[ReminderSchedule, datetime]]:
+        due: list[tuple[ReminderSchedule, datetime]] = []
+        stamp = now.timestamp()
+        while self._heap and self._heap[0][0] <= stamp:
+            when, user_id, generation = heapq.heappop(self._heap)
+            schedule = self.store.get(user_id)
+            if schedule is None or generation != self._generation.get(user_id, 0):
+                continue
+            due.append((schedule, datetime.fromtimestamp(when, schedule.timezone)))
+        return due
+
+    async def _fire(self, due: list[tuple[ReminderSchedule, datetime]], now: datetime) -> None:
+        days = {
+            schedule.user_id: now.astimezone(schedule.timezone).date()
+            for schedule, _ in due
+        }
+        written = await asyncio.to_thread(
+            notes_with_content, self.journal_dir, set(days.values())
+        )
+        for schedule, _ in due:
+            if days[schedule.user_id] in written or self._notify is None:
+                continue
+            try:
+                await self._notify(schedule.user_id)
+            except Exception:
+                logger.exception("Sending a reminder to %s failed", schedule.user_id)
+        # Schedules replaced while we were sending were already re-queued.
+        current = [item for item in due if self.store.get(item[0].user_id) is item[0]]
+        await asyncio.to_thread(
+            self.store.mark_served, {schedule.user_id: when for schedule, when in current}
+        )
+        for schedule, _ in current:
+            # Computed from now, so several missed slots collapse into one.
+            self._push(schedule, schedule.next_fire(now))
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            now = self._clock()
+            due = self._pop_due(now)
+            if due:
+                await self._fire(due, now)
+            delay = MAX_SLEEP
+            if self._heap:
+                delay = min(delay, max(0.0, self._heap[0][0] - self._clock().timestamp()))
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def close(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
@@ -1,31 +1,83 @@
+import asyncio
+import logging
+from datetime import datetime
+
 from aiogram import Bot
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 
 from dairy_bot.config import Settings
 from dairy_bot.services.language_store import get_language
-from dairy_bot.services.storage import note_has_content
+from dairy_bot.services.registry import ServiceRegistry
+from dairy_bot.services.related import related_available
+from dairy_bot.services.reminders import ReminderSchedule, parse_times
 from dairy_bot.texts import messages
 
+FULL_MAINTENANCE_WEEKDAY = 6  # Sunday
+
+logger = logging.getLogger(__name__)
 
-def setup_scheduler(bot: Bot, settings: Settings) -> AsyncIOScheduler:
+
+def setup_scheduler(
+    bot: Bot, settings: Settings, services: ServiceRegistry
+) -> AsyncIOScheduler:
     scheduler = AsyncIOScheduler(timezone=settings.timezone)
 
-    async def send_reminder() -> None:
-        lang = get_language(settings.allowed_user_id)
-        has_entry = await note_has_content(
-            settings.journal_dir, timezone=settings.timezone
+    async def run_git_maintenance() -> None:
+        # Runs in a worker thread and outside the journal lock, so saves continue.
+        full = datetime.now(settings.timezone).weekday() == FULL_MAINTENANCE_WEEKDAY
+        await asyncio.to_thread(services.git.run_maintenance, full)
+
+    async def rebuild_related_index() -> None:
+        # Refreshes IDF weights and picks up entries edited outside the bot.
+        if related_available():
+            await asyncio.to_thread(services.related.rebuild)
+
+    if settings.git_enabled and settings.git_maintenance_enabled:
+        scheduler.add_job(
+            run_git_maintenance,
+            trigger=CronTrigger(
+                hour=settings.git_maintenance_hour, minute=30, timezone=settings.timezone
+            ),
+            id="git_maintenance",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+        )
+    if settings.related_enabled:
+        scheduler.add_job(
+            rebuild_related_index,
+            trigger=CronTrigger(
+                hour=settings.git_maintenance_hour, minute=45, timezone=settings.timezone
+            ),
+            id="related_reindex",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
         )
-        if not has_entry:
-            await bot.send_message(
-                chat_id=settings.allowed_user_id,
-                text=messages.t("reminder_message", lang),
-            )
-
-    scheduler.add_job(
-        send_reminder,
-        trigger=CronTrigger(hour=20, minute=0, timezone=settings.timezone),
-        id="daily_reminder",
-        replace_existing=True,
-    )
     return scheduler
+
+
+def default_reminder_schedule(settings: Settings, user_id: int) -> ReminderSchedule:
+    try:
+        times = parse_times(settings.reminder_times)
+    except ValueError:
+        logger.warning("Invalid REMINDER_TIMES %r, using 20:00", settings.reminder_times)
+        times = ReminderSchedule.times
+    return ReminderSchedule(user_id, times=times, timezone=settings.timezone)
+
+
+def start_reminders(settings: Settings, services: ServiceRegistry) -> None:
+    """Start the reminder loop, seeding the owner's schedule on first run."""
+
+    async def send_reminder(user_id: int) -> None:
+        await services.send_queue.send(
+            user_id, messages.t("reminder_message", get_language(user_id))
+        )
+
+    reminders = services.reminders
+    if reminders.get(settings.allowed_user_id) is None:
+        reminders.update(
+            default_reminder_schedule(settings, settings.allowed_user_id)
+        )
+    reminders.start(send_reminder)
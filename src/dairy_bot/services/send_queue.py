@@ -0,0 +1,275 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter
+from aiogram.types import Message
+
+logger = logging.getLogger(__name__)
+
+MAX_MERGED_LEN = 4000
+MERGE_SEPARATOR = "\n\n"
+# Telegram's documented limits: ~1 msg/s per private chat, 20 msg/min per group,
+# ~30 msg/s overall. Small bursts are tolerated, so buckets allow a few at once.
+PRIVATE_CHAT_RATE = 1.0
+PRIVATE_CHAT_BURST = 3
+GROUP_CHAT_RATE = 20 / 60
+GROUP_CHAT_BURST = 3
+GLOBAL_RATE = 30.0
+GLOBAL_BURST = 30
+MAX_NETWORK_RETRIES = 4
+MAX_FLOOD_RETRIES = 10
+
+
+class RateLimiter:
+    """Async token bucket; ``pause`` blocks it entirely for a flood-wait period."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float) -> None:
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+@dataclass
+class _Outgoing:
+    chat_id: int
+    text: str
+    kwargs: dict[str, Any]
+    merge: bool
+    futures: list[asyncio.Future] = field(default_factory=list)
+    # For edits: the future of the send that created the edited message.
+    target: asyncio.Future | None = None
+
+
+def _chain(source: asyncio.Future, future: asyncio.Future) -> None:
+    if future.done():
+        return
+    if source.cancelled():
+        future.cancel()
+    elif source.exception() is not None:
+        future.set_exception(source.exception())
+    else:
+        future.set_result(source.result())
+
+
+def _mergeable(item: _Outgoing) -> bool:
+    # Keyboard callbacks edit or delete their message, which must not carry
+    # text merged in from other sends.
+    return item.merge and "reply_markup" not in item.kwargs
+
+
+class SendQueue:
+    """Central outbound queue for ``sendMessage`` and ``editMessageText``.
+
+    Messages for one chat are delivered strictly in order by a per-chat worker
+    that respects per-chat and global rate limits, sleeps through flood-wait
+    (``RetryAfter``) responses, retries transient network errors and merges
+    adjacent short messages into a single request.
+
+    Every future of a merged batch resolves to the same ``Message``, so a
+    message the caller edits or deletes later must be sent with
+    ``merge=False``. Messages with a keyboard are never merged, since their
+    callbacks edit or delete them.
+
+    Edits share the chat's order and rate limits. An edit of a message that
+    is still queued rewrites it, and an edit that is still queued is
+    replaced by a newer one, so stale progress text costs no requests.
+    """
+
+    def __init__(self, bot: Bot) -> None:
+        self.bot = bot
+        self._pending: dict[int, deque[_Outgoing]] = {}
+        self._workers: dict[int, asyncio.Task] = {}
+        self._chat_limiters: dict[int, RateLimiter] = {}
+        self._global_limiter = RateLimiter(GLOBAL_RATE, GLOBAL_BURST)
+
+    def submit(
+        self, chat_id: int, text: str, *, merge: bool = True, **kwargs: Any
+    ) -> asyncio.Future:
+        """Queue a message and return a future resolved with the sent ``Message``.
+
+        Pass ``merge=False`` when the returned message will be edited.
+        """
+        loop = asyncio.get_running_loop()
+        item = _Outgoing(chat_id, text, kwargs, merge, [loop.create_future()])
+        return self._enqueue(item)
+
+    def submit_edit(
+        self, chat_id: int, target: asyncio.Future, text: str, **kwargs: Any
+    ) -> asyncio.Future:
+        """Queue an edit of the message ``target`` (a ``submit`` future) resolves to.
+
+        The edit is delivered after the send it refers to, even if that is
+        still queued.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        for queued in reversed(self._pending.get(chat_id, ())):
+            if queued.target is target:
+                queued.text, queued.kwargs = text, kwargs
+                queued.futures.append(future)
+                return future
+            if queued.target is None and queued.futures == [target] and not queued.merge:
+                # Not sent yet: send the new text right away instead.
+                queued.text = text
+                queued.kwargs = {
+                    **{key: value for key, value in queued.kwargs.items() if key != "reply_markup"},
+                    **kwargs,
+                }
+                target.add_done_callback(lambda sent: _chain(sent, future))
+                return future
+        return self._enqueue(_Outgoing(chat_id, text, kwargs, False, [future], target))
+
+    def _enqueue(self, item: _Outgoing) -> asyncio.Future:
+        self._pending.setdefault(item.chat_id, deque()).append(item)
+        worker = self._workers.get(item.chat_id)
+        if worker is None or worker.done():
+            self._workers[item.chat_id] = asyncio.create_task(self._drain(item.chat_id))
+        return item.futures[0]
+
+    async def send(
+        self, chat_id: int, text: str, *, merge: bool = True, **kwargs: Any
+    ) -> Message:
+        """Queue a message and wait until Telegram has accepted it."""
+        return await self.submit(chat_id, text, merge=merge, **kwargs)
+
+    async def send_many(self, chat_id: int, texts: list[str], **kwargs: Any) -> None:
+        """Queue several messages at once and wait for all of them, in order."""
+        futures = [self.submit(chat_id, text, **kwargs) for text in texts]
+        await asyncio.gather(*futures)
+
+    async def close(self) -> None:
+        """Deliver what is already queued, then stop the workers."""
+        workers = [task for task in self._workers.values() if not task.done()]
+        if workers:
+            await asyncio.gather(*workers, return_exceptions=True)
+        self._workers.clear()
+
+    def _limiter_for(self, chat_id: int) -> RateLimiter:
+        limiter = self._chat_limiters.get(chat_id)
+        if limiter is None:
+            if chat_id < 0:
+                limiter = RateLimiter(GROUP_CHAT_RATE, GROUP_CHAT_BURST)
+            else:
+                limiter = RateLimiter(PRIVATE_CHAT_RATE, PRIVATE_CHAT_BURST)
+            self._chat_limiters[chat_id] = limiter
+        return limiter
+
+    def _next_batch(self, queue: deque[_Outgoing]) -> _Outgoing:
+        head = queue.popleft()
+        if head.target is not None:
+            while queue and queue[0].target is head.target:
+                newer = queue.popleft()
+                newer.futures[:0] = head.futures
+                head = newer
+            return head
+        if not _mergeable(head):
+            return head
+        while queue:
+            candidate = queue[0]
+            merged_len = len(head.text) + len(MERGE_SEPARATOR) + len(candidate.text)
+            if (
+                not _mergeable(candidate)
+                or merged_len > MAX_MERGED_LEN
+                or candidate.kwargs != head.kwargs
+            ):
+                break
+            queue.popleft()
+            head = _Outgoing(
+                head.chat_id,
+                head.text + MERGE_SEPARATOR + candidate.text,
+                dict(head.kwargs),
+                True,
+                head.futures + candidate.futures,
+            )
+        return head
+
+    async def _drain(self, chat_id: int) -> None:
+        queue = self._pending[chat_id]
+        limiter = self._limiter_for(chat_id)
+        while queue:
+            # Wait for the rate limit before picking the batch: messages and
+            # edits queued meanwhile still merge into it.
+            await limiter.acquire()
+            await self._global_limiter.acquire()
+            batch = self._next_batch(queue)
+            try:
+                result = await self._deliver(batch, limiter)
+            except Exception as exc:
+                for future in batch.futures:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            for future in batch.futures:
+                if not future.done():
+                    future.set_result(result)
+        self._pending.pop(chat_id, None)
+
+    async def _deliver(self, batch: _Outgoing, limiter: RateLimiter) -> Message | bool:
+        network_failures = 0
+        flood_waits = 0
+        if batch.target is not None:
+            # Queued earlier in this chat, so normally delivered already.
+            edited: Message = await batch.target
+        while True:
+            try:
+                if batch.target is not None:
+                    return await self.bot.edit_message_text(
+                        text=batch.text,
+                        chat_id=batch.chat_id,
+                        message_id=edited.message_id,
+                        **batch.kwargs,
+                    )
+                return await self.bot.send_message(
+                    chat_id=batch.chat_id, text=batch.text, **batch.kwargs
+                )
+            except TelegramRetryAfter as exc:
+                flood_waits += 1
+                if flood_waits > MAX_FLOOD_RETRIES:
+                    raise
+                logger.warning(
+                    "Flood control for chat %s, retrying in %ss",
+                    batch.chat_id,
+                    exc.retry_after,
+                )
+                limiter.pause(exc.retry_after)
+            except TelegramNetworkError:
+                network_failures += 1
+                if network_failures > MAX_NETWORK_RETRIES:
+                    raise
+                delay = 2 ** (network_failures - 1)
+                logger.warning(
+                    "Telegram network error for chat %s, retrying in %ss",
+                    batch.chat_id,
+                    delay,
+                )
+                await asyncio.sleep(delay)
+            await limiter.acquire()
+            await self._global_limiter.acquire()
@@ -1,14 +1,17 @@
 import asyncio
 import re
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from pathlib import Path
+from typing import Iterable, Sequence
 from zoneinfo import ZoneInfo
 
 import aiofiles
 
 from dairy_bot.config import DEFAULT_TZ
+from dairy_bot.services.merge_driver import merge_blocks, split_note
 
 DATE_HEADER_RE = re.compile(r"^#\s+\d{4}-\d{2}-\d{2}\s*$")
+NOTE_NAME_RE = re.compile(r"^\d{4}-\d{2}-\d{2}\.md$")
 
 
 def _now(moment: datetime | None = None, timezone: ZoneInfo | None = None) -> datetime:
@@ -203,6 +206,34 @@ async def append_entry(
     return note_path
 
 
+async def append_entries(
+    journal_dir: Path,
+    entries: Sequence[tuple[datetime, str]],
+    timezone: ZoneInfo | None = None,
+) -> list[Path]:
+    """Append many ``(moment, content)`` entries with a single write per daily note.
+
+    Templates and neighbour nav links are handled once per day rather than once
+    per entry. Returns the notes that were written.
+    """
+    by_note: dict[Path, list[tuple[datetime, str]]] = {}
+    for moment, content in sorted(entries, key=lambda item: item[0]):
+        current = _now(moment, timezone)
+        note_path = daily_note_path(journal_dir, current, timezone)
+        by_note.setdefault(note_path, []).append((current, content.strip()))
+
+    for note_path, items in by_note.items():
+        first = items[0][0]
+        await _ensure_daily_template(journal_dir, note_path, first)
+        await _update_neighbor_nav(journal_dir, first)
+        payload = "".join(
+            f"## {current:%H:%M}\n\n{content}\n\n" for current, content in items
+        )
+        async with aiofiles.open(note_path, "a", encoding="utf-8") as file:
+            await file.write(payload)
+    return list(by_note)
+
+
 async def note_has_content(
     journal_dir: Path,
     moment: datetime | None = None,
@@ -219,6 +250,106 @@ async def note_has_content(
     return _has_real_content(content)
 
 
+def _note_path_for_date(journal_dir: Path, day: date) -> Path:
+    return journal_dir / f"{day:%Y}" / f"{day:%m}" / f"{day:%Y-%m-%d}.md"
+
+
+def existing_note_days(journal_dir: Path) -> set[date]:
+    """Days that already have a daily note, from one directory walk."""
+    days: set[date] = set()
+    for note_path in journal_dir.glob("[0-9][0-9][0-9][0-9]/[0-9][0-9]/*.md"):
+        if NOTE_NAME_RE.match(note_path.name):
+            try:
+                days.add(date.fromisoformat(note_path.stem))
+            except ValueError:
+                continue
+    return days
+
+
+def _with_nav_line(preamble: str, date_label: str, nav_line: str) -> str:
+    lines = preamble.splitlines()
+    if not lines or not lines[0].strip():
+        return f"# {date_label}\n{nav_line}\n\n"
+    if not _looks_like_date_header(lines[0]):
+        return preamble
+    if len(lines) > 1 and _looks_like_nav_line(lines[1]):
+        lines[1] = nav_line
+    else:
+        lines.insert(1, nav_line)
+    text = "\n".join(lines) + "\n"
+    return text if text.endswith("\n\n") else text + "\n"
+
+
+def write_notes(
+    journal_dir: Path,
+    entries: Sequence[tuple[datetime, str]],
+    timezone: ZoneInfo | None = None,
+) -> list[Path]:
+    """Write many entries, possibly spanning years, touching each note once (blocking).
+
+    Nav lines of the new days and of their existing neighbours are computed
+    from one sorted list of days instead of probing the calendar day by day.
+    Entries are merged into existing notes by ``## HH:MM`` block and in time
+    order; blocks already present are not added again, so re-running the
+    same batch is harmless. Returns every note the batch touched, including
+    ones that were already up to date, so the caller can stage all of them
+    even when an interrupted earlier run wrote some.
+    """
+    by_day: dict[date, list[str]] = {}
+    for moment, content in sorted(entries, key=lambda item: item[0]):
+        current = _now(moment, timezone)
+        by_day.setdefault(current.date(), []).append(
+            f"## {current:%H:%M}\n\n{content.strip()}\n\n"
+        )
+    existing = existing_note_days(journal_dir)
+    days = sorted(existing | by_day.keys())
+    position = {day: index for index, day in enumerate(days)}
+    touched = set(by_day)
+    for day in by_day:
+        index = position[day]
+        for neighbour in days[max(0, index - 1) : index + 2]:
+            if neighbour in existing:
+                touched.add(neighbour)
+
+    note_paths: list[Path] = []
+    for day in sorted(touched):
+        index = position[day]
+        nav_line = _build_nav_line(
+            f"{days[index - 1]:%Y-%m-%d}" if index > 0 else None,
+            f"{days[index + 1]:%Y-%m-%d}" if index + 1 < len(days) else None,
+        )
+        note_path = _note_path_for_date(journal_dir, day)
+        try:
+            text = note_path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            text = ""
+        preamble, blocks = split_note(text)
+        preamble = _with_nav_line(preamble, f"{day:%Y-%m-%d}", nav_line)
+        if day in by_day:
+            blocks = merge_blocks([], blocks, by_day[day])
+        updated = preamble + "".join(blocks)
+        note_paths.append(note_path)
+        if updated == text:
+            continue
+        note_path.parent.mkdir(parents=True, exist_ok=True)
+        note_path.write_text(updated, encoding="utf-8")
+    return note_paths
+
+
+def notes_with_content(journal_dir: Path, days: Iterable[date]) -> set[date]:
+    """Which of ``days`` already have a non-empty daily note (blocking)."""
+    written: set[date] = set()
+    for day in days:
+        note_path = _note_path_for_date(journal_dir, day)
+        try:
+            content = note_path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            continue
+        if _has_real_content(content):
+            written.add(day)
+    return written
+
+
 async def read_daily_note(
     journal_dir: Path,
     moment: datetime | None = None,
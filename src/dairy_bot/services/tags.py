@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import threading
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable
+
+from dairy_bot.services.catch_up import ensure_state_dir
+from dairy_bot.services.entry_index import ENTRY_HEADER_RE, entry_check
+
+if TYPE_CHECKING:
+    from dairy_bot.services.git_sync import GitService
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 2
+NOTE_PATH_RE = re.compile(r"^\d{4}/\d{2}/(\d{4}-\d{2}-\d{2})\.md$")
+# Obsidian tags start after whitespace and may nest with "/" (#work/meetings).
+TAG_RE = re.compile(r"(?<!\S)#([\w/-]*[^\W\d][\w/-]*)")
+# Embeds (![[...]]) are attachments, not references to other notes.
+LINK_RE = re.compile(r"(?<!!)\[\[([^\[\]|#]+)(?:#[^\[\]|]*)?(?:\|[^\[\]]*)?\]\]")
+FENCE_RE = re.compile(r"^\s*(```|~~~)", re.MULTILINE)
+SNIPPET_LEN = 80
+SNAPSHOT_FILE = "tags.json"
+LOG_FILE = "tags.log"
+COMPACT_MIN_LINES = 512
+
+TAG_PREFIX = "#"
+LINK_PREFIX = "[["
+
+# (number, "HH:MM", snippet, keys, entry_check)
+IndexedEntry = tuple[int, str, str, tuple[str, ...], str]
+
+
+def normalize_tag(tag: str) -> str:
+    return tag.strip().lstrip("#").strip("/").lower()
+
+
+def normalize_link(target: str) -> str:
+    """``[[Folder/Note.md|alias]]`` and ``note`` both become ``note``."""
+    target = target.strip().removeprefix("[[").removesuffix("]]")
+    target = target.split("|", 1)[0].split("#", 1)[0].strip()
+    target = target.rsplit("/", 1)[-1]
+    if target.lower().endswith(".md"):
+        target = target[:-3]
+    return target.strip().lower()
+
+
+def _strip_code(text: str) -> str:
+    """Drop fenced code blocks, where ``#`` is rarely a tag."""
+    parts = FENCE_RE.split(text)
+    if len(parts) < 3:
+        return text
+    kept, inside = [parts[0]], False
+    for index in range(1, len(parts), 2):
+        inside = not inside
+        if not inside:
+            kept.append(parts[index + 1])
+    return "\n".join(kept)
+
+
+def entry_keys(body: str) -> tuple[str, ...]:
+    """Index keys of one entry: ``#tag`` and ``[[target`` strings."""
+    text = _strip_code(body)
+    keys = {TAG_PREFIX + normalize_tag(tag) for tag in TAG_RE.findall(text)}
+    keys.update(LINK_PREFIX + normalize_link(link) for link in LINK_RE.findall(text))
+    keys.discard(TAG_PREFIX)
+    keys.discard(LINK_PREFIX)
+    return tuple(sorted(keys))
+
+
+def _snippet(body: str) -> str:
+    flat = " ".join(LINK_RE.sub(lambda match: match.group(1), body).split())
+    return flat if len(flat) <= SNIPPET_LEN else flat[: SNIPPET_LEN - 1] + "…"
+
+
+def scan_note(data: bytes) -> list[IndexedEntry]:
+    """Tagged or linking entries of a daily note, numbered like ``/entries``."""
+    headers = list(ENTRY_HEADER_RE.finditer(data))
+    entries: list[IndexedEntry] = []
+    for index, match in enumerate(headers):
+        end = headers[index + 1].start() if index + 1 < len(headers) else len(data)
+        body = data[match.end() : end].decode("utf-8", errors="replace").strip()
+        keys = entry_keys(body)
+        if keys:
+            time_label = match.group(1).decode()
+            entries.append(
+                (index + 1, time_label, _snippet(body), keys, entry_check(time_label, body))
+            )
+    return entries
+
+
+@dataclass(frozen=True)
+class TaggedEntry:
+    day: date
+    number: int
+    time_label: str
+    snippet: str
+    check: str
+
+
+class TagIndex:
+    """Inverted index from ``#tags`` and ``[[link]]`` targets to journal entries.
+
+    Each key maps to the sorted list of daily notes (``YYYY/MM/YYYY-MM-DD.md``,
+    so sorting by path is sorting by day) that mention it, plus an entry
+    count, so a page of results walks only the notes it shows. A saved entry
+    re-scans just its own note; a pull re-scans the notes in the git diff.
+
+    Persistence is a JSON snapshot plus an append-only log with one line per
+    re-scanned note; the log is folded into the snapshot once it outgrows
+    it. The snapshot remembers the commit it reflects, so on start only the
+    notes changed since then (``git diff``) are read again.
+    """
+
+    def __init__(self, index_dir: Path, journal_dir: Path) -> None:
+        self.index_dir = Path(index_dir)
+        self.journal_dir = Path(journal_dir)
+        self.head: str | None = None
+        self._lock = threading.RLock()
+        self._notes: dict[str, list[IndexedEntry]] = {}
+        self._postings: dict[str, list[str]] = {}
+        self._counts: dict[str, int] = {}
+        self._log_lines = 0
+
+    @property
+    def snapshot_path(self) -> Path:
+        return self.index_dir / SNAPSHOT_FILE
+
+    @property
+    def log_path(self) -> Path:
+        return self.index_dir / LOG_FILE
+
+    def open(self, git: GitService | None = None) -> None:
+        """Load the persisted index and catch up with commits made since."""
+        head = git.head() if git is not None else None
+        with self._lock:
+            if not self._load():
+                self.rebuild(head)
+                return
+            if head is None or head == self.head:
+                return
+            changed = git.changed_files(self.head, head) if self.head else None
+            self.apply_changes(changed, head)
+
+    def _load(self) -> bool:
+        try:
+            raw = json.loads(self.snapshot_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError):
+            logger.warning("Tag index snapshot unreadable, rebuilding")
+            return False
+        if raw.get("version") != INDEX_VERSION:
+            return False
+        self.head = raw.get("head")
+        for path, entries in raw.get("notes", {}).items():
+            self._set_note(path, [_entry_from_json(item) for item in entries])
+        try:
+            lines = self.log_path.read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            lines = []
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # a torn last line after a crash
+            if "path" in record:
+                self._set_note(
+                    record["path"], [_entry_from_json(item) for item in record["entries"]]
+                )
+            if "head" in record:
+                self.head = record["head"]
+        self._log_lines = len(lines)
+        return True
+
+    def rebuild(self, head: str | None = None) -> None:
+        """Scan every daily note and write a fresh snapshot."""
+        with self._lock:
+            self._notes.clear()
+            self._postings.clear()
+            self._counts.clear()
+            notes = self.journal_dir.glob("[0-9][0-9][0-9][0-9]/[0-9][0-9]/*.md")
+            for note_path in sorted(notes):
+                path = note_path.relative_to(self.journal_dir).as_posix()
+                if NOTE_PATH_RE.match(path):
+                    self._set_note(path, self._scan_file(note_path))
+            self.head = head
+            self._save_snapshot()
+        logger.info(
+            "Tag index rebuilt: %d notes, %d keys", len(self._notes), len(self._postings)
+        )
+
+    def update_note(self, note_path: Path) -> None:
+        """Re-scan one daily note after it was written."""
+        path = note_path.resolve().relative_to(self.journal_dir.resolve()).as_posix()
+        if NOTE_PATH_RE.match(path):
+            self._update([path])
+
+    def apply_changes(self, paths: Iterable[str] | None, head: str | None = None) -> None:
+        """Re-scan the daily notes among ``paths`` (relative, as from ``git diff``).
+
+        ``None`` means the changes are unknown and everything is re-scanned.
+        """
+        if paths is None:
+            self.rebuild(head)
+            return
+        self._update([path for path in paths if NOTE_PATH_RE.match(path)], head)
+
+    def _update(self, paths: list[str], head: str | None = None) -> None:
+        with self._lock:
+            records: list[dict] = []
+            for path in paths:
+                entries = self._scan_file(self.journal_dir / path)
+                if entries == self._notes.get(path, []):
+                    continue
+                self._set_note(path, entries)
+                records.append({"path": path, "entries": entries})
+            if head is not None:
+                self.head = head
+                if records:
+                    records[-1]["head"] = head
+                else:
+                    records.append({"head": head})
+            if records:
+                self._append_log(records)
+
+    def _scan_file(self, note_path: Path) -> list[IndexedEntry]:
+        try:
+            return scan_note(note_path.read_bytes())
+        except FileNotFoundError:
+            return []
+
+    def _set_note(self, path: str, entries: list[IndexedEntry]) -> None:
+        old = self._notes.pop(path, [])
+        old_keys = {key for entry in old for key in entry[3]}
+        new_keys = {key for entry in entries for key in entry[3]}
+        for entry in old:
+            for key in entry[3]:
+                self._counts[key] -= 1
+        for entry in entries:
+            for key in entry[3]:
+                self._counts[key] = self._counts.get(key, 0) + 1
+        for key in old_keys - new_keys:
+            paths = self._postings[key]
+            del paths[bisect_left(paths, path)]
+            if not paths:
+                del self._postings[key]
+                del self._counts[key]
+        for key in new_keys - old_keys:
+            insort(self._postings.setdefault(key, []), path)
+        if entries:
+            self._notes[path] = entries
+
+    def _save_snapshot(self) -> None:
+        ensure_state_dir(self.index_dir)
+        payload = {"version": INDEX_VERSION, "head": self.head, "notes": self._notes}
+        tmp = self.snapshot_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.snapshot_path)
+        self.log_path.unlink(missing_ok=True)
+        self._log_lines = 0
+
+    def _append_log(self, records: list[dict]) -> None:
+        if self._log_lines + len(records) > max(COMPACT_MIN_LINES, len(self._notes)):
+            self._save_snapshot()
+            return
+        ensure_state_dir(self.index_dir)
+        with self.log_path.open("a", encoding="utf-8") as file:
+            for record in records:
+                file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._log_lines += len(records)
+
+    def count(self, key: str) -> int:
+        return self._counts.get(key, 0)
+
+    def query(self, key: str, offset: int = 0, limit: int = 10) -> list[TaggedEntry]:
+        """Entries carrying ``key`` (``#tag`` or ``[[note``), newest first."""
+        results: list[TaggedEntry] = []
+        skipped = 0
+        with self._lock:
+            for path in reversed(self._postings.get(key, ())):
+                entries = [entry for entry in self._notes[path] if key in entry[3]]
+                if skipped + len(entries) <= offset:
+                    skipped += len(entries)
+                    continue
+                day = date.fromisoformat(NOTE_PATH_RE.match(path).group(1))
+                for number, time_label, snippet, _, check in reversed(entries):
+                    if skipped < offset:
+                        skipped += 1
+                        continue
+                    results.append(TaggedEntry(day, number, time_label, snippet, check))
+                    if len(results) == limit:
+                        return results
+        return results
+
+    def top_tags(self, limit: int = 30) -> list[tuple[str, int]]:
+        with self._lock:
+            tags = [(key, count) for key, count in self._counts.items() if key[0] == "#"]
+        tags.sort(key=lambda item: (-item[1], item[0]))
+        return [(key[1:], count) for key, count in tags[:limit]]
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "notes": len(self._notes),
+                "keys": len(self._postings),
+                "postings": sum(len(paths) for paths in self._postings.values()),
+            }
+
+
+def _entry_from_json(item: list) -> IndexedEntry:
+    number, time_label, snippet, keys, check = item
+    return int(number), str(time_label), str(snippet), tuple(keys), str(check)
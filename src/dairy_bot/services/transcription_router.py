@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import statistics
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+from dairy_bot.config import Settings, TranscriptionBackend
+from dairy_bot.services.ai_service import request_transcription
+
+logger = logging.getLogger(__name__)
+
+STATS_WINDOW = 50
+MIN_SAMPLES_FOR_P95 = 5
+UNHEALTHY_ERROR_RATE = 0.5
+UNHEALTHY_COOLDOWN = 60.0
+STATS_LOG_EVERY = 50  # requests between two stats log lines
+
+
+class BackendStats:
+    """Rolling latency and error-rate window for one backend."""
+
+    def __init__(self, window: int = STATS_WINDOW) -> None:
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.outcomes: deque[bool] = deque(maxlen=window)
+        self.last_failure = 0.0
+
+    def record_success(self, latency: float) -> None:
+        self.latencies.append(latency)
+        self.outcomes.append(True)
+
+    def record_cancelled(self, elapsed: float) -> None:
+        """A hedged loser took at least ``elapsed``; keep that as a lower bound."""
+        self.latencies.append(elapsed)
+
+    def record_failure(self) -> None:
+        self.outcomes.append(False)
+        self.last_failure = time.monotonic()
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    @property
+    def healthy(self) -> bool:
+        # An unhealthy backend gets probed again once the cooldown has passed.
+        if self.error_rate < UNHEALTHY_ERROR_RATE:
+            return True
+        return time.monotonic() - self.last_failure > UNHEALTHY_COOLDOWN
+
+    def median(self) -> float:
+        return statistics.median(self.latencies) if self.latencies else 0.0
+
+    def p95(self) -> float | None:
+        if len(self.latencies) < MIN_SAMPLES_FOR_P95:
+            return None
+        return statistics.quantiles(self.latencies, n=20, method="inclusive")[-1]
+
+    def snapshot(self) -> dict[str, float | int | None]:
+        return {
+            "samples": len(self.outcomes),
+            "median": round(self.median(), 3),
+            "p95": self.p95(),
+            "error_rate": round(self.error_rate, 3),
+        }
+
+    def describe(self) -> str:
+        p95 = self.p95()
+        return (
+            f"{len(self.outcomes)} finished, median {self.median():.2f}s, "
+            f"p95 {'-' if p95 is None else f'{p95:.2f}s'}, errors {self.error_rate:.0%}"
+        )
+
+
+class TranscriptionRouter:
+    """Pick the fastest healthy backend and hedge slow requests to a second one.
+
+    A request starts on the best-ranked backend; if it has not answered within
+    that backend's observed p95 latency (or ``hedge_delay`` until enough
+    samples exist), a duplicate goes to the next backend and whichever succeeds
+    first wins. Failures fall through to the next backend immediately.
+    Streaming requests are not duplicated (two live previews would fight), they
+    only fail over.
+    """
+
+    def __init__(
+        self,
+        backends: list[TranscriptionBackend],
+        hedge_delay: float = 8.0,
+        settings: Settings | None = None,
+    ) -> None:
+        if not backends:
+            raise ValueError("At least one transcription backend is required")
+        self.backends = backends
+        self.hedge_delay = hedge_delay
+        self.settings = settings
+        self.stats = {backend.name: BackendStats() for backend in backends}
+        self.requests = 0
+        self._clients: dict[str, Any] = {}
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "TranscriptionRouter":
+        return cls(
+            settings.resolved_transcription_backends(),
+            hedge_delay=settings.transcription_hedge_delay,
+            settings=settings,
+        )
+
+    def ranked(self) -> list[TranscriptionBackend]:
+        order = {backend.name: index for index, backend in enumerate(self.backends)}
+        return sorted(
+            self.backends,
+            key=lambda backend: (
+                not self.stats[backend.name].healthy,
+                self.stats[backend.name].median(),
+                order[backend.name],
+            ),
+        )
+
+    def log_stats(self) -> None:
+        """Log the rolling latency/error window of every backend."""
+        logger.info(
+            "Transcription backends after %d requests: %s",
+            self.requests,
+            "; ".join(f"{name}: {stats.describe()}" for name, stats in self.stats.items()),
+        )
+
+    def _hedge_after(self, backend: TranscriptionBackend) -> float:
+        p95 = self.stats[backend.name].p95()
+        return p95 if p95 is not None else self.hedge_delay
+
+    def _client(self, backend: TranscriptionBackend) -> Any:
+        client = self._clients.get(backend.name)
+        if client is None:
+            from openai import AsyncOpenAI
+
+            # The router does its own failover, so SDK-level retries would only
+            # delay switching to a healthy backend.
+            client = AsyncOpenAI(
+                base_url=backend.base_url,
+                api_key=backend.api_key.get_secret_value() if backend.api_key else "",
+                max_retries=0,
+            )
+            self._clients[backend.name] = client
+        return client
+
+    async def _attempt(
+        self,
+        backend: TranscriptionBackend,
+        audio_base64: str,
+        on_partial: Callable[[str], Awaitable[None]] | None,
+    ) -> str:
+        stats = self.stats[backend.name]
+        started = time.monotonic()
+        try:
+            text = await request_transcription(
+                self._client(backend), backend.model, audio_base64, on_partial
+            )
+        except asyncio.CancelledError:
+            stats.record_cancelled(time.monotonic() - started)
+            raise
+        except Exception:
+            stats.record_failure()
+            logger.warning("Transcription backend %s failed", backend.name, exc_info=True)
+            raise
+        stats.record_success(time.monotonic() - started)
+        return text
+
+    async def transcribe(
+        self,
+        audio_base64: str,
+        on_partial: Callable[[str], Awaitable[None]] | None = None,
+    ) -> str:
+        self.requests += 1
+        if self.requests % STATS_LOG_EVERY == 0:
+            self.log_stats()
+        remaining = self.ranked()
+        last_error: BaseException | None = None
+
+        if on_partial is not None:
+            for backend in remaining:
+                try:
+                    return await self._attempt(backend, audio_base64, on_partial)
+                except Exception as exc:
+                    last_error = exc
+            raise RuntimeError("Transcription failed") from last_error
+
+        pending: dict[asyncio.Task, TranscriptionBackend] = {}
+
+        def launch() -> TranscriptionBackend:
+            backend = remaining.pop(0)
+            task = asyncio.create_task(self._attempt(backend, audio_base64, None))
+            pending[task] = backend
+            return backend
+
+        leader = launch()
+        try:
+            while pending:
+                timeout = (
+                    self._hedge_after(leader)
+                    if remaining and len(pending) == 1
+                    else None
+                )
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    hedge = launch()
+                    logger.info(
+                        "Backend %s slower than %.1fs, hedging to %s",
+                        leader.name,
+                        timeout,
+                        hedge.name,
+                    )
+                    continue
+                for task in done:
+                    pending.pop(task)
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+                if not pending and remaining:
+                    leader = launch()
+                elif pending:
+                    leader = next(iter(pending.values()))
+        finally:
+            for task in pending:
+                task.cancel()
+        raise RuntimeError("Transcription failed") from last_error
+
+    async def aclose(self) -> None:
+        if self.requests:
+            self.log_stats()
+        for client in self._clients.values():
+            try:
+                await client.close()
+            except Exception:  # pragma: no cover - best-effort cleanup
+                pass
+        self._clients.clear()
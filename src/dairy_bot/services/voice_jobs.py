@@ -0,0 +1,286 @@
+import asyncio
+import itertools
+import logging
+import tempfile
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError
+from aiogram.types import Message
+
+from dairy_bot.config import Settings
+from dairy_bot.services.ai_service import transcribe_audio
+from dairy_bot.services.audio import AudioReport, SilenceTrim, convert_to_wav
+from dairy_bot.services.send_queue import SendQueue
+from dairy_bot.texts import messages
+
+logger = logging.getLogger(__name__)
+
+STAGE_QUEUED = "queued"
+STAGE_DOWNLOADING = "downloading"
+STAGE_CONVERTING = "converting"
+STAGE_TRANSCRIBING = "transcribing"
+STAGE_DONE = "done"
+STAGE_FAILED = "failed"
+
+_job_ids = itertools.count(1)
+
+
+@dataclass
+class VoiceJob:
+    chat_id: int
+    user_id: int
+    file_id: str
+    lang: str
+    # SendQueue future of the progress message; it may still be queued.
+    progress: asyncio.Future[Message] | None = None
+    id: int = 0
+    stage: str = STAGE_QUEUED
+    transcription: str = ""
+    audio: AudioReport | None = None
+    error: Exception | None = None
+
+    def __post_init__(self) -> None:
+        if not self.id:
+            self.id = next(_job_ids)
+
+
+JobCallback = Callable[[VoiceJob], Awaitable[None]]
+
+
+class PreviewThrottle:
+    """Coalesce streamed text into progress edits at most once per ``interval``.
+
+    ``update`` never waits for Telegram: if no edit is in flight and the
+    interval has passed it starts one in the background, otherwise the text is
+    dropped (a newer snapshot or the final preview follows). ``flush`` waits
+    for the in-flight edit to finish.
+    """
+
+    def __init__(
+        self, edit: Callable[[str], Awaitable[object]], interval: float
+    ) -> None:
+        self._edit = edit
+        self.interval = interval
+        self._last_edit = 0.0
+        self._task: asyncio.Task | None = None
+
+    async def update(self, text: str) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        if time.monotonic() - self._last_edit < self.interval:
+            return
+        self._last_edit = time.monotonic()
+        self._task = asyncio.create_task(self._edit(text))
+
+    async def flush(self) -> None:
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+class VoiceJobQueue:
+    """Process voice notes in the background with a bounded pool of workers.
+
+    Each job walks through download → ffmpeg → transcription while its progress
+    message is edited at every stage; ``on_complete`` runs once the job has
+    finished, successfully or not. Progress edits go through the send queue
+    and are never waited for by a worker, so a chat's rate limit delays
+    only the messages, not the processing.
+    """
+
+    def __init__(
+        self, bot: Bot, settings: Settings, send_queue: SendQueue, workers: int = 3
+    ) -> None:
+        self.bot = bot
+        self.settings = settings
+        self.send_queue = send_queue
+        self.workers = max(1, workers)
+        self._queue: asyncio.Queue[tuple[VoiceJob, JobCallback]] | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._completions: set[asyncio.Task] = set()
+
+    def _ensure_workers(self) -> asyncio.Queue[tuple[VoiceJob, JobCallback]]:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._tasks = [
+                asyncio.create_task(self._worker(index)) for index in range(self.workers)
+            ]
+        return self._queue
+
+    def submit(self, job: VoiceJob, on_complete: JobCallback) -> int:
+        """Queue a job; returns how many jobs are ahead of it."""
+        queue = self._ensure_workers()
+        if job.progress is not None:
+            job.progress.add_done_callback(_log_failure("Progress message", job))
+        ahead = queue.qsize()
+        queue.put_nowait((job, on_complete))
+        return ahead
+
+    async def close(self) -> None:
+        tasks = [*self._tasks, *self._completions]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._completions.clear()
+        self._queue = None
+
+    async def _worker(self, index: int) -> None:
+        assert self._queue is not None
+        while True:
+            job, on_complete = await self._queue.get()
+            try:
+                await self._process(job)
+            except Exception as exc:
+                logger.warning("Voice job %s failed", job.id, exc_info=True)
+                job.stage = STAGE_FAILED
+                job.error = exc
+            finally:
+                self._queue.task_done()
+            # The callback edits and sends messages; the worker moves on.
+            task = asyncio.create_task(self._complete(job, on_complete))
+            self._completions.add(task)
+            task.add_done_callback(self._completions.discard)
+
+    async def _complete(self, job: VoiceJob, on_complete: JobCallback) -> None:
+        try:
+            await on_complete(job)
+        except Exception:  # pragma: no cover - defensive
+            logger.exception("Voice job %s completion callback failed", job.id)
+
+    async def _process(self, job: VoiceJob) -> None:
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".oga") as temp_oga:
+            temp_oga_path = Path(temp_oga.name)
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_wav:
+            temp_wav_path = Path(temp_wav.name)
+        try:
+            self._set_stage(job, STAGE_DOWNLOADING)
+            await self.bot.download(job.file_id, destination=temp_oga_path)
+            self._set_stage(job, STAGE_CONVERTING)
+            job.audio = await convert_to_wav(
+                temp_oga_path, temp_wav_path, trim=self._silence_trim()
+            )
+            logger.info(
+                "Voice job %s: %.1fs -> %.1fs, removed %.1fs / %d bytes of silence",
+                job.id,
+                job.audio.input_seconds,
+                job.audio.output_seconds,
+                job.audio.removed_seconds,
+                job.audio.removed_bytes,
+            )
+            self._set_stage(job, STAGE_TRANSCRIBING)
+            if self.settings.voice_streaming and job.progress is not None:
+                job.transcription = await self._transcribe_streaming(job, temp_wav_path)
+            else:
+                job.transcription = await transcribe_audio(temp_wav_path, self.settings)
+            job.stage = STAGE_DONE
+        finally:
+            temp_oga_path.unlink(missing_ok=True)
+            temp_wav_path.unlink(missing_ok=True)
+
+    def _silence_trim(self) -> SilenceTrim | None:
+        if not self.settings.vad_enabled:
+            return None
+        return SilenceTrim(
+            threshold_db=self.settings.vad_threshold_db,
+            min_silence=self.settings.vad_min_silence,
+            keep_silence=self.settings.vad_keep_silence,
+        )
+
+    async def _transcribe_streaming(self, job: VoiceJob, wav_path: Path) -> str:
+        """Stream the completion into the progress message as it arrives."""
+        throttle = PreviewThrottle(
+            lambda text: self.edit_progress(
+                job, messages.format_streaming_preview(text, job.lang)
+            ),
+            self.settings.voice_stream_edit_interval,
+        )
+        try:
+            return await transcribe_audio(
+                wav_path, self.settings, on_partial=throttle.update
+            )
+        finally:
+            await throttle.flush()
+
+    def _set_stage(self, job: VoiceJob, stage: str) -> None:
+        """Queue the stage edit without waiting for it to be delivered."""
+        job.stage = stage
+        if job.progress is None:
+            return
+        edit = self.send_queue.submit_edit(
+            job.chat_id, job.progress, messages.t(f"voice_progress_{stage}", job.lang)
+        )
+        edit.add_done_callback(_log_failure("Progress edit", job))
+
+    async def edit_progress(self, job: VoiceJob, text: str, **kwargs) -> bool:
+        """Best-effort edit of the job's progress message; False if it failed."""
+        if job.progress is None:
+            return False
+        try:
+            await self.send_queue.submit_edit(job.chat_id, job.progress, text, **kwargs)
+        except TelegramAPIError:
+            logger.debug("Progress edit failed for voice job %s", job.id, exc_info=True)
+            return False
+        return True
+
+
+def _log_failure(action: str, job: VoiceJob) -> Callable[[asyncio.Future], None]:
+    """Done-callback that logs (and so retrieves) a failed progress send or edit."""
+
+    def callback(future: asyncio.Future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            logger.debug(
+                "%s failed for voice job %s", action, job.id, exc_info=future.exception()
+            )
+
+    return callback
+
+
+class PendingReviews:
+    """Finished transcriptions waiting for a Save/Edit/Cancel decision, per user.
+
+    Only the head of each user's queue is presented at a time; new uploads keep
+    being processed and simply line up behind it.
+    """
+
+    def __init__(self) -> None:
+        self._queues: dict[int, deque[VoiceJob]] = {}
+
+    def add(self, job: VoiceJob) -> int:
+        """Queue a job for review and return its position (0 means shown now)."""
+        queue = self._queues.setdefault(job.user_id, deque())
+        queue.append(job)
+        return len(queue) - 1
+
+    def head(self, user_id: int) -> VoiceJob | None:
+        queue = self._queues.get(user_id)
+        return queue[0] if queue else None
+
+    def get(self, user_id: int, job_id: int) -> VoiceJob | None:
+        for job in self._queues.get(user_id, ()):
+            if job.id == job_id:
+                return job
+        return None
+
+    def resolve(self, user_id: int, job_id: int) -> VoiceJob | None:
+        """Drop a decided job and return the next one to present, if it changed."""
+        queue = self._queues.get(user_id)
+        if not queue:
+            return None
+        was_head = queue[0].id == job_id
+        for job in list(queue):
+            if job.id == job_id:
+                queue.remove(job)
+                break
+        if not queue:
+            self._queues.pop(user_id, None)
+            return None
+        return queue[0] if was_head else None
+
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
@@ -1,4 +1,14 @@
+from __future__ import annotations
+
 from html import escape
+from typing import TYPE_CHECKING, Sequence
+
+if TYPE_CHECKING:
+    from datetime import datetime
+
+    from dairy_bot.services.mirrors import MirrorStatus
+    from dairy_bot.services.related import RelatedEntry
+    from dairy_bot.services.reminders import ReminderSchedule
 
 LANG_EN = "en"
 LANG_RU = "ru"
@@ -27,9 +37,29 @@ MESSAGES = {
         LANG_EN: "✅ Saved locally, but sync failed.",
         LANG_RU: "✅ Сохранено локально, но синхронизация не удалась.",
     },
-    "voice_pending_decision": {
-        LANG_EN: "You still have a voice note waiting. Confirm or edit it first.",
-        LANG_RU: "У вас есть неподтверждённая голосовая заметка. Сначала подтвердите или исправьте её.",
+    "voice_progress_queued": {
+        LANG_EN: "⏳ Voice note queued…",
+        LANG_RU: "⏳ Голосовая заметка в очереди…",
+    },
+    "voice_progress_downloading": {
+        LANG_EN: "⬇️ Downloading voice note…",
+        LANG_RU: "⬇️ Загружаю голосовую заметку…",
+    },
+    "voice_progress_converting": {
+        LANG_EN: "🎛 Preparing audio…",
+        LANG_RU: "🎛 Подготавливаю аудио…",
+    },
+    "voice_progress_transcribing": {
+        LANG_EN: "📝 Transcribing…",
+        LANG_RU: "📝 Расшифровываю…",
+    },
+    "voice_progress_done": {
+        LANG_EN: "✅ Transcribed, see the preview below.",
+        LANG_RU: "✅ Расшифровано, предпросмотр ниже.",
+    },
+    "voice_progress_waiting": {
+        LANG_EN: "✅ Transcribed. Waiting for review ({position} ahead).",
+        LANG_RU: "✅ Расшифровано. Ждёт проверки (перед ней: {position}).",
     },
     "voice_prompt_edit": {
         LANG_EN: "✏️ Send the updated text and I'll save it.",
@@ -47,13 +77,33 @@ MESSAGES = {
         LANG_EN: "I couldn't hear anything in that recording. Want to try again?",
         LANG_RU: "В записи не было звука. Попробуем ещё раз?",
     },
+    "attachment_error": {
+        LANG_EN: "⚠️ I couldn't save that file. Please try again.",
+        LANG_RU: "⚠️ Не удалось сохранить файл. Попробуйте ещё раз.",
+    },
     "unauthorized": {
         LANG_EN: "🔒 This bot is private. Access is restricted.",
         LANG_RU: "🔒 Это приватный бот. Доступ ограничен.",
     },
     "reminder_message": {
-        LANG_EN: "⏰ Evening nudge: today's page is still empty. Want to jot something down?",
-        LANG_RU: "⏰ Вечернее напоминание: страница за сегодня пустая. Что-то добавить?",
+        LANG_EN: "⏰ Reminder: today's page is still empty. Want to jot something down?",
+        LANG_RU: "⏰ Напоминание: страница за сегодня пустая. Что-то добавить?",
+    },
+    "reminders_status": {
+        LANG_EN: "<b>⏰ Reminders {state}</b>\nTimes: {times}\nDays: {days}\nQuiet hours: {quiet}\nTimezone: {timezone}\nNext: {next}",
+        LANG_RU: "<b>⏰ Напоминания {state}</b>\nВремя: {times}\nДни: {days}\nТихие часы: {quiet}\nЧасовой пояс: {timezone}\nСледующее: {next}",
+    },
+    "reminders_on": {
+        LANG_EN: "on",
+        LANG_RU: "включены",
+    },
+    "reminders_off": {
+        LANG_EN: "off",
+        LANG_RU: "выключены",
+    },
+    "reminders_usage": {
+        LANG_EN: "Usage: /reminders 09:00 20:30 · /reminders days weekdays|all|mon,wed · /reminders quiet 22:00-07:00|off · /reminders tz Europe/Berlin · /reminders on|off",
+        LANG_RU: "Формат: /reminders 09:00 20:30 · /reminders days weekdays|all|mon,wed · /reminders quiet 22:00-07:00|off · /reminders tz Europe/Berlin · /reminders on|off",
     },
     "start_prompt": {
         LANG_EN: "Welcome! Choose your language to begin.",
@@ -87,10 +137,166 @@ MESSAGES = {
         LANG_EN: "Nothing to save.",
         LANG_RU: "Нет данных для сохранения.",
     },
+    "catch_up_saved": {
+        LANG_EN: "📥 Saved {count} message(s) sent while I was offline, synced.",
+        LANG_RU: "📥 Сохранено сообщений, отправленных пока я был офлайн: {count}. Синхронизировано.",
+    },
+    "catch_up_saved_local": {
+        LANG_EN: "📥 Saved {count} message(s) sent while I was offline, but sync failed.",
+        LANG_RU: "📥 Сохранено сообщений, отправленных пока я был офлайн: {count}, но синхронизация не удалась.",
+    },
     "today_empty": {
         LANG_EN: "No entries for today yet.",
         LANG_RU: "За сегодня пока нет записей.",
     },
+    "entries_empty": {
+        LANG_EN: "No entries for {date}.",
+        LANG_RU: "За {date} записей нет.",
+    },
+    "entries_header": {
+        LANG_EN: "📋 Entries for {date}",
+        LANG_RU: "📋 Записи за {date}",
+    },
+    "entries_hint": {
+        LANG_EN: "Use /edit &lt;id&gt; [text] or /delete &lt;id&gt;.",
+        LANG_RU: "Используйте /edit &lt;id&gt; [текст] или /delete &lt;id&gt;.",
+    },
+    "entry_usage_edit": {
+        LANG_EN: "Usage: /edit &lt;id&gt; [new text]. Ids are listed by /entries.",
+        LANG_RU: "Формат: /edit &lt;id&gt; [новый текст]. Номера показывает /entries.",
+    },
+    "entry_usage_delete": {
+        LANG_EN: "Usage: /delete &lt;id&gt;. Ids are listed by /entries.",
+        LANG_RU: "Формат: /delete &lt;id&gt;. Номера показывает /entries.",
+    },
+    "entry_not_found": {
+        LANG_EN: "Entry {id} not found.",
+        LANG_RU: "Запись {id} не найдена.",
+    },
+    "entry_changed": {
+        LANG_EN: "⚠️ The note changed since entry {id} was listed, so nothing was changed. List the entries again with /entries.",
+        LANG_RU: "⚠️ Заметка изменилась с тех пор, как была показана запись {id}, поэтому ничего не изменено. Выведите записи заново через /entries.",
+    },
+    "entry_prompt_edit": {
+        LANG_EN: "✏️ Entry {id} currently reads:\n<blockquote>{text}</blockquote>\nSend the new text.",
+        LANG_RU: "✏️ Сейчас запись {id} такая:\n<blockquote>{text}</blockquote>\nОтправьте новый текст.",
+    },
+    "entry_updated": {
+        LANG_EN: "✅ Entry {id} updated and synced.",
+        LANG_RU: "✅ Запись {id} обновлена и синхронизирована.",
+    },
+    "entry_updated_local": {
+        LANG_EN: "✅ Entry {id} updated locally, but sync failed.",
+        LANG_RU: "✅ Запись {id} обновлена локально, но синхронизация не удалась.",
+    },
+    "entry_deleted": {
+        LANG_EN: "🗑 Entry {id} deleted and synced.",
+        LANG_RU: "🗑 Запись {id} удалена и синхронизирована.",
+    },
+    "entry_deleted_local": {
+        LANG_EN: "🗑 Entry {id} deleted locally, but sync failed.",
+        LANG_RU: "🗑 Запись {id} удалена локально, но синхронизация не удалась.",
+    },
+    "related_header": {
+        LANG_EN: "🔗 Related entries",
+        LANG_RU: "🔗 Похожие записи",
+    },
+    "related_empty": {
+        LANG_EN: "No related entries found.",
+        LANG_RU: "Похожих записей не нашлось.",
+    },
+    "related_unavailable": {
+        LANG_EN: "Related entries are not available on this installation.",
+        LANG_RU: "Поиск похожих записей недоступен в этой установке.",
+    },
+    "profile_usage": {
+        LANG_EN: "Usage: /profile &lt;seconds&gt; (1–{max}).",
+        LANG_RU: "Формат: /profile &lt;секунды&gt; (1–{max}).",
+    },
+    "profile_started": {
+        LANG_EN: "⏱ Profiling for {seconds}s…",
+        LANG_RU: "⏱ Профилирую {seconds} с…",
+    },
+    "profile_busy": {
+        LANG_EN: "A profile is already being recorded.",
+        LANG_RU: "Профилирование уже идёт.",
+    },
+    "profile_caption": {
+        LANG_EN: "Sampling profile: {seconds}s, {samples} samples every {interval} ms. Collapsed stacks for flamegraph.pl / speedscope.",
+        LANG_RU: "Профиль: {seconds} с, {samples} замеров каждые {interval} мс. Свёрнутые стеки для flamegraph.pl / speedscope.",
+    },
+    "tags_header": {
+        LANG_EN: "{name} — {count} entries (page {page}/{pages})",
+        LANG_RU: "{name} — записей: {count} (стр. {page}/{pages})",
+    },
+    "tags_empty": {
+        LANG_EN: "No entries with {name}.",
+        LANG_RU: "Нет записей с {name}.",
+    },
+    "tags_top": {
+        LANG_EN: "Most used tags:",
+        LANG_RU: "Частые теги:",
+    },
+    "tags_none": {
+        LANG_EN: "No #tags in the journal yet.",
+        LANG_RU: "В журнале пока нет #тегов.",
+    },
+    "tags_disabled": {
+        LANG_EN: "The tag index is turned off.",
+        LANG_RU: "Индекс тегов отключён.",
+    },
+    "backlinks_usage": {
+        LANG_EN: "Usage: /backlinks &lt;note&gt;, e.g. /backlinks Project X",
+        LANG_RU: "Формат: /backlinks &lt;заметка&gt;, например /backlinks Project X",
+    },
+    "mirrors_header": {
+        LANG_EN: "<b>🪞 Mirrors</b>",
+        LANG_RU: "<b>🪞 Зеркала</b>",
+    },
+    "mirrors_none": {
+        LANG_EN: "No mirrors configured (GIT_MIRRORS).",
+        LANG_RU: "Зеркала не настроены (GIT_MIRRORS).",
+    },
+    "mirror_ok": {
+        LANG_EN: "✅ {name}: up to date ({commit}, {when})",
+        LANG_RU: "✅ {name}: актуально ({commit}, {when})",
+    },
+    "mirror_pending": {
+        LANG_EN: "⏳ {name}: pushing {commit}",
+        LANG_RU: "⏳ {name}: отправляется {commit}",
+    },
+    "mirror_idle": {
+        LANG_EN: "💤 {name}: nothing pushed since start",
+        LANG_RU: "💤 {name}: с запуска ничего не отправлялось",
+    },
+    "mirror_failing": {
+        LANG_EN: "⚠️ {name}: {failures} failed attempts, next at {retry}\n<code>{error}</code>",
+        LANG_RU: "⚠️ {name}: неудачных попыток: {failures}, следующая в {retry}\n<code>{error}</code>",
+    },
+    "mirrors_retrying": {
+        LANG_EN: "Retrying failed mirrors now.",
+        LANG_RU: "Повторяю отправку на зеркала.",
+    },
+    "calendar_caption": {
+        LANG_EN: "📅 {year}: {days} days with notes, longest streak {streak} days, {kib} KiB written",
+        LANG_RU: "📅 {year}: дней с записями — {days}, самая длинная серия — {streak} дн., написано {kib} КиБ",
+    },
+    "calendar_empty": {
+        LANG_EN: "No notes in {year}.",
+        LANG_RU: "В {year} году записей нет.",
+    },
+    "calendar_usage": {
+        LANG_EN: "Usage: /calendar [year], e.g. /calendar 2023",
+        LANG_RU: "Формат: /calendar [год], например /calendar 2023",
+    },
+    "calendar_months": {
+        LANG_EN: "Jan Feb Mar Apr May Jun Jul Aug Sep Oct Nov Dec",
+        LANG_RU: "Янв Фев Мар Апр Май Июн Июл Авг Сен Окт Ноя Дек",
+    },
+    "note_header": {
+        LANG_EN: "📓 Note for {date}",
+        LANG_RU: "📓 Заметки за {date}",
+    },
     "today_header": {
         LANG_EN: "📓 Today's note ({date})",
         LANG_RU: "📓 Заметки за сегодня ({date})",
@@ -118,9 +324,75 @@ def format_transcription_preview(transcription: str, lang: str | None = None) ->
     return f"<b>{title}</b>\n<blockquote>{safe_text}</blockquote>\n{question}"
 
 
-def format_today_note(date_label: str, content: str, lang: str | None = None) -> str:
-    """Render today's note with a localized heading."""
-    title = t("today_header", lang).format(date=escape(date_label))
+def format_streaming_preview(
+    partial: str, lang: str | None = None, max_len: int = 3500
+) -> str:
+    """Render an in-progress transcription, keeping only the newest text."""
+    text = partial.strip()
+    if len(text) > max_len:
+        text = "…" + text[-max_len:]
+    title = t("voice_preview_title", lang)
+    return f"<b>{title}</b>\n<blockquote>{escape(text)} ▍</blockquote>"
+
+
+def format_related(entries: Sequence[RelatedEntry], lang: str | None = None) -> str:
+    """Render a short list of related entries, one line each."""
+    lines = [f"<b>{t('related_header', lang)}</b>"]
+    for entry in entries:
+        lines.append(
+            f"<code>{entry.day:%Y-%m-%d} {entry.time_label}</code> — {escape(entry.snippet)}"
+        )
+    return "\n".join(lines)
+
+
+def format_reminder_schedule(
+    schedule: ReminderSchedule, next_at: datetime | None, lang: str | None = None
+) -> str:
+    """Render a reminder schedule with its next due moment."""
+    quiet = "—"
+    if schedule.quiet:
+        quiet = f"{schedule.quiet[0]:%H:%M}–{schedule.quiet[1]:%H:%M}"
+    return t("reminders_status", lang).format(
+        state=t("reminders_on" if schedule.enabled else "reminders_off", lang),
+        times=", ".join(f"{moment:%H:%M}" for moment in schedule.times),
+        days=schedule.weekdays_label,
+        quiet=quiet,
+        timezone=escape(schedule.timezone.key),
+        next=f"{next_at:%Y-%m-%d %H:%M}" if next_at else "—",
+    )
+
+
+def format_mirror_status(statuses: Sequence[MirrorStatus], lang: str | None = None) -> str:
+    """One line per mirror: up to date, pushing, or failing with the last error."""
+    if not statuses:
+        return t("mirrors_none", lang)
+    lines = [t("mirrors_header", lang)]
+    for status in statuses:
+        name = escape(status.name)
+        if status.failures:
+            retry = f"{status.retry_at:%H:%M:%S}" if status.retry_at else "—"
+            line = t("mirror_failing", lang).format(
+                name=name,
+                failures=status.failures,
+                retry=retry,
+                error=escape(status.last_error or ""),
+            )
+        elif status.pending:
+            line = t("mirror_pending", lang).format(name=name, commit=status.pending[:8])
+        elif status.pushed:
+            when = f"{status.last_success:%H:%M:%S}" if status.last_success else "—"
+            line = t("mirror_ok", lang).format(name=name, commit=status.pushed[:8], when=when)
+        else:
+            line = t("mirror_idle", lang).format(name=name)
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def format_today_note(
+    date_label: str, content: str, lang: str | None = None, title_key: str = "today_header"
+) -> str:
+    """Render a daily note (today's by default) with a localized heading."""
+    title = t(title_key, lang).format(date=escape(date_label))
     safe_body = escape(content.strip())
     if not safe_body:
         return title
@@ -0,0 +1,92 @@
+"""Import a Telegram Desktop export or a folder of voice recordings.
+
+    python src/import_archive.py ~/Downloads/ChatExport/result.json --from 123456
+    python src/import_archive.py ~/voice-memos --concurrency 8
+
+Uses the bot's .env (JOURNAL_DIR, TIMEZONE, transcription backends, git).
+Stop the bot while importing; both would write to the same working tree.
+Re-running after a crash continues with the first uncommitted day and
+reuses finished transcriptions.
+"""
+
+import argparse
+import asyncio
+import logging
+import shutil
+import sys
+from pathlib import Path
+
+from dairy_bot.config import Settings
+from dairy_bot.services.importer import (
+    DEFAULT_COMMIT_ENTRIES,
+    DEFAULT_CONCURRENCY,
+    ImportState,
+    JournalImporter,
+    read_source,
+)
+from dairy_bot.services.registry import ServiceRegistry
+
+logger = logging.getLogger(__name__)
+
+
+async def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", type=Path, help="result.json, its folder, or an audio folder")
+    parser.add_argument(
+        "--from", dest="from_id", help="only messages from this Telegram user id"
+    )
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument(
+        "--commit-entries",
+        type=int,
+        default=DEFAULT_COMMIT_ENTRIES,
+        help="entries per commit (whole days are never split)",
+    )
+    parser.add_argument(
+        "--restart", action="store_true", help="forget the progress of an earlier run"
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
+    )
+
+    settings = Settings()
+    services = ServiceRegistry(settings)
+    items = read_source(args.source, settings.timezone, args.from_id)
+    audio = sum(1 for item in items if item.audio is not None)
+    logger.info("Found %d entries in %s (%d audio)", len(items), args.source, audio)
+
+    state = ImportState.for_source(settings.resolved_state_dir(), args.source)
+    if args.restart:
+        shutil.rmtree(state.directory, ignore_errors=True)
+    importer = JournalImporter(
+        settings,
+        services.git,
+        state,
+        concurrency=max(1, args.concurrency),
+        commit_entries=max(1, args.commit_entries),
+    )
+    report = await importer.run(items)
+
+    print(
+        f"Imported {report.entries} entries into {report.days} days "
+        f"({report.notes_written} notes written, {report.commits} commits) "
+        f"in {report.seconds:.1f}s: {report.entries_per_second:.1f} entries/s"
+    )
+    print(
+        f"Transcribed {report.transcribed} files, reused {report.cached_transcripts} "
+        f"transcripts, skipped {report.skipped_done} entries imported earlier"
+    )
+    if not report.synced:
+        print("Some commits were not pushed; the bot pushes them with its next save.")
+    if report.failed:
+        print(f"{len(report.failed)} files failed to transcribe; run again to retry:")
+        for path in report.failed[:20]:
+            print(f"  {path}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))